@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+解码热路径追踪开销基准:
+    python bench_trace.py [帧数] [每批帧数]
+
+三种模式都按 RxDispatcher 的方式把帧分批交给 handle_messages, 走同一条处理路径
+(解码, 时基映射, 信号订阅, 处理函数, 每批发布一次快照), 只有日志/追踪不同:
+legacy:   每帧在处理函数中构造 f-string 调用 log.debug (旧实现, 日志级别 ERROR 时仍然格式化)
+disabled: 追踪关闭, 每帧只多一次 tracer.enabled 判断
+enabled:  追踪开启, 二进制记录由后台线程写入临时文件
+"""
+
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+import can
+
+from vehicle.hooke2 import HOOKE2CanReportHandler, HOOKE2_REPORT_DECODERS
+from vehicle.trace import FrameTracer
+
+
+def make_messages(count):
+    frame_ids = list(HOOKE2_REPORT_DECODERS)
+    rng = random.Random(0)
+    return [
+        can.Message(
+            arbitration_id=rng.choice(frame_ids),
+            data=bytes(rng.getrandbits(8) for _ in range(8)),
+            timestamp=i * 0.001,
+        )
+        for i in range(count)
+    ]
+
+
+def _with_debug_log(log, frame_id, handle):
+    decoder = HOOKE2_REPORT_DECODERS[frame_id]
+
+    def legacy_handle(signals, timestamp):
+        log.debug(
+            f"{decoder.name} (0x{frame_id:03X}): "
+            + ", ".join(f"{name}: {value:.2f}" for name, value in zip(decoder.names, signals))
+        )
+        handle(signals, timestamp)
+
+    return legacy_handle
+
+
+def legacy_handler(logger):
+    """
+    旧实现: 与 HOOKE2CanReportHandler 相同, 但每个处理函数先构造 f-string 调用 log.debug。
+    """
+    handler = HOOKE2CanReportHandler(logger)
+    handler._dispatch = {
+        frame_id: (decode, _with_debug_log(logger, frame_id, handle))
+        for frame_id, (decode, handle) in handler._dispatch.items()
+    }
+    return handler
+
+
+def run(label, handler, batches, count):
+    handle_messages = handler.handle_messages
+    start = time.perf_counter()
+    for batch in batches:
+        handle_messages(batch)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>9}: {elapsed / count * 1e9:8.0f} ns/frame")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    logging.basicConfig(level=logging.ERROR)
+    logger = logging.getLogger("bench")
+    messages = make_messages(count)
+    batches = [messages[i:i + batch_size] for i in range(0, count, batch_size)]
+
+    legacy = run("legacy", legacy_handler(logger), batches, count)
+    disabled = run("disabled", HOOKE2CanReportHandler(logger), batches, count)
+
+    tracer = FrameTracer()
+    path = os.path.join(tempfile.mkdtemp(), "bench.trace")
+    tracer.start(path)
+    enabled = run("enabled", HOOKE2CanReportHandler(logger, tracer=tracer), batches, count)
+    tracer.stop()
+
+    print(
+        f"batch {batch_size}: legacy logging costs {(legacy - disabled) / count * 1e9:.0f} ns/frame, "
+        f"tracing costs {(enabled - disabled) / count * 1e9:.0f} ns/frame "
+        f"({tracer.written} records, {tracer.dropped} dropped, {os.path.getsize(path)} bytes)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+记录导出为按信号的列存表:
+    python export_signals.py 记录文件 输出 [--format npz|parquet] [--workers N] [--chunk-frames 1048576]
+                             [--cache-dir 目录] [--cache-size 2048] [--clear-cache]
+    python export_signals.py --clear-cache [--cache-dir 目录]
+
+记录文件: FrameRecorder 的 .bin
+输出:     npz 为文件, parquet 为目录 (每个报文一个文件, 需要 pyarrow)
+--workers: 解码进程数, 默认为 CPU 核数
+每块的解码结果按内容哈希缓存, 再次导出同一记录时不重新解码
+--cache-size:  缓存上限 (MiB), 超过时删除最久未使用的块, 0 为不限制
+--clear-cache: 导出前清空缓存, 不指定记录文件时只清空缓存
+"""
+
+import argparse
+
+from vehicle.signal_export import DEFAULT_CACHE_BYTES, EXPORT_FORMATS, clear_cache, export_signals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a CAN recording to per-signal columns")
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="npz")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--chunk-frames", type=int, default=1 << 20)
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_BYTES >> 20)
+    parser.add_argument("--clear-cache", action="store_true")
+    args = parser.parse_args()
+    if args.path is None and not args.clear_cache:
+        parser.error("the following arguments are required: path, output")
+    if args.path is not None and args.output is None:
+        parser.error("the following arguments are required: output")
+
+    if args.clear_cache:
+        print(f"removed {clear_cache(args.cache_dir)} cached files")
+        if args.path is None:
+            return
+    stats = export_signals(
+        args.path, args.output, fmt=args.format, workers=args.workers,
+        chunk_frames=args.chunk_frames, cache_dir=args.cache_dir,
+        max_cache_bytes=args.cache_size << 20 if args.cache_size > 0 else None,
+    )
+    for frame_id, rows in sorted(stats["rows"].items()):
+        print(f"0x{frame_id:03X}: {rows} rows")
+    total = stats["decode_time"] + stats["write_time"]
+    print(
+        f"{stats['frames']} frames in {stats['chunks']} chunks ({stats['cached']} cached, "
+        f"{stats['chunks'] - stats['read']} not read, {stats['evicted']} evicted), "
+        f"decode {stats['decode_time']:.2f} s, write {stats['write_time']:.2f} s, "
+        f"{stats['frames'] / total / 1e6 if total else 0:.1f} M frames/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
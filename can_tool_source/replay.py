@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+记录回放:
+    python replay.py 记录文件 [--speed 1] [--loop] [--include 0x500-0x516] [--exclude 0x507,0x508]
+                     [--interface virtual --channel replay] [--vehicle Hooke2|LMT] [--dbc hooke2.dbc] [--rx-only]
+
+记录文件: FrameRecorder 的 .bin, 或 python-can 支持的 .blf/.asc 等
+--speed:   回放倍速, 0 为尽快回放
+--interface/--channel: 回放到 python-can 总线 (不指定时只解码)
+--vehicle: 回放帧经该车型的报文处理类解码 (与界面实时接收相同的路径), 结束时打印车辆状态和统计
+--dbc:     该车型的 DBC 文件, 用生成的解码代替内置信号表 (默认取 CAN_TOOL_HOOKE2_DBC / CAN_TOOL_LMT_DBC)
+"""
+
+import argparse
+import logging
+import os
+import time
+
+import can
+
+from vehicle.hooke2 import HOOKE2CanReportHandler
+from vehicle.lmt import LMTCanReportHandler
+from vehicle.replay import ReplayEngine, ReplaySource
+from vehicle.rx_dispatch import RxDispatcher
+
+REPORT_HANDLERS = {
+    "Hooke2": HOOKE2CanReportHandler,
+    "LMT": LMTCanReportHandler,
+}
+
+DBC_ENVIRONMENT = {
+    "Hooke2": "CAN_TOOL_HOOKE2_DBC",
+    "LMT": "CAN_TOOL_LMT_DBC",
+}
+
+
+def parse_ids(text):
+    """
+    解析 "0x500-0x516,0x620" 形式的 ID 列表。
+    """
+    if not text:
+        return None
+    frame_ids = set()
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        low = int(low, 0)
+        frame_ids.update(range(low, int(high, 0) + 1) if high else (low,))
+    return frame_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a CAN recording")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--loop", action="store_true")
+    parser.add_argument("--include", type=parse_ids)
+    parser.add_argument("--exclude", type=parse_ids)
+    parser.add_argument("--rx-only", action="store_true")
+    parser.add_argument("--interface")
+    parser.add_argument("--channel")
+    parser.add_argument("--bitrate", type=int, default=500000)
+    parser.add_argument("--vehicle", choices=sorted(REPORT_HANDLERS), default="Hooke2")
+    parser.add_argument("--dbc")
+    args = parser.parse_args()
+    dbc_path = args.dbc or os.environ.get(DBC_ENVIRONMENT[args.vehicle])
+
+    logging.basicConfig(level=logging.ERROR)
+    logger = logging.getLogger("replay")
+
+    try:
+        handler = REPORT_HANDLERS[args.vehicle](logger, dbc_path)
+    except (OSError, ValueError) as e:
+        parser.error(f"cannot load DBC {dbc_path}: {e}")
+
+    bus = None
+    if args.interface:
+        bus = can.Bus(interface=args.interface, channel=args.channel, bitrate=args.bitrate)
+
+    dispatcher = RxDispatcher(logger)
+    dispatcher.add_listener("decoder", handler.handle_messages)
+
+    source = ReplaySource(args.path, args.include, args.exclude, args.rx_only)
+    engine = ReplayEngine(source, bus=bus, on_frames=dispatcher.dispatch, speed=args.speed, loop=args.loop, log=logger)
+    start = time.perf_counter()
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if bus is not None:
+            bus.shutdown()
+    elapsed = time.perf_counter() - start
+
+    stats = engine.summary()
+    print(handler.get_vehicle_status())
+    print(f"{stats['sent']} frames in {elapsed:.3f} s, {stats['loops']} loops, {stats['send_errors']} send errors")
+    if stats["lateness_max"] is not None:
+        print(f"lateness mean {stats['lateness_mean'] * 1e6:.1f} us, "
+              f"p99 {stats['lateness_p99'] * 1e6:.0f} us, max {stats['lateness_max'] * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+在记录中查找条件同时成立的时间区间:
+    python search_recording.py 记录文件 "vehicle_speed > 1.39" "brake_pedal_actual > 20" [--min-duration 0.5]
+
+记录文件: FrameRecorder 的 .bin
+条件:     信号名 比较符 (> >= < <= == !=) 物理值, 同名信号写成 "0x620.cur_fb"
+首次查询时建立按块的信号摘要 (<记录文件>.sum.npz), 之后的查询只解码可能命中的块
+"""
+
+import argparse
+import time
+
+from vehicle.recording import RecordingReader
+from vehicle.signal_summary import RecordingQuery, parse_condition
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search a CAN recording for signal conditions")
+    parser.add_argument("path")
+    parser.add_argument("conditions", nargs="+")
+    parser.add_argument("--min-duration", type=float, default=0.0)
+    args = parser.parse_args()
+    try:
+        conditions = [parse_condition(text) for text in args.conditions]
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    with RecordingReader(args.path) as reader:
+        query = RecordingQuery(reader)
+        opened = time.perf_counter()
+        intervals = query.find(conditions, args.min_duration)
+        elapsed = time.perf_counter() - opened
+        for begin, end in intervals:
+            print(f"{begin - reader.start_time:12.3f} s  {end - reader.start_time:12.3f} s  {end - begin:9.3f} s")
+        print(
+            f"{len(intervals)} intervals, {query.candidate_chunks}/{query.summary.chunks} chunks decoded, "
+            f"open {opened - start:.2f} s, query {elapsed:.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
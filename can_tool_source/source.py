@@ -4,15 +4,29 @@
 from vehicle.hooke2 import HOOKE2CanReportHandler
 from vehicle.hooke2 import HOOKE2CanCommandHandler
 from vehicle.hooke2 import HOOKE2_SEND_PERIOD
+from vehicle.hooke2 import HOOKE2_TX_RATES
+from vehicle.hooke2 import HOOKE2_TX_PRIORITIES
 
 from vehicle.lmt import LMTCanReportHandler
 from vehicle.lmt import LMTCanCommandHandler
 from vehicle.lmt import LMT_SEND_PERIOD
 
 from vehicle.vehicle_status import VehicleStatus
+from vehicle.trace import FrameTracer
+from vehicle.timebase import TimeBase
+from vehicle.periodic import PeriodicCommandSender
+from vehicle.scheduler import DeadlineScheduler
+from vehicle.tx_schedule import MultiRateSchedule
+from vehicle.tx_queue import TxMailbox
+from vehicle.rx_dispatch import RxDispatcher
+from vehicle.can_filters import apply_filters, clear_filters
+from vehicle.frame_monitor import FrameRing, FrameIdTable, format_frame, format_id_stats
+from vehicle.recorder import FrameRecorder, RECORD_FORMATS
+from vehicle.playback import RecordingPlayback
 
 import tkinter as tk
 from tkinter import ttk
+from tkinter import filedialog
 from datetime import datetime
 import time
 import threading
@@ -20,6 +34,7 @@ import logging
 import can
 from collections import deque
 import sys
+import os
 import signal
 
 TITLE = "Edutech CAN Tool"
@@ -27,6 +42,9 @@ TITLE = "Edutech CAN Tool"
 PADX = 5
 PADY = 5
 
+# 离线分析时曲线覆盖播放头之前的时长 (秒), 与实时曲线 100 点 x 100 ms 相同
+PLAYBACK_HISTORY_SPAN = 10.0
+
 def detect_pcan_channels(max_channels=4):
     found = []
     for i in range(1, max_channels + 1):
@@ -39,12 +57,162 @@ def detect_pcan_channels(max_channels=4):
             continue
     return found
 
+class FrameMonitorView(object):
+    """
+    收发监视窗口: 只在 Tk 线程中按固定刷新率渲染 FrameRing 中可见的几行。
+    默认跟随最新帧; 拖动滚动条或滚轮向上后停在所看的帧上, 滚回底部恢复跟随。
+
+    指定 id_table 时可切换为按 ID 聚合的视图 (per_id), 每个 ID 一行,
+    describe(frame_id, data) 提供该行的解码信号。
+    """
+
+    def __init__(self, root, frame, title, ring, rows=10, refresh_ms=100, id_table=None, describe=None):
+        self.root = root
+        self.frame = frame
+        self.title = title
+        self.ring = ring
+        self.rows = rows
+        self.refresh_ms = refresh_ms
+        self.id_table = id_table
+        self.describe = describe
+        self.per_id = False
+        self.follow = True
+        self.top = 0  # 第一行显示的帧序号, 按 ID 视图中为行号
+        self._rendered = None
+        self.log = logging.getLogger(__name__)
+        self._render_error = None
+
+        self.text = tk.Text(frame, height=rows, width=100, font="Consoles 8", wrap="none", state="disabled")
+        self.text.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
+        self.scrollbar = tk.Scrollbar(frame, command=self.on_scroll)
+        self.scrollbar.grid(row=0, column=1, sticky="nsew")
+        self.text.bind("<MouseWheel>", lambda event: self.scroll_rows(-1 if event.delta > 0 else 1))
+        self.text.bind("<Button-4>", lambda _event: self.scroll_rows(-1))
+        self.text.bind("<Button-5>", lambda _event: self.scroll_rows(1))
+        self.root.after(self.refresh_ms, self.refresh)
+
+    def on_scroll(self, action, value, unit=None):
+        if action == "moveto" and self.per_id:
+            self.set_top(int(float(value) * len(self.id_table)))
+        elif action == "moveto":
+            self.set_top(self.ring.first + int(float(value) * len(self.ring)))
+        elif unit == "pages":
+            self.scroll_rows(int(value) * self.rows)
+        else:
+            self.scroll_rows(int(value))
+
+    def scroll_rows(self, count):
+        self.set_top(self.top + count)
+        return "break"
+
+    def set_top(self, top):
+        if self.per_id:
+            self.top = min(max(top, 0), max(0, len(self.id_table) - self.rows))
+        else:
+            last_top = max(self.ring.first, self.ring.total - self.rows)
+            self.top = min(max(top, self.ring.first), last_top)
+            self.follow = self.top >= last_top
+        self.render()
+
+    def set_per_id(self, per_id):
+        self.per_id = bool(per_id) and self.id_table is not None
+        self.top = 0
+        self.follow = True
+        self._rendered = None
+        self.render()
+
+    def refresh(self):
+        # 先安排下一次刷新, 渲染出错 (例如某一帧解码失败) 时监视窗口不会停止
+        self.root.after(self.refresh_ms, self.refresh)
+        try:
+            self.render()
+        except Exception as e:
+            # 同一错误每次刷新都会出现, 只在变化时记录
+            if repr(e) != self._render_error:
+                self._render_error = repr(e)
+                self.log.exception(f"{self.title} render failed")
+        else:
+            self._render_error = None
+
+    def render(self):
+        if self.per_id:
+            self.render_per_id()
+            return
+        ring = self.ring
+        total = ring.total
+        if self.follow:
+            self.top = max(ring.first, total - self.rows)
+        elif self.top < ring.first:
+            # 正在查看的帧已被挤出
+            self.top = ring.first
+        key = (total, self.top)
+        if key == self._rendered:
+            return
+        self._rendered = key
+
+        frames = ring.window(self.top, self.rows)
+        self.text.config(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, "\n".join(format_frame(frame) for frame in frames))
+        self.text.config(state="disabled")
+
+        count = len(ring)
+        if count:
+            start = (self.top - ring.first) / count
+            self.scrollbar.set(start, start + len(frames) / count)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.frame.config(text=f"{self.title} ({total} frames, {ring.evicted} dropped from view)")
+
+    def render_per_id(self):
+        table = self.id_table
+        key = ("id", table.version, self.top)
+        if key == self._rendered:
+            return
+        self._rendered = key
+
+        rows = table.rows()
+        visible = rows[self.top:self.top + self.rows]
+        lines = []
+        for entry in visible:
+            signals = self.describe(entry.frame_id, entry.data) if self.describe is not None else None
+            lines.append(format_id_stats(entry, signals))
+        self.text.config(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        self.text.config(state="disabled")
+
+        if rows:
+            self.scrollbar.set(self.top / len(rows), (self.top + len(visible)) / len(rows))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.frame.config(text=f"{self.title} ({len(rows)} IDs, period/jitter in ms)")
+
+    def clear(self):
+        self.ring.clear()
+        if self.id_table is not None:
+            self.id_table.clear()
+        self.top = 0
+        self.follow = True
+        self._rendered = None
+
+
 class App(object):
-    def __init__(self, root, log_level=logging.ERROR):
+    def __init__(self, root, log_level=logging.ERROR, trace_path=None, dbc_paths=None):
+        """
+        :param dbc_paths: {车型: DBC 文件}, 指定的车型用 DBC 生成的编解码代替内置信号表
+        """
         logging.basicConfig(level=log_level)
         self.logger = logging.getLogger(__name__)
         self.lock = threading.Lock()
 
+        # 二进制追踪, 未指定 trace_path 时关闭, 热路径无开销
+        self.tracer = FrameTracer()
+        if trace_path:
+            self.tracer.start(trace_path)
+        # 统一时基: 收发时间戳、发送周期和追踪记录都使用主机单调时钟
+        self.timebase = TimeBase()
+
         self.root = root
         self.root.title(TITLE)
         self.root.resizable(False, False)
@@ -55,16 +223,55 @@ class App(object):
 
         self.canbus = None
         self.can_connect_status = False
-        self.can_recv_status = False
-        self.can_send_status = False
+        # 收发监视窗口的定长缓冲区, 内存占用不随运行时间增长
+        self.recv_ring = FrameRing(10000)
+        self.send_ring = FrameRing(2000)
+        # 按 ID 聚合的接收统计, 大小只与 ID 个数有关
+        self.recv_id_table = FrameIdTable()
+        # 接收核心: Notifier 读线程把帧分发给解码/显示等监听函数, 接收开关即 rx_dispatcher.enabled
+        self.rx_dispatcher = RxDispatcher(self.logger)
+        self.rx_dispatcher.add_listener("decoder", self.decode_received_messages)
+        self.rx_dispatcher.add_listener("monitor", self.show_received_messages)
+        self.rx_dispatcher.add_listener("statistics", self.recv_id_table.update)
+        # 收发帧记录, 后台线程写文件, 不阻塞 RX/TX 线程
+        self.recorder = FrameRecorder(timebase=self.timebase)
+        self.rx_dispatcher.add_listener("recorder", self.recorder.record)
+        # 发送开关, 空闲的发送/更新线程阻塞等待, 按下 Send 立即唤醒
+        self.send_event = threading.Event()
+        # 更新线程已退出发送循环 (停止握手), 发送线程在此之后才清空发送信箱
+        self.update_idle = threading.Event()
+        self.update_idle.set()
         self.can_send_messages = []
+        self.periodic_sender = None  # "Periodic" 模式下的驱动层周期发送任务
+        # 按 ID 的多速率发送表, 为 None 时所有报文按 send_period 发送
+        self.hooke2_tx_schedule = MultiRateSchedule(HOOKE2_TX_RATES)
+        self.tx_schedule = None
+        # 按 ID 合并的发送信箱, 制动/转向优先
+        self.tx_mailbox = TxMailbox(HOOKE2_TX_PRIORITIES)
 
         # self.can_report_handler = CanReportHandler(self.logger)
         # self.can_command_handler = CanCommandHandler(self.logger)
-        self.can_report_handler = LMTCanReportHandler(self.logger)
-        self.can_command_handler = LMTCanCommandHandler(self.logger)
+        # 各车型的收发处理类, 选择车型时切换, 并按其接收 ID 表设置接收过滤器
+        self.dbc_paths = {vehicle: path for vehicle, path in (dbc_paths or {}).items() if path}
+        hooke2_dbc = self.dbc_paths.get("Hooke2")
+        lmt_dbc = self.dbc_paths.get("LMT")
+        self.report_handlers = {
+            "Hooke2": HOOKE2CanReportHandler(self.logger, hooke2_dbc, tracer=self.tracer, timebase=self.timebase),
+            "LMT": LMTCanReportHandler(self.logger, lmt_dbc, tracer=self.tracer, timebase=self.timebase),
+        }
+        self.command_handlers = {
+            "Hooke2": HOOKE2CanCommandHandler(self.logger, hooke2_dbc, tracer=self.tracer, timebase=self.timebase),
+            "LMT": LMTCanCommandHandler(self.logger, lmt_dbc, tracer=self.tracer, timebase=self.timebase),
+        }
+        self.can_report_handler = self.report_handlers["LMT"]
+        self.can_command_handler = self.command_handlers["LMT"]
 
         self.vehicle_info_canvas_initialized = False  # 引入标志变量
+        self.vehicle_info_version = -1  # 当前信息面板已显示的快照版本
+        # 离线分析: 打开记录文件后信息面板、曲线和接收监视显示播放头处的内容
+        self.playback = None
+        self.playback_history = None
+        self.playhead_pending = False
 
         self.setup()
 
@@ -72,21 +279,49 @@ class App(object):
         self.thread_event.set()
 
         self.send_period = 0.02
-        self.recv_thread = threading.Thread(target=self.recv_threading_handler)
+        # 发送/指令更新循环使用绝对截止时间调度, 统计每周期的迟到量
+        self.send_scheduler = DeadlineScheduler(self.send_period, timebase=self.timebase)
+        self.update_scheduler = DeadlineScheduler(self.send_period, timebase=self.timebase)
         self.send_thread = threading.Thread(target=self.send_threading_handler)
         self.update_vehicle_data_thread = threading.Thread(target=self.update_vehicle_data_handler)
-        self.recv_thread.start()
         self.send_thread.start()
         self.update_vehicle_data_thread.start()
 
+    @property
+    def can_recv_status(self):
+        return self.rx_dispatcher.enabled.is_set()
+
+    @can_recv_status.setter
+    def can_recv_status(self, value):
+        if value:
+            self.rx_dispatcher.enabled.set()
+        else:
+            self.rx_dispatcher.enabled.clear()
+
+    @property
+    def can_send_status(self):
+        return self.send_event.is_set()
+
+    @can_send_status.setter
+    def can_send_status(self, value):
+        if value:
+            self.send_event.set()
+        else:
+            self.send_event.clear()
+
     def update_vehicle_info_handler(self):
         if not self.vehicle_info_canvas_initialized:
             self.logger.warning("vehicle_info_canvas is not initialized or has been destroyed. Skipping update.")
             return
 
         # print(f'update_vehicle_info_handler status: {self.can_report_handler.get_vehicle_status()}')
-        if self.can_recv_status:
+        if self.can_recv_status or self.playback is not None:
             vehicle_status = self.can_report_handler.get_vehicle_status()
+            # 快照未更新时跳过重绘
+            if vehicle_status.version == self.vehicle_info_version:
+                self.root.after(100, self.update_vehicle_info_handler)
+                return
+            self.vehicle_info_version = vehicle_status.version
 
             self.vehicle_current_driving_mode_info.delete("1.0", "end")
             self.vehicle_current_driving_mode_info.insert("end", f"{vehicle_status.driving_mode}\n")
@@ -118,8 +353,13 @@ class App(object):
         self.root.after(100, self.update_vehicle_info_handler)
     
     def update_vehicle_info_handler_LMT(self):
-        if self.can_recv_status:
+        if self.can_recv_status or self.playback is not None:
             vehicle_status = self.can_report_handler.get_vehicle_status()
+            # 快照未更新时跳过重绘
+            if vehicle_status.version == self.vehicle_info_version:
+                self.root.after(100, self.update_vehicle_info_handler_LMT)
+                return
+            self.vehicle_info_version = vehicle_status.version
 
             # 更新电机 1 的状态信息
             self.vehicle_current_current_info_1.delete("1.0", "end")
@@ -159,22 +399,46 @@ class App(object):
             self.vehicle_current_pulse_count_info_2.delete("1.0", "end")
             self.vehicle_current_pulse_count_info_2.insert("end", f"{vehicle_status.motor2_pulse_count:.6f}\n")
 
+            # 反馈帧统计
+            frame_stats = self.can_report_handler.get_frame_stats()
+            self.vehicle_current_frame_stats_info_1.delete("1.0", "end")
+            self.vehicle_current_frame_stats_info_1.insert("end", self.format_frame_stats(frame_stats, (0x620, 0x622)))
+            self.vehicle_current_frame_stats_info_2.delete("1.0", "end")
+            self.vehicle_current_frame_stats_info_2.insert("end", self.format_frame_stats(frame_stats, (0x621, 0x623)))
+
         else:
             self.logger.warning(f"CAN receive no data.")
             
         self.root.after(100, self.update_vehicle_info_handler_LMT)
 
-    def recv_threading_handler(self):
-        while self.thread_event.is_set():
-            while self.thread_event.is_set() and self.can_recv_status:
-                msg = self.canbus.recv(timeout=0.1)
-                self.can_report_handler.handle_message(msg)
-                self.logger.debug(f"recv: {msg}")
-                self.can_recv_info.insert(tk.END, f"{msg}\n")
-                self.can_recv_info.see(tk.END)
-                # time.sleep(0.01)
-
-            time.sleep(0.1)
+    @staticmethod
+    def format_frame_stats(frame_stats, frame_ids):
+        lines = []
+        for frame_id in frame_ids:
+            stats = frame_stats[frame_id]
+            lines.append(
+                f"0x{frame_id:03X}: lost {stats['dropped']} dup {stats['duplicated']} "
+                f"ooo {stats['out_of_order']} jitter {stats['interval_jitter'] * 1000:.2f} ms"
+            )
+        return "\n".join(lines)
+
+    def decode_received_messages(self, msgs):
+        """
+        接收监听函数: 解码一批帧并更新车辆状态。
+        """
+        self.can_report_handler.handle_messages(msgs)
+
+    def describe_received_frame(self, frame_id, data):
+        """
+        按 ID 视图中显示的解码信号, 由当前车型的处理类解码。
+        """
+        return self.can_report_handler.describe_frame(frame_id, data)
+
+    def show_received_messages(self, msgs):
+        """
+        接收监听函数: 把一批原始帧写入接收监视缓冲区, 由 Tk 线程定时渲染。
+        """
+        self.recv_ring.extend(msgs)
 
     def send_threading_handler(self):
         while self.thread_event.is_set():
@@ -216,10 +480,8 @@ class App(object):
                             msg = can.Message(arbitration_id=current_id, data=data,
                                             is_extended_id=False, dlc=length)
                             self.canbus.send(msg, extend)
-                            # many time
-                            # self.logger.debug(f"send: {msg}")
-                            # self.can_send_info.insert(tk.END, f"{msg}\n")
-                            # self.can_send_info.see(tk.END)
+                            self.recorder.record_tx((msg,))
+                            self.send_ring.extend((msg,))
                             time.sleep(interval)
                         
                         # clear send status
@@ -229,53 +491,124 @@ class App(object):
                         break
                     except Exception as e:
                         curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        self.print_status_log(f"{curr_time} Send: Invalid data", level="error")
+                        self.post_status_log(f"{curr_time} Send: Invalid data", level="error")
                         self.logger.error(f"send: Invalid data {e}")
                         time.sleep(0.1)
                         continue
+                elif mode == "Periodic":
+                    # 控制报文交给驱动层周期发送, 这里只同步 payload 变化
+                    try:
+                        if self.periodic_sender is None or self.periodic_sender.bus is not self.canbus:
+                            self.periodic_sender = PeriodicCommandSender(self.canbus, self.logger)
+                        with self.lock:
+                            can_msgs = self.can_send_messages
+                        tx_rates = self.tx_schedule.rates if self.tx_schedule is not None else None
+                        changed = self.periodic_sender.update(can_msgs, self.send_period, tx_rates)
+                        # 驱动周期发送的每一帧不经过这里, 只记录交给驱动的新 payload
+                        self.recorder.record_tx(changed)
+                        time.sleep(self.send_period)
+                    except Exception as e:
+                        curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        self.post_status_log(f"{curr_time} Send: Periodic task failed", level="error")
+                        self.logger.error(f"send: periodic task failed {e}")
+                        time.sleep(0.1)
                 else:
+                    self.stop_periodic_send()
                     try:
-                        start_time = time.perf_counter()
+                        # 有多速率发送表时按基准节拍运行, 每个节拍只发送到期或变化的报文
+                        tx_schedule = self.tx_schedule
+                        period = tx_schedule.tick if tx_schedule is not None else self.send_period
+                        self.send_scheduler.set_period(period)
+                        self.send_scheduler.wait()
                         with self.lock:
                             can_msgs = self.can_send_messages
+                        if tx_schedule is not None:
+                            can_msgs = tx_schedule.due(can_msgs)
+                        # 经信箱合并后按优先级发送, 驱动队列满时剩余报文留到下一节拍
                         for can_msg in can_msgs:
-                            self.canbus.send(can_msg, timeout=0.001)
-                        
-                        end_time = time.perf_counter()
-                        time.sleep(self.send_period - (end_time - start_time))
-                        
+                            self.tx_mailbox.put(can_msg)
+                        self.tx_mailbox.drain(self.send_frame)
                     except Exception as e:
                         curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        self.print_status_log(f"{curr_time} Send: Invalid data", level="error")
+                        self.post_status_log(f"{curr_time} Send: Invalid data", level="error")
                         self.logger.error(f"send: Invalid data {e}")
                         time.sleep(self.send_period)
 
-            time.sleep(0.1)
+            self.stop_periodic_send()
+            self.report_scheduler_stats("Send", self.send_scheduler)
+            if self.tx_schedule is not None:
+                self.tx_schedule.reset()
+            # 等更新线程也退出循环, 不再产生新指令后再清空信箱
+            self.update_idle.wait(1.0)
+            self.report_tx_mailbox_stats()
+            self.send_event.wait()
+
+    def send_frame(self, msg, timeout=None):
+        """
+        发送一帧并记录为 TX。
+        """
+        self.canbus.send(msg, timeout)
+        self.recorder.record_tx((msg,))
+
+    def report_tx_mailbox_stats(self):
+        """
+        发送停止后 (发送和更新线程都已退出循环) 清空信箱, 有合并/丢弃/发送失败时输出统计。
+        """
+        self.tx_mailbox.clear()
+        stats = self.tx_mailbox.summary()
+        if stats["coalesced"] or stats["dropped"] or stats["send_errors"]:
+            curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.post_status_log(
+                f"{curr_time} TX: {stats['sent']} sent, {stats['coalesced']} coalesced, "
+                f"{stats['dropped']} dropped, {stats['send_errors']} driver queue full",
+                level="warning",
+            )
+        self.tx_mailbox.reset_stats()
+
+    def stop_periodic_send(self):
+        if self.periodic_sender is not None:
+            self.periodic_sender.stop()
+
+    def report_scheduler_stats(self, name, scheduler):
+        """
+        发送停止后输出本次的周期统计, 并让下次发送重新对齐。
+        """
+        scheduler.reset()
+        if not scheduler.cycles:
+            return
+        stats = scheduler.summary()
+        curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.post_status_log(
+            f"{curr_time} {name} loop {stats['period'] * 1000:.0f} ms: {stats['cycles']} cycles, "
+            f"{stats['overruns']} overruns, {stats['skipped']} skipped, "
+            f"late mean {stats['lateness_mean'] * 1000:.2f} ms, p99 {stats['lateness_p99'] * 1000:.1f} ms"
+        )
+        scheduler.reset_stats()
 
     def update_vehicle_data_handler(self):
         while self.thread_event.is_set():
             self.lmt_send_counter = 0
             while self.thread_event.is_set() and self.can_send_status:
-                start_time = time.perf_counter()
+                self.update_idle.clear()
+                self.update_scheduler.wait()
 
                 # 获取当前选择的车型
                 vehicle_type = self.vehicle_type.get()
                 # 根据车型发送对应的控制指令
                 if vehicle_type == "Hooke2":
                     self.send_period = HOOKE2_SEND_PERIOD
+                    self.tx_schedule = self.hooke2_tx_schedule
                     self.send_hooke2_control_commands()
                 elif vehicle_type == "LMT":
                     self.send_period = LMT_SEND_PERIOD
+                    self.tx_schedule = None
                     self.send_lmt_control_commands()
                 else:
                     self.logger.error(f"Please select a vehicle type: {vehicle_type}")
-
-                end_time = time.perf_counter()
-                elapse = end_time - start_time
-                if self.send_period < elapse:
-                    continue
-                time.sleep(self.send_period - elapse)
-            time.sleep(0.01)
+                self.update_scheduler.set_period(self.send_period)
+            self.update_idle.set()
+            self.report_scheduler_stats("Update", self.update_scheduler)
+            self.send_event.wait()
 
     def send_hooke2_control_commands(self):
         # 获取当前的驾驶模式、油门、刹车、转向等信息
@@ -309,10 +642,7 @@ class App(object):
         with self.lock:
             self.can_send_messages = can_send_messages
 
-        for msg in can_send_messages:
-            self.logger.debug(f"send: {msg}")
-            self.can_send_info.insert(tk.END, f"{msg}\n")
-            self.can_send_info.see(tk.END)
+        self.send_ring.extend(can_send_messages)
     
     def send_lmt_control_commands(self):
         # 获取当前的电机控制模式、目标速度和目标电流
@@ -349,10 +679,7 @@ class App(object):
         with self.lock:
             self.can_send_messages = can_send_messages
 
-        for msg in can_send_messages:
-            self.logger.debug(f"send: {msg}")
-            self.can_send_info.insert(tk.END, f"{msg}\n")
-            self.can_send_info.see(tk.END)
+        self.send_ring.extend(can_send_messages)
 
     def spin(self):
         self.root.mainloop()
@@ -374,8 +701,14 @@ class App(object):
         # self.can_recv_status = False
         # self.can_send_status = False
         
-        # 发送终止信号
+        # 发送终止信号, 唤醒等待发送开关的线程使其退出
         self.thread_event.clear()
+        self.send_event.set()
+        self.rx_dispatcher.stop()
+        self.recorder.stop()
+        self.tracer.stop()
+        if self.playback is not None:
+            self.playback.close()
 
         # self.recv_thread.join()
         # self.send_thread.join()
@@ -400,6 +733,7 @@ class App(object):
 
         self.create_base_config_layer(base_frame, 0, 0)
         self.create_base_log_layer(base_frame, 0, 1)
+        self.create_base_playback_layer(base_frame, 1, 0)
     
     def create_base_config_layer(self, root, row=0, column=0):
         CONNECT_DEVICE = "Connect Device"
@@ -449,6 +783,37 @@ class App(object):
         )
         self.can_start_button.grid(row=2, column=0, padx=PADX, pady=PADY, sticky="nsew")
 
+    def create_base_playback_layer(self, root, row=0, column=0):
+        playback_frame = tk.LabelFrame(root, text="Recording")
+        playback_frame.grid(row=row, column=column, columnspan=2, padx=PADX, pady=PADY, sticky="nsew")
+        playback_frame.grid_columnconfigure(1, weight=1)
+
+        self.open_recording_button = tk.Button(
+            playback_frame,
+            text="Open",
+            command=self.open_recording_button_handler,
+            width=10,
+            bg="white"
+        )
+        self.open_recording_button.grid(row=0, column=0, padx=PADX, pady=PADY, sticky="nsew")
+
+        # 播放头: 相对记录起点的秒数
+        self.playhead = tk.DoubleVar(value=0.0)
+        self.playhead_scale = tk.Scale(
+            playback_frame,
+            from_=0,
+            to=0,
+            resolution=0.01,
+            orient="horizontal",
+            showvalue=False,
+            variable=self.playhead,
+            command=self.playhead_handler,
+            state="disabled"
+        )
+        self.playhead_scale.grid(row=0, column=1, padx=PADX, pady=PADY, sticky="ew")
+        self.playhead_label = tk.Label(playback_frame, text="No recording", width=40, anchor="w")
+        self.playhead_label.grid(row=0, column=2, padx=PADX, pady=PADY, sticky="w")
+
     def create_base_log_layer(self, root, row=0, column=0):
         status_log_frame = tk.LabelFrame(root, text="Log")
         status_log_frame.grid(row=row, column=column, padx=PADX, pady=PADY, sticky="nsew")
@@ -533,7 +898,7 @@ class App(object):
         self.mode = tk.StringVar()
         self.mode_check_button = ttk.Combobox(
             mode_frame,
-            values=["Normal", "Vehicle"],
+            values=["Normal", "Vehicle", "Periodic"],
             width=8,
             height=4,
             textvariable=self.mode
@@ -571,6 +936,15 @@ class App(object):
         for widget in self.vehicle_control_frame.winfo_children():
             widget.destroy()
 
+        # 切换收发处理类和接收过滤器
+        if selected_vehicle in self.report_handlers:
+            with self.lock:
+                self.can_report_handler = self.report_handlers[selected_vehicle]
+                self.can_command_handler = self.command_handlers[selected_vehicle]
+                self.can_send_messages = []
+            self.vehicle_info_version = -1
+            self.apply_rx_filters()
+
         # 根据车型重新构建布局
         if selected_vehicle == "Hooke2":
             self.create_vehicle_control_layout_Hooke2(self.vehicle_control_frame)
@@ -579,6 +953,10 @@ class App(object):
         else:
             curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             self.print_status_log(f"{curr_time} Please select your vehicle type.", level="error")
+
+        # 离线分析中切换车型: 用新车型的处理类重新打开记录 (索引已缓存)
+        if self.playback is not None and selected_vehicle in self.report_handlers:
+            self.open_recording(self.playback.path)
     
     def create_vehicle_control_layout_Hooke2(self, vehicle_control_frame):
         self.create_vehicle_control_base_layer(vehicle_control_frame, 0, 0)
@@ -1074,6 +1452,7 @@ class App(object):
         parking_brake_label.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
         self.vehicle_current_parking_info = tk.Text(parking_brake, height=1, width=5)
         self.vehicle_current_parking_info.grid(row=0, column=1, padx=5, pady=5, sticky="nsew")
+        self.vehicle_info_version = -1
         self.update_vehicle_info_handler()
 
     def create_vehicle_current_info_layer_LMT(self, root, row, column, rowspan=1, columnspan=1):
@@ -1142,6 +1521,14 @@ class App(object):
         self.vehicle_current_pulse_count_info_1 = tk.Text(pulse_count_frame_1, height=1, width=10)
         self.vehicle_current_pulse_count_info_1.grid(row=0, column=1, padx=5, pady=5, sticky="nsew")
 
+        # 反馈帧统计 (丢帧/重复/乱序/到达间隔抖动)
+        frame_stats_frame_1 = tk.Frame(motor_1_frame)
+        frame_stats_frame_1.grid(row=6, column=0, padx=5, pady=5, sticky="nsew")
+        frame_stats_label_1 = tk.Label(frame_stats_frame_1, text="Frames:")
+        frame_stats_label_1.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
+        self.vehicle_current_frame_stats_info_1 = tk.Text(frame_stats_frame_1, height=2, width=48)
+        self.vehicle_current_frame_stats_info_1.grid(row=0, column=1, padx=5, pady=5, sticky="nsew")
+
         # 创建电机 2 的状态信息区域
         motor_2_frame = tk.LabelFrame(vehicle_current_info_frame, text="Motor 2 Status")
         motor_2_frame.grid(row=0, column=1, padx=5, pady=5, sticky="nsew")
@@ -1194,7 +1581,16 @@ class App(object):
         self.vehicle_current_pulse_count_info_2 = tk.Text(pulse_count_frame_2, height=1, width=10)
         self.vehicle_current_pulse_count_info_2.grid(row=0, column=1, padx=5, pady=5, sticky="nsew")
 
+        # 反馈帧统计 (丢帧/重复/乱序/到达间隔抖动)
+        frame_stats_frame_2 = tk.Frame(motor_2_frame)
+        frame_stats_frame_2.grid(row=6, column=0, padx=5, pady=5, sticky="nsew")
+        frame_stats_label_2 = tk.Label(frame_stats_frame_2, text="Frames:")
+        frame_stats_label_2.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
+        self.vehicle_current_frame_stats_info_2 = tk.Text(frame_stats_frame_2, height=2, width=48)
+        self.vehicle_current_frame_stats_info_2.grid(row=0, column=1, padx=5, pady=5, sticky="nsew")
+
         # update vehicle status layout
+        self.vehicle_info_version = -1
         self.update_vehicle_info_handler_LMT()
         
 
@@ -1205,13 +1601,8 @@ class App(object):
         send_info_frame.grid_columnconfigure(0, weight=1)
         send_info_frame.grid_columnconfigure(1, weight=0)
 
-        self.can_send_info = tk.Text(
-            send_info_frame, height=10, width=100, font="Consoles 8"
-        )
-        self.can_send_info.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
-        scrollbar = tk.Scrollbar(send_info_frame, command=self.can_send_info.yview)
-        scrollbar.grid(row=0, column=1, sticky="nsew")
-        self.can_send_info.config(yscrollcommand=scrollbar.set)
+        self.send_monitor = FrameMonitorView(self.root, send_info_frame, "Send Monitor", self.send_ring)
+        self.can_send_info = self.send_monitor.text
         # self.update_send_info_handle()
 
     def create_recv_info_layer(self, root, row=0, column=0):
@@ -1221,18 +1612,40 @@ class App(object):
         receive_info_frame.grid_columnconfigure(0, weight=1)
         receive_info_frame.grid_columnconfigure(1, weight=0)
         
-        self.can_recv_info = tk.Text(
-            receive_info_frame, height=10, width=100, font="Consoles 8"
+        self.recv_monitor = FrameMonitorView(
+            self.root, receive_info_frame, "Receive Monitor", self.recv_ring,
+            id_table=self.recv_id_table, describe=self.describe_received_frame,
+        )
+        self.can_recv_info = self.recv_monitor.text
+        # 默认只接收当前车型的报文, 勾选后取消过滤, 用于查看总线上的其他报文
+        self.show_all_frames = tk.BooleanVar(value=False)
+        self.show_all_frames_check_button = tk.Checkbutton(
+            receive_info_frame,
+            text="Show all IDs",
+            variable=self.show_all_frames,
+            command=self.show_all_frames_handler,
         )
-        self.can_recv_info.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
-        scrollbar = tk.Scrollbar(receive_info_frame, command=self.can_recv_info.yview)
-        scrollbar.grid(row=0, column=1, sticky="nsew")
-        self.can_recv_info.config(yscrollcommand=scrollbar.set)
+        self.show_all_frames_check_button.grid(row=1, column=0, padx=5, sticky="w")
+        # 每个 ID 一行: 最新数据、帧数、周期、抖动和解码信号
+        self.per_id_view = tk.BooleanVar(value=False)
+        self.per_id_view_check_button = tk.Checkbutton(
+            receive_info_frame,
+            text="Per-ID view",
+            variable=self.per_id_view,
+            command=lambda: self.recv_monitor.set_per_id(self.per_id_view.get()),
+        )
+        self.per_id_view_check_button.grid(row=1, column=0, padx=120, sticky="w")
         # self.update_recv_info_handle()
 
     def can_device_combobox_select_handler(self, _event):
         self.logger.debug(f"select can device {self.can_device.get()}")
 
+    def post_status_log(self, log, level="info"):
+        """
+        在发送/更新等工作线程中输出日志: 只构造字符串, 交给 Tk 线程写入日志窗口。
+        """
+        self.root.after(0, self.print_status_log, log, level)
+
     def print_status_log(self, log, level="info"):
         # 定义不同级别的颜色
         color_map = {
@@ -1293,20 +1706,259 @@ class App(object):
         )
         self.can_start_button.grid(row=2, column=0, padx=PADX, pady=PADY, sticky="nsew")
 
+        record_frame = tk.Frame(connect_device_frame)
+        record_frame.grid(row=3, column=0, padx=PADX, pady=PADY, sticky="nsew")
+        self.record_format = tk.StringVar()
+        self.record_format_combobox = ttk.Combobox(
+            record_frame,
+            values=list(RECORD_FORMATS),
+            width=4,
+            textvariable=self.record_format,
+            state="readonly"
+        )
+        self.record_format_combobox.grid(row=0, column=0, sticky="nsew")
+        self.record_format_combobox.set(RECORD_FORMATS[0])
+        self.can_record_button = tk.Button(
+            record_frame,
+            text="Record",
+            command=self.can_record_button_handler,
+            width=6,
+            bg="white"
+        )
+        self.can_record_button.grid(row=0, column=1, padx=(PADX, 0), sticky="nsew")
+
+    def can_connect_button_handler(self):
+        if self.can_connect_status:
+            self.disconnect_device()
+            return
+        channel = self.can_device.get()
+        try:
+            self.canbus = can.Bus(interface="pcan", channel=channel, bitrate=500000)
+            self.rx_dispatcher.start(self.canbus)
+        except (can.CanError, OSError) as e:
+            curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.print_status_log(f"{curr_time} Connect {channel} failed: {e}", level="error")
+            self.logger.error(f"connect {channel} failed: {e}")
+            self.disconnect_device()
+            return
+        self.can_connect_status = True
+        self.can_connect_button.config(text="Disconnect", bg="green")
+        curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.print_status_log(f"{curr_time} Connected {channel}")
+        self.apply_rx_filters()
+
+    def apply_rx_filters(self):
+        """
+        按当前车型的接收 ID 表设置接收过滤器; 勾选 "Show all IDs" 时接收全部报文。
+        """
+        if self.canbus is None:
+            return
+        curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            if self.show_all_frames.get():
+                clear_filters(self.canbus, self.logger)
+                self.print_status_log(f"{curr_time} RX filter: all IDs")
+            else:
+                frame_ids = self.can_report_handler.frame_ids
+                filters = apply_filters(self.canbus, frame_ids, self.logger)
+                self.print_status_log(
+                    f"{curr_time} RX filter: {len(frame_ids)} IDs in {len(filters)} id/mask filters"
+                )
+        except can.CanError as e:
+            self.print_status_log(f"{curr_time} RX filter failed: {e}", level="error")
+            self.logger.error(f"set filters failed: {e}")
+
+    def show_all_frames_handler(self):
+        self.logger.debug(f"show all ids: {self.show_all_frames.get()}")
+        self.apply_rx_filters()
+
+    def disconnect_device(self):
+        """
+        停止收发并关闭总线。
+        """
+        if self.can_send_status:
+            self.send_can_button_handler()
+        if self.can_recv_status:
+            self.can_start_button_handler()
+        self.rx_dispatcher.stop()
+        if self.canbus is not None:
+            try:
+                self.canbus.shutdown()
+            except Exception as e:
+                self.logger.error(f"Error shutting down CAN bus: {e}")
+            finally:
+                self.canbus = None
+        self.can_connect_status = False
+        self.can_connect_button.config(text="Connect", bg="white")
+
     def can_start_button_handler(self):
         if not self.can_connect_status:
             curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             self.print_status_log(f"{curr_time} Please connect device first", level="error")
             self.logger.debug(f"please connect device first")
             return
+        if self.playback is not None:
+            curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.print_status_log(f"{curr_time} Close the recording before receiving", level="error")
+            return
         self.can_recv_status = not self.can_recv_status
         if self.can_recv_status:
+            self.rx_dispatcher.reset_stats()
+            self.recv_id_table.clear()
             self.can_start_button.config(text="Stop Recv", bg="red")
             self.can_start_button.update()
         else:
+            self.report_rx_stats()
             self.can_start_button.config(text="Receive", bg="white")
             self.can_start_button.update()
 
+    def report_rx_stats(self):
+        """
+        接收停止后输出本次的批处理统计。
+        """
+        stats = self.rx_dispatcher.summary()
+        if not stats["batches"]:
+            return
+        curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.print_status_log(
+            f"{curr_time} RX: {stats['received']} frames in {stats['batches']} batches, "
+            f"mean {stats['mean_batch']:.1f}, max {stats['max_batch']}, {stats['errors']} errors"
+        )
+
+    def open_recording_button_handler(self):
+        if self.playback is not None:
+            self.close_recording()
+            return
+        if self.can_recv_status:
+            curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.print_status_log(f"{curr_time} Stop receiving before opening a recording", level="error")
+            return
+        path = filedialog.askopenfilename(
+            title="Open recording",
+            initialdir=os.environ.get("CAN_TOOL_RECORD_DIR", "."),
+            filetypes=[("CAN recording", "*.bin")],
+        )
+        if path:
+            self.open_recording(path)
+
+    def selected_vehicle(self):
+        vehicle = self.vehicle_type.get()
+        return vehicle if vehicle in self.report_handlers else "LMT"
+
+    def open_recording(self, path):
+        """
+        离线分析: 打开 .bin 记录, 面板改为显示播放头处解码的状态。
+        只映射文件并加载索引, 移动播放头时才解码需要的帧, 长时间记录也能立即打开。
+        """
+        curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        vehicle = self.selected_vehicle()
+        try:
+            playback = RecordingPlayback(
+                path, type(self.report_handlers[vehicle]), self.logger, dbc_path=self.dbc_paths.get(vehicle)
+            )
+        except (OSError, ValueError) as e:
+            self.print_status_log(f"{curr_time} Open {path} failed: {e}", level="error")
+            self.logger.error(f"open recording {path} failed: {e}")
+            return
+        if self.playback is not None:
+            self.playback.close()
+        self.playback = playback
+        with self.lock:
+            self.can_report_handler = playback.handler
+        self.vehicle_info_version = -1
+        self.playhead_scale.config(to=playback.duration, state="normal")
+        self.link_history_slider()
+        self.open_recording_button.config(text="Close", bg="green")
+        self.print_status_log(
+            f"{curr_time} Opened {path}: {len(playback.reader)} frames, {playback.duration:.1f} s ({vehicle})"
+        )
+        self.apply_playhead()
+
+    def close_recording(self):
+        """
+        退出离线分析, 恢复实时接收的处理类。
+        """
+        self.playback.close()
+        self.playback = None
+        self.playback_history = None
+        with self.lock:
+            self.can_report_handler = self.report_handlers[self.selected_vehicle()]
+        self.vehicle_info_version = -1
+        self.recv_monitor.clear()
+        self.playhead.set(0.0)
+        self.playhead_scale.config(to=0, state="disabled")
+        self.playhead_label.config(text="No recording")
+        self.link_history_slider()
+        self.open_recording_button.config(text="Open", bg="white")
+
+    def link_history_slider(self):
+        """
+        离线分析时 History 滑块与播放头联动; 实时接收时恢复为曲线的显示范围。
+        """
+        if not hasattr(self, "vehicle_history_info"):
+            return
+        if self.playback is not None:
+            self.vehicle_history_info.config(
+                from_=0, to=self.playback.duration, resolution=0.01, variable=self.playhead,
+                command=self.playhead_handler,
+            )
+        else:
+            self.vehicle_history_info.config(
+                from_=0, to=100, resolution=1, variable="", command=self.vehicle_history_info_handler
+            )
+            self.vehicle_history_info.set(100)
+
+    def playhead_handler(self, _event):
+        # 拖动时合并请求, 每 50 ms 最多解码一次
+        if self.playback is not None and not self.playhead_pending:
+            self.playhead_pending = True
+            self.root.after(50, self.apply_playhead)
+
+    def apply_playhead(self):
+        """
+        把播放头移动到滑块位置: 更新车辆状态、接收监视 (播放头之前的最后一段帧) 和曲线。
+        """
+        self.playhead_pending = False
+        playback = self.playback
+        if playback is None or not len(playback.reader):
+            return
+        playback.seek(playback.start_time + self.playhead.get())
+        window = playback.window()
+        self.recv_monitor.clear()
+        self.recv_ring.extend(window)
+        self.recv_id_table.update(window)
+        self.playback_history = playback.history(
+            ("throttle", "brake", "steering", "speed"), PLAYBACK_HISTORY_SPAN
+        )
+        self.playhead_label.config(
+            text=f"{self.playhead.get():.2f} / {playback.duration:.2f} s, frame {playback.index}/{len(playback.reader)}"
+        )
+
+    def can_record_button_handler(self):
+        curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if self.recorder.enabled:
+            self.recorder.stop()
+            stats = self.recorder.summary()
+            level = "warning" if stats["dropped"] else "info"
+            self.print_status_log(
+                f"{curr_time} Record: {stats['written']} frames to {stats['path']}, "
+                f"{stats['dropped']} dropped",
+                level=level,
+            )
+            self.can_record_button.config(text="Record", bg="white")
+            return
+        # 文件名取当前时间, 格式由扩展名决定; CAN_TOOL_RECORD_DIR 指定保存目录
+        name = datetime.now().strftime("can_record_%Y%m%d_%H%M%S")
+        path = os.path.join(os.environ.get("CAN_TOOL_RECORD_DIR", "."), f"{name}.{self.record_format.get()}")
+        try:
+            self.recorder.start(path)
+        except OSError as e:
+            self.print_status_log(f"{curr_time} Record: cannot open {path}: {e}", level="error")
+            self.logger.error(f"record: cannot open {path}: {e}")
+            return
+        self.print_status_log(f"{curr_time} Record: {path}")
+        self.can_record_button.config(text="Stop", bg="red")
+
     def send_can_button_handler(self):
         if not self.can_connect_status:
             curr_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -1391,7 +2043,8 @@ class App(object):
         
         def draw_curve():
             # update vehicle history info
-            vehicle_status = self.can_report_handler.get_vehicle_status()
+            # 离线分析时不采样, 曲线取 apply_playhead() 计算的播放头之前的记录
+            vehicle_status = self.can_report_handler.get_vehicle_status() if self.playback is None else None
             if not vehicle_status is None:
                 throttle_deque.append(int(vehicle_status.throttle))
                 brake_deque.append(int(vehicle_status.brake))
@@ -1408,12 +2061,18 @@ class App(object):
                 self.vehicle_history_info.config(from_=0, to=len(throttle_deque) - 1)
                 self.vehicle_history_info.set(len(throttle_deque) - 1)
 
-            start_index = max(0, len(throttle_deque) - MAX_POINTS)
-            end_index = start_index + self.vehicle_history_info.get()                  
-            current_throttle_list = list(throttle_deque)[start_index:end_index+1]
-            current_brake_list = list(brake_deque)[start_index:end_index+1]
-            current_steering_list = list(steering_deque)[start_index:end_index+1]
-            current_speed_list = list(speed_deque)[start_index:end_index+1]
+            if self.playback is not None and self.playback_history is not None:
+                current_throttle_list = self.playback_history["throttle"]
+                current_brake_list = self.playback_history["brake"]
+                current_steering_list = self.playback_history["steering"]
+                current_speed_list = self.playback_history["speed"]
+            else:
+                start_index = max(0, len(throttle_deque) - MAX_POINTS)
+                end_index = start_index + self.vehicle_history_info.get()
+                current_throttle_list = list(throttle_deque)[start_index:end_index+1]
+                current_brake_list = list(brake_deque)[start_index:end_index+1]
+                current_steering_list = list(steering_deque)[start_index:end_index+1]
+                current_speed_list = list(speed_deque)[start_index:end_index+1]
 
             if len(current_throttle_list) > 2:
                 points = []
@@ -1480,5 +2139,11 @@ class App(object):
 
 if __name__ == "__main__":
     root = tk.Tk()
-    app = App(root, log_level=logging.INFO)
+    # CAN_TOOL_HOOKE2_DBC / CAN_TOOL_LMT_DBC: 各车型的 DBC 文件, 未设置时使用内置信号表
+    app = App(
+        root,
+        log_level=logging.INFO,
+        trace_path=os.environ.get("CAN_TOOL_TRACE"),
+        dbc_paths={"Hooke2": os.environ.get("CAN_TOOL_HOOKE2_DBC"), "LMT": os.environ.get("CAN_TOOL_LMT_DBC")},
+    )
     app.spin()
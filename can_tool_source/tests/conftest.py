@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+import pytest
+
+# 脚本和模块都以 can_tool_source 为根目录导入 (from vehicle.x import ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.records import write_records  # noqa: E402
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """
+    recording(records, name="test.bin") 写入二进制记录文件, 返回路径。
+    """
+    def make(records, name="test.bin"):
+        return write_records(str(tmp_path / name), records)
+
+    return make
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+合成记录文件, 供各测试模块使用。
+"""
+
+import random
+
+from vehicle.recorder import FLAG_TX, RECORD_FRAME, RECORD_MAGIC
+
+
+def random_records(count, frame_ids, seed=0, period=0.001, tx_ids=()):
+    """
+    合成记录: (timestamp, frame_id, flags, dlc, data) 列表。
+    tx_ids 中的帧按发送帧记录, 时间戳比前后的接收帧晚一点, 与实际记录一样局部乱序。
+    """
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        frame_id = rng.choice(frame_ids)
+        timestamp = i * period
+        flags = 0
+        if frame_id in tx_ids:
+            flags = FLAG_TX
+            timestamp += rng.uniform(0, 5) * period
+        records.append((timestamp, frame_id, flags, 8, bytes(rng.getrandbits(8) for _ in range(8))))
+    return records
+
+
+def write_records(path, records, mode="wb"):
+    with open(path, mode) as f:
+        if mode == "wb":
+            f.write(RECORD_MAGIC)
+        for record in records:
+            f.write(RECORD_FRAME.pack(*record))
+    return path
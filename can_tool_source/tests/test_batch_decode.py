@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import random
+
+import can
+import numpy as np
+import pytest
+
+from vehicle.batch_decode import REPORT_FRAMES, decode_batch, messages_to_arrays
+from vehicle.signal_table import compile_frames
+
+
+def test_decode_batch_matches_frame_decoder():
+    decoders = compile_frames(REPORT_FRAMES)
+    frame_ids = sorted(REPORT_FRAMES) + [0x7FF]
+    rng = random.Random(0)
+    messages = [
+        can.Message(
+            timestamp=i * 0.001,
+            arbitration_id=rng.choice(frame_ids),
+            data=bytes(rng.getrandbits(8) for _ in range(8)),
+        )
+        for i in range(5000)
+    ]
+    columns = decode_batch(*messages_to_arrays(messages))
+    assert 0x7FF not in columns
+
+    for frame_id, decoder in decoders.items():
+        expected = [msg for msg in messages if msg.arbitration_id == frame_id]
+        frame_columns = columns[frame_id]
+        np.testing.assert_array_equal(frame_columns["timestamp"], [msg.timestamp for msg in expected])
+        rows = np.array([decoder.decode(msg.data) for msg in expected])
+        for position, name in enumerate(decoder.names):
+            np.testing.assert_allclose(frame_columns[name], rows[:, position], rtol=0, atol=1e-9)
+
+
+def test_decode_batch_pads_short_frames():
+    frame_id = 0x501
+    columns = decode_batch([0.0], [frame_id], np.array([[0x02, 0x11, 0x22, 0x01, 0xF4]], dtype=np.uint8))
+    values = [columns[frame_id][signal.name][0] for signal in REPORT_FRAMES[frame_id][1]]
+    assert values == pytest.approx([2, 0x11, 0x22, 50.0])
+
+
+def test_decode_batch_rejects_flat_data():
+    with pytest.raises(ValueError):
+        decode_batch([0.0], [0x501], np.zeros(8, dtype=np.uint8))
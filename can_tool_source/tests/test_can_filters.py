@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from vehicle.can_filters import accepted_ids, build_filters
+from vehicle.hooke2 import HOOKE2_REPORT_FRAMES
+from vehicle.lmt import LMT_REPORT_FRAMES
+
+
+def accepts(filters, frame_id):
+    return any(frame_id & f["can_mask"] == f["can_id"] & f["can_mask"] for f in filters)
+
+
+@pytest.mark.parametrize("frame_ids", [
+    sorted(HOOKE2_REPORT_FRAMES),
+    sorted(LMT_REPORT_FRAMES),
+    [0x100, 0x101, 0x102, 0x103],
+    [0x7FF],
+    [],
+])
+def test_filters_accept_exactly_the_frame_ids(frame_ids):
+    filters = build_filters(frame_ids)
+    assert {frame_id for frame_id in range(0x800) if accepts(filters, frame_id)} == set(frame_ids)
+    assert accepted_ids(filters) == len(frame_ids)
+
+
+def test_aligned_ids_merge_into_one_filter():
+    assert build_filters([0x620, 0x621, 0x622, 0x623]) == [{"can_id": 0x620, "can_mask": 0x7FC, "extended": False}]
+
+
+@pytest.mark.parametrize("max_filters", [1, 2, 3])
+def test_max_filters_accepts_a_superset(max_filters):
+    frame_ids = sorted(HOOKE2_REPORT_FRAMES)
+    filters = build_filters(frame_ids, max_filters=max_filters)
+    assert len(filters) <= max_filters
+    assert all(accepts(filters, frame_id) for frame_id in frame_ids)
+    assert accepted_ids(filters) == sum(1 for frame_id in range(0x800) if accepts(filters, frame_id))
+
+
+def test_extended_ids():
+    frame_ids = [0x18FF0001, 0x18FF0002]
+    filters = build_filters(frame_ids, extended=True)
+    assert all(f["extended"] for f in filters)
+    assert accepted_ids(filters) == 2
+    assert all(accepts(filters, frame_id) for frame_id in frame_ids)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+
+import pytest
+
+from vehicle.command_cache import CommandMessageCache
+from vehicle.hooke2 import HOOKE2_COMMAND_ENCODERS, HOOKE2CanCommandHandler
+from vehicle.lmt import LMT_COMMAND_ENCODERS, LMTCanCommandHandler
+from vehicle.trace import TRACE_TX
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.time = 10.0
+
+    def now(self):
+        self.time += 1.0
+        return self.time
+
+
+class RecordingTracer(object):
+    enabled = True
+
+    def __init__(self):
+        self.records = []
+
+    def emit(self, frame_id, direction, timestamp, values):
+        self.records.append((frame_id, direction, timestamp, values))
+
+
+class CountingEncoder(object):
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, values, data):
+        self.calls += 1
+        data[:2] = bytes(values)
+
+
+def test_unchanged_values_skip_encoding():
+    encoder = CountingEncoder()
+    clock = FakeClock()
+    cache = CommandMessageCache({0x100: encoder}, [0x100], timebase=clock)
+    first = cache.encode(0x100, (1, 2))
+    second = cache.encode(0x100, (1, 2))
+    # 同一个预分配的报文, 只编码一次, 时间戳每次更新
+    assert first is second
+    assert (encoder.calls, bytes(first.data[:2]), first.timestamp) == (1, b"\x01\x02", 12.0)
+    cache.encode(0x100, (3, 4))
+    assert (encoder.calls, bytes(first.data[:2])) == (2, b"\x03\x04")
+    assert not first.is_extended_id and first.arbitration_id == 0x100
+
+
+def test_tracing_records_every_encode():
+    tracer = RecordingTracer()
+    cache = CommandMessageCache({0x100: CountingEncoder()}, [0x100], tracer=tracer, timebase=FakeClock())
+    cache.encode(0x100, (1, 2))
+    cache.encode(0x100, (1, 2))
+    assert tracer.records == [(0x100, TRACE_TX, 11.0, (1, 2)), (0x100, TRACE_TX, 12.0, (1, 2))]
+
+
+def test_hooke2_handler_reuses_messages():
+    handler = HOOKE2CanCommandHandler(logging.getLogger("test"))
+    msg = handler.send_brake_command(1, 30.0)
+    assert handler.send_brake_command(1, 30.0) is msg
+    assert msg.data == HOOKE2_COMMAND_ENCODERS[0x101].encode(
+        handler.command_cache._values[0x101]
+    )
+
+
+def test_lmt_handler_shares_the_cache():
+    tracer = RecordingTracer()
+    handler = LMTCanCommandHandler(logging.getLogger("test"), tracer=tracer)
+    msg = handler.send_motor_ctrlcmd_521(2, 1500, 10.0, 3)
+    assert handler.send_motor_ctrlcmd_521(2, 1500, 10.0, 3) is msg
+    assert msg.arbitration_id == 0x521
+    assert msg.data == LMT_COMMAND_ENCODERS[0x521].encode((2, 1500, 10.0, 3))
+    # 0x520 的方向取反, 并限制在范围内
+    handler.send_motor_ctrlcmd_520(2, 5000, 0.0, 1)
+    assert handler.command_cache._values[0x520] == (2, -3000, 0.0, 1)
+    assert [record[0] for record in tracer.records] == [0x521, 0x521, 0x520]
+
+
+def test_unknown_frame_id():
+    handler = HOOKE2CanCommandHandler(logging.getLogger("test"))
+    assert handler.command_cache.encoders is handler.command_encoders
+    with pytest.raises(KeyError):
+        handler.command_cache.encode(0x7FF, ())
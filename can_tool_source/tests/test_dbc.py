@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import random
+
+import can
+import pytest
+
+from vehicle import dbc
+from vehicle.dbc import load_dbc, parse_dbc
+from vehicle.hooke2 import (
+    HOOKE2_COMMAND_FRAMES,
+    HOOKE2_REPORT_FRAMES,
+    HOOKE2CanCommandHandler,
+    HOOKE2CanReportHandler,
+    load_hooke2_dbc,
+)
+from vehicle.lmt import LMT_COMMAND_FRAMES, LMT_REPORT_FRAMES, LMTCanReportHandler
+from vehicle.signal_table import compile_encoders, compile_frames
+
+HOOKE2_FRAMES = {**HOOKE2_REPORT_FRAMES, **HOOKE2_COMMAND_FRAMES}
+
+
+def dbc_text(frames):
+    """
+    由内置信号表生成 DBC; 信号名大写、顺序倒置, 检查 layout 按名称重新排序。
+    """
+    lines = ['VERSION ""', ""]
+    for frame_id, (name, signals) in sorted(frames.items()):
+        lines.append(f"BO_ {frame_id} {name.replace(' ', '_')}: 8 VCU")
+        for signal in reversed(signals):
+            order = "1" if signal.byte_order == "little" else "0"
+            sign = "-" if signal.signed else "+"
+            minimum = 0 if signal.minimum is None else signal.minimum
+            maximum = 0 if signal.maximum is None else signal.maximum
+            lines.append(
+                f" SG_ {signal.name.upper()} : {signal.start_bit}|{signal.length}@{order}{sign}"
+                f" ({signal.scale},{signal.offset}) [{minimum}|{maximum}] \"{signal.unit}\" Vector__XXX"
+            )
+        lines.append("")
+    return "\n".join(lines)
+
+
+@pytest.fixture
+def hooke2_dbc(tmp_path):
+    path = tmp_path / "hooke2.dbc"
+    path.write_text(dbc_text(HOOKE2_FRAMES))
+    return str(path)
+
+
+def test_parse_dbc(hooke2_dbc):
+    with open(hooke2_dbc) as f:
+        frames = parse_dbc(f.read())
+    assert sorted(frames) == sorted(HOOKE2_FRAMES)
+    name, dlc, signals = frames[0x505]
+    assert (name, dlc) == ("VCU_Report", 8)
+    speed = next(signal for signal in signals if signal.name == "VEHICLE_SPEED")
+    assert (speed.start_bit, speed.length, speed.signed, speed.scale) == (23, 16, True, 0.001)
+
+
+def test_generated_codec_matches_signal_table(hooke2_dbc, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    codec = load_hooke2_dbc(hooke2_dbc, cache_dir=cache_dir)
+    decoders = compile_frames(HOOKE2_FRAMES)
+    encoders = compile_encoders(HOOKE2_COMMAND_FRAMES)
+    rng = random.Random(0)
+    for _ in range(200):
+        data = bytes(rng.getrandbits(8) for _ in range(8))
+        for frame_id, decoder in decoders.items():
+            assert codec.DECODERS[frame_id](data) == pytest.approx(decoder.decode(data))
+        for frame_id, encoder in encoders.items():
+            values = decoders[frame_id].decode(data)
+            assert codec.ENCODERS[frame_id](values) == encoder.encode(values)
+    decoded = codec.decode_message(0x501, bytes([0x02, 0x11, 0x22, 0x01, 0xF4, 0, 0, 0]))
+    assert decoded["brake_pedal_actual"] == pytest.approx(50.0)
+
+
+def test_generated_codec_is_cached(hooke2_dbc, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    layout = {0x501: HOOKE2_REPORT_FRAMES[0x501]}
+    load_dbc(hooke2_dbc, layout, cache_dir)
+    cached = os.listdir(cache_dir)
+    assert len(cached) == 1
+    # DBC 内容不变时不重新生成; 修改后生成新的模块
+    assert load_dbc(hooke2_dbc, layout, cache_dir).DECODERS[0x501] is not None
+    assert os.listdir(cache_dir) == cached
+    with open(hooke2_dbc, "a") as f:
+        f.write('\nCM_ "changed";\n')
+    load_dbc(hooke2_dbc, layout, cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_missing_signal_is_rejected(tmp_path):
+    path = tmp_path / "broken.dbc"
+    name, signals = HOOKE2_REPORT_FRAMES[0x501]
+    path.write_text(dbc_text({0x501: (name, signals[:-1])}))
+    with pytest.raises(ValueError):
+        load_dbc(str(path), {0x501: (name, signals)}, str(tmp_path / "cache"))
+
+
+def test_handlers_use_dbc(hooke2_dbc, tmp_path, monkeypatch):
+    monkeypatch.setattr(dbc, "DEFAULT_CACHE_DIR", str(tmp_path / "cache"))
+    log = logging.getLogger("test")
+    builtin = HOOKE2CanReportHandler(log)
+    generated = HOOKE2CanReportHandler(log, hooke2_dbc)
+    rng = random.Random(1)
+    messages = [
+        can.Message(arbitration_id=frame_id, data=bytes(rng.getrandbits(8) for _ in range(8)), timestamp=1.0)
+        for frame_id in sorted(HOOKE2_REPORT_FRAMES)
+    ]
+    builtin.handle_messages(messages)
+    generated.handle_messages(messages)
+    assert generated.get_vehicle_status() == builtin.get_vehicle_status()
+
+    commands = HOOKE2CanCommandHandler(log, hooke2_dbc)
+    assert commands.command_encoders[0x101] is load_hooke2_dbc(hooke2_dbc).ENCODERS[0x101]
+
+
+def test_describe_frame_ignores_command_frames(hooke2_dbc, tmp_path, monkeypatch):
+    monkeypatch.setattr(dbc, "DEFAULT_CACHE_DIR", str(tmp_path / "cache"))
+    handler = HOOKE2CanReportHandler(logging.getLogger("test"), hooke2_dbc)
+    # 生成的 DECODERS 包含控制报文 0x100-0x105, 但它们不是反馈报文
+    assert 0x100 in handler.report_decoders
+    assert handler.describe_frame(0x100, bytes(8)) is None
+    described = dict(handler.describe_frame(0x501, bytes([0x02, 0x11, 0x22, 0x01, 0xF4, 0, 0, 0])))
+    assert described["brake_pedal_actual"] == pytest.approx(50.0)
+
+
+def test_lmt_describe_frame_ignores_command_frames(tmp_path, monkeypatch):
+    monkeypatch.setattr(dbc, "DEFAULT_CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "lmt.dbc"
+    path.write_text(dbc_text({**LMT_REPORT_FRAMES, **LMT_COMMAND_FRAMES}))
+    handler = LMTCanReportHandler(logging.getLogger("test"), str(path))
+    for frame_id in LMT_COMMAND_FRAMES:
+        assert frame_id in handler.report_decoders
+        assert handler.describe_frame(frame_id, bytes(8)) is None
+    assert [name for name, _ in handler.describe_frame(0x622, bytes(8))] == \
+        [signal.name for signal in LMT_REPORT_FRAMES[0x622][1]]
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+
+import can
+import pytest
+
+from source import FrameMonitorView
+from vehicle.frame_monitor import FrameIdTable, FrameRing, format_frame, format_id_stats
+
+
+def messages(count, start=0):
+    return [
+        can.Message(timestamp=float(i), arbitration_id=0x500 + i % 4, data=bytes([i % 256] * 8))
+        for i in range(start, start + count)
+    ]
+
+
+def test_ring_is_bounded():
+    ring = FrameRing(capacity=10)
+    ring.extend(messages(25))
+    assert (len(ring), ring.total, ring.first, ring.evicted) == (10, 25, 15, 15)
+    assert [frame[0] for frame in ring.window(20, 3)] == [20.0, 21.0, 22.0]
+    # 已被挤出的序号从 first 开始
+    assert [frame[0] for frame in ring.window(0, 2)] == [15.0, 16.0]
+    assert [frame[0] for frame in ring.window(23, 10)] == [23.0, 24.0]
+    ring.clear()
+    assert (len(ring), ring.total, ring.window(0, 5)) == (0, 0, [])
+
+
+def test_ring_copies_data():
+    ring = FrameRing(capacity=4)
+    msg = can.Message(timestamp=1.0, arbitration_id=0x100, is_extended_id=False, data=bytearray(8))
+    ring.extend([msg])
+    msg.data[0] = 0xFF
+    assert ring.window(0, 1)[0][4] == bytes(8)
+    assert format_frame(ring.window(0, 1)[0]).endswith("ID: 100  DL: 8  00 00 00 00 00 00 00 00")
+
+
+class StubRoot(object):
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay, callback, *args):
+        self.scheduled.append((delay, callback))
+
+
+class BrokenView(object):
+    """
+    只提供 refresh() 用到的属性, render() 第一次抛出异常。
+    """
+
+    title = "Receive Monitor"
+    refresh_ms = 100
+    _render_error = None
+    log = logging.getLogger("test")
+    refresh = FrameMonitorView.refresh
+
+    def __init__(self):
+        self.root = StubRoot()
+        self.renders = 0
+
+    def render(self):
+        self.renders += 1
+        if self.renders == 1:
+            raise KeyError(0x100)
+
+
+def test_refresh_survives_render_errors(caplog):
+    view = BrokenView()
+    view.refresh()
+    assert view.root.scheduled == [(100, view.refresh)]
+    assert "Receive Monitor render failed" in caplog.text
+    # 下一次刷新照常渲染并继续安排
+    _, callback = view.root.scheduled[-1]
+    callback()
+    assert (view.renders, len(view.root.scheduled), view._render_error) == (2, 2, None)
+
+
+@pytest.mark.parametrize("capacity", [1, 3])
+def test_small_capacity(capacity):
+    ring = FrameRing(capacity=capacity)
+    ring.extend(messages(5))
+    assert len(ring) == capacity and ring.first == 5 - capacity
+
+
+def test_id_table_aggregates_timing():
+    table = FrameIdTable()
+    timestamps = [0.0, 0.010, 0.018, 0.030]
+    table.update([
+        can.Message(timestamp=t, arbitration_id=0x200, is_extended_id=False, data=bytes([i] * 8))
+        for i, t in enumerate(timestamps)
+    ])
+    table.update([can.Message(timestamp=0.005, arbitration_id=0x1ABCDE, data=bytes([7, 7]))])
+    assert len(table) == 2 and table.version == 2
+    short, extended = table.rows()
+    assert (short.frame_id, short.count, short.data) == (0x200, 4, bytes([3] * 8))
+    assert short.period == pytest.approx(0.010)
+    assert (short.min_interval, short.max_interval) == pytest.approx((0.008, 0.012))
+    assert extended.period is None
+
+    line = format_id_stats(short, [("speed", 1.5), ("gear", 3)])
+    assert line.startswith("ID: 200  DL: 8  03 03 03 03 03 03 03 03  n=4")
+    assert "10.00 ms   -2.00/  +2.00" in line
+    assert line.endswith("speed=1.5 gear=3")
+    # 少于两帧时周期和抖动显示为 -
+    assert format_id_stats(extended).startswith("ID: 001ABCDE  DL: 2  07 07")
+    assert "n=1" in format_id_stats(extended) and " ms" not in format_id_stats(extended)
+
+    table.clear()
+    assert table.rows() == [] and table.version == 3
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import statistics
+
+import can
+import pytest
+
+from vehicle.frame_stats import Histogram, SequenceTracker
+from vehicle.lmt import LMT_REPORT_FRAMES, LMTCanReportHandler
+from vehicle.signal_table import FrameEncoder
+
+
+def test_histogram():
+    histogram = Histogram(bin_width=1.0, bin_count=10)
+    assert histogram.percentile(99) is None
+    for value in [0.5, 1.5, 1.5, 2.5, 50.0]:
+        histogram.add(value)
+    assert (histogram.count, histogram.minimum, histogram.maximum) == (5, 0.5, 50.0)
+    assert histogram.mean == pytest.approx(11.2)
+    assert histogram.stddev == pytest.approx(statistics.stdev([0.5, 1.5, 1.5, 2.5, 50.0]))
+    assert histogram.percentile(50) == 2.0
+    # 超出范围的值落在最后一个桶, 百分位不超过最大值
+    assert histogram.counts[-1] == 1
+    assert histogram.percentile(100) == 11.0
+    histogram.reset()
+    assert histogram.count == 0 and sum(histogram.counts) == 0
+
+
+def feed(tracker, counters, period=0.01):
+    for i, counter in enumerate(counters):
+        tracker.update(counter, i * period)
+
+
+def test_clean_sequence_with_wraparound():
+    tracker = SequenceTracker(16)
+    feed(tracker, [14, 15, 0, 1, 2])
+    summary = tracker.summary()
+    assert (summary["received"], summary["dropped"], summary["duplicated"], summary["out_of_order"]) == (5, 0, 0, 0)
+    assert summary["interval_mean"] == pytest.approx(0.01)
+    assert summary["latency_p99"] is None
+
+
+def test_drops_duplicates_and_late_frames():
+    tracker = SequenceTracker(16)
+    feed(tracker, [0, 1, 4, 4, 3, 5])
+    # 4 之前跳过 2, 3 -> 丢 2 帧; 重复的 4; 迟到的 3 扣回一帧丢帧
+    assert (tracker.dropped, tracker.duplicated, tracker.out_of_order) == (1, 1, 1)
+    assert tracker.loss_rate == pytest.approx(1 / 7)
+    tracker.reset()
+    assert tracker.summary()["received"] == 0 and tracker.last_counter is None
+
+
+def test_latency():
+    tracker = SequenceTracker(256)
+    tracker.update(0, 1.0, now=1.002)
+    tracker.update(1, 1.01, now=1.014)
+    assert tracker.latency.mean == pytest.approx(0.003)
+
+
+class FixedTime(object):
+    def __init__(self):
+        self.calls = 0
+
+    def now(self):
+        self.calls += 1
+        return 100.0
+
+    @staticmethod
+    def to_host(timestamp):
+        return timestamp
+
+
+def test_lmt_batch_shares_one_receive_time():
+    timebase = FixedTime()
+    handler = LMTCanReportHandler(logging.getLogger("test"), timebase=timebase)
+    name, signals = LMT_REPORT_FRAMES[0x620]
+    encoder = FrameEncoder(0x620, name, signals)
+    messages = [
+        can.Message(arbitration_id=0x620, is_extended_id=False, timestamp=99.0 + i * 0.01,
+                    data=encoder.encode((0, 0, 0, 0, 0, counter)))
+        for i, counter in enumerate([0, 1, 2, 5])
+    ]
+    handler.handle_messages(messages)
+    assert timebase.calls == 1
+    stats = handler.get_frame_stats()[0x620]
+    assert (stats["received"], stats["dropped"]) == (4, 2)
+    assert stats["latency_mean"] == pytest.approx(1.0 - 0.015)
+    handler.reset_frame_stats()
+    assert handler.get_frame_stats()[0x620]["received"] == 0
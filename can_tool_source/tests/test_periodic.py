@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+
+import can
+from can.broadcastmanager import ModifiableCyclicTaskABC
+
+from vehicle.periodic import PeriodicCommandSender
+
+
+class FakeTask(ModifiableCyclicTaskABC):
+    def __init__(self, msg, period):
+        self.msg = msg
+        self.period = period
+        self.stopped = False
+        self.modified = 0
+
+    def modify_data(self, msg):
+        self.msg = msg
+        self.modified += 1
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeBus(object):
+    def __init__(self):
+        self.tasks = []
+
+    def send_periodic(self, msg, period):
+        task = FakeTask(msg, period)
+        self.tasks.append(task)
+        return task
+
+
+def command(frame_id, value):
+    return can.Message(arbitration_id=frame_id, is_extended_id=False, data=bytearray([value] * 8))
+
+
+def test_tasks_follow_updates():
+    bus = FakeBus()
+    sender = PeriodicCommandSender(bus, logging.getLogger("test"))
+    first = [command(0x100, 1), command(0x101, 2)]
+    assert sender.update(first, 0.02) == first
+    assert [(task.msg.arbitration_id, task.period) for task in bus.tasks] == [(0x100, 0.02), (0x101, 0.02)]
+    assert sender.native
+
+    # 任务持有副本, 原地修改不影响驱动中的报文
+    first[0].data[0] = 9
+    assert bus.tasks[0].msg.data[0] == 1
+    # 未变化的报文不修改任务, 变化的用 modify_data 替换
+    changed = sender.update([first[0], command(0x101, 2)], 0.02)
+    assert [msg.arbitration_id for msg in changed] == [0x100]
+    assert (bus.tasks[0].modified, bus.tasks[1].modified) == (1, 0)
+    assert bus.tasks[0].msg.data[0] == 9
+
+    # 不再出现的 ID 停止
+    sender.update([first[0]], 0.02)
+    assert bus.tasks[1].stopped and not bus.tasks[0].stopped
+    sender.stop()
+    assert bus.tasks[0].stopped and not sender.native
+
+
+def test_period_change_rebuilds_tasks():
+    bus = FakeBus()
+    sender = PeriodicCommandSender(bus, logging.getLogger("test"))
+    messages = [command(0x100, 1), command(0x103, 2)]
+    sender.update(messages, 0.02)
+    sender.update(messages, 0.02, rates={0x103: 0.1})
+    assert all(task.stopped for task in bus.tasks[:2])
+    assert [(task.msg.arbitration_id, task.period) for task in bus.tasks[2:]] == [(0x100, 0.02), (0x103, 0.1)]
+
+
+def test_virtual_bus_falls_back_to_thread_tasks():
+    with can.Bus(interface="virtual", channel="periodic-test") as bus, \
+            can.Bus(interface="virtual", channel="periodic-test") as receiver:
+        sender = PeriodicCommandSender(bus, logging.getLogger("test"))
+        sender.update([command(0x100, 1)], 0.01)
+        assert not sender.native
+        received = [receiver.recv(1.0) for _ in range(3)]
+        sender.update([command(0x100, 2)], 0.01)
+        deadline = time.monotonic() + 1.0
+        msg = receiver.recv(1.0)
+        while msg is not None and msg.data[0] != 2 and time.monotonic() < deadline:
+            msg = receiver.recv(1.0)
+        sender.stop()
+    assert all(msg is not None and msg.arbitration_id == 0x100 for msg in received)
+    assert msg is not None and msg.data[0] == 2
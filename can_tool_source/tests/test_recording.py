@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+import can
+import numpy as np
+import pytest
+
+from tests.records import random_records, write_records
+from vehicle.playback import RECORDED_TIME
+from vehicle.recorder import FLAG_TX, FrameRecorder, read_recording
+from vehicle.recording import RecordingReader
+
+
+def test_recorder_reader_round_trip(tmp_path):
+    path = str(tmp_path / "round_trip.bin")
+    rx = [
+        can.Message(timestamp=1.0 + i * 0.01, arbitration_id=0x500 + i % 4, data=bytes([i % 256] * 8))
+        for i in range(100)
+    ]
+    short = can.Message(timestamp=2.0, arbitration_id=0x18FF0001, is_extended_id=True, data=b"\x01\x02\x03")
+    tx = [can.Message(arbitration_id=0x100, data=bytes(range(8)))]
+
+    recorder = FrameRecorder(timebase=RECORDED_TIME)
+    recorder.start(path)
+    recorder.record(rx)
+    recorder.record([short])
+    recorder.record_tx(tx)
+    recorder.stop()
+    assert recorder.summary()["written"] == len(rx) + 2
+
+    with RecordingReader(path) as reader:
+        assert len(reader) == len(rx) + 2
+        messages = reader.messages()
+        for expected, msg in zip(rx + [short], messages):
+            assert msg.timestamp == expected.timestamp
+            assert msg.arbitration_id == expected.arbitration_id
+            assert msg.is_extended_id == expected.is_extended_id
+            assert msg.dlc == expected.dlc
+            assert bytes(msg.data) == bytes(expected.data)
+            assert msg.is_rx
+        sent = messages[-1]
+        assert not sent.is_rx
+        assert reader.records["flags"][-1] & FLAG_TX
+        assert bytes(sent.data) == bytes(range(8))
+        assert reader.start_time == 1.0
+
+        # read_recording (逐条解析) 与内存映射读取一致
+        for msg, parsed in zip(messages, read_recording(path)):
+            assert (msg.timestamp, msg.arbitration_id, bytes(msg.data), msg.is_rx) == \
+                (parsed.timestamp, parsed.arbitration_id, bytes(parsed.data), parsed.is_rx)
+
+
+
+def test_recorder_drops_beyond_max_pending(tmp_path):
+    path = str(tmp_path / "dropped.bin")
+    msgs = [can.Message(timestamp=float(i), arbitration_id=0x500, data=bytes(8)) for i in range(10)]
+    recorder = FrameRecorder(max_pending=8, flush_interval=60.0, timebase=RECORDED_TIME)
+    # 未开始记录时不入队
+    recorder.record(msgs)
+    assert recorder.summary()["pending"] == 0
+    recorder.start(path)
+    recorder.record(msgs[:6])
+    recorder.record(msgs[6:9])
+    # 队列已超过 max_pending, 整批丢弃
+    recorder.record(msgs[9:])
+    assert recorder.summary()["pending"] == 9
+    recorder.stop()
+    summary = recorder.summary()
+    assert (summary["recorded"], summary["written"], summary["dropped"], summary["pending"]) == (9, 9, 1, 0)
+    assert [msg.timestamp for msg in read_recording(path)] == [float(i) for i in range(9)]
+
+
+@pytest.mark.parametrize("extension", ["blf", "asc"])
+def test_recorder_writes_logger_formats(tmp_path, extension):
+    path = str(tmp_path / f"trace.{extension}")
+    rx = [
+        can.Message(timestamp=1.0 + i * 0.01, arbitration_id=0x500 + i, is_extended_id=False, data=bytes([i] * 8))
+        for i in range(3)
+    ]
+    tx = [can.Message(arbitration_id=0x18FF0001, is_extended_id=True, data=b"\x01\x02")]
+    recorder = FrameRecorder(timebase=RECORDED_TIME)
+    recorder.start(path)
+    recorder.record(rx)
+    recorder.record_tx(tx)
+    recorder.stop()
+    assert recorder.summary()["written"] == 4
+
+    messages = list(can.LogReader(path))
+    assert [msg.arbitration_id for msg in messages] == [0x500, 0x501, 0x502, 0x18FF0001]
+    assert [bytes(msg.data) for msg in messages] == [bytes([i] * 8) for i in range(3)] + [b"\x01\x02"]
+    assert [msg.is_rx for msg in messages] == [True, True, True, False]
+    assert messages[-1].is_extended_id
+    # 读回的时间戳相对第一帧, 间隔保持不变
+    assert [msg.timestamp - messages[0].timestamp for msg in messages[:3]] == pytest.approx([0.0, 0.01, 0.02])
+
+def test_truncated_record_is_ignored(recording):
+    path = recording([(float(i), 0x501, 0, 8, bytes(8)) for i in range(3)])
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 5)
+    with RecordingReader(path, use_index_cache=False) as reader:
+        assert len(reader) == 3
+        np.testing.assert_array_equal(reader.records["timestamp"], [0.0, 1.0, 2.0])
+
+
+INDEX_IDS = [0x100, 0x101, 0x501, 0x505, 0x620]
+
+
+def brute_index_of_time(timestamps, timestamp):
+    return next((i for i, value in enumerate(timestamps) if value >= timestamp), len(timestamps))
+
+
+def check_index(reader, records):
+    timestamps = [record[0] for record in records]
+    frame_ids = [record[1] for record in records]
+    count = len(records)
+    assert len(reader) == count
+    assert reader.end_time == max(timestamps)
+
+    probes = sorted(set(timestamps)) + [-1.0, max(timestamps) + 1.0]
+    probes += [value + 0.0004 for value in timestamps[::7]]
+    for timestamp in probes:
+        assert reader.index_of_time(timestamp) == brute_index_of_time(timestamps, timestamp), timestamp
+
+    for frame_id in INDEX_IDS + [0x7FF]:
+        expected = [i for i, value in enumerate(frame_ids) if value == frame_id]
+        assert reader.frame_indices(frame_id).tolist() == expected
+        for first, last in [(0, None), (5, 40), (count // 2, count), (count - 3, None), (17, 17)]:
+            upper = count if last is None else last
+            assert reader.frame_indices(frame_id, first, last).tolist() == \
+                [i for i in expected if first <= i < upper]
+        for after in [-1, 0, 15, count // 2, count - 1]:
+            following = [i for i in expected if i > after]
+            assert reader.next_frame(frame_id, after) == (following[0] if following else None)
+
+
+@pytest.mark.parametrize("checkpoint_every", [1, 4, 16, 1000])
+def test_index_matches_brute_force(recording, checkpoint_every):
+    # 发送帧 (0x100, 0x101) 的时间戳晚于之后的接收帧, 文件中时间局部乱序
+    records = random_records(300, INDEX_IDS, tx_ids=(0x100, 0x101))
+    timestamps = [record[0] for record in records]
+    assert timestamps != sorted(timestamps)
+    path = recording(records)
+    with RecordingReader(path, checkpoint_every=checkpoint_every) as reader:
+        check_index(reader, records)
+    # 第二次从索引缓存加载
+    with RecordingReader(path, checkpoint_every=checkpoint_every) as reader:
+        check_index(reader, records)
+
+
+def test_index_cache_is_rebuilt_after_append(recording):
+    records = random_records(200, INDEX_IDS, tx_ids=(0x100,))
+    path = recording(records)
+    with RecordingReader(path, checkpoint_every=16) as reader:
+        check_index(reader, records)
+    assert os.path.exists(f"{path}.idx.npz") and os.path.exists(f"{path}.offsets.npy")
+
+    appended = random_records(50, INDEX_IDS, seed=1, tx_ids=(0x100,))
+    appended = [(record[0] + 1.0,) + record[1:] for record in appended]
+    write_records(path, appended, mode="ab")
+    with RecordingReader(path, checkpoint_every=16) as reader:
+        check_index(reader, records + appended)
+
+
+def test_corrupt_index_cache_is_rebuilt(recording):
+    records = random_records(100, INDEX_IDS)
+    path = recording(records)
+    RecordingReader(path, checkpoint_every=8).close()
+    with open(f"{path}.idx.npz", "wb") as f:
+        f.write(b"not an index")
+    with RecordingReader(path, checkpoint_every=8) as reader:
+        check_index(reader, records)
+
+
+def test_unwritable_index_cache_falls_back(recording, monkeypatch):
+    records = random_records(100, INDEX_IDS, tx_ids=(0x101,))
+    path = recording(records)
+
+    def read_only(*args, **kwargs):
+        raise PermissionError("read-only directory")
+
+    monkeypatch.setattr(np, "save", read_only)
+    monkeypatch.setattr(np, "savez", read_only)
+    with RecordingReader(path, checkpoint_every=8) as reader:
+        check_index(reader, records)
+    assert not os.path.exists(f"{path}.idx.npz")
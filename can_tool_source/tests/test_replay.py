@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+
+import can
+import pytest
+
+from vehicle import replay
+from vehicle.recorder import FLAG_TX
+from vehicle.replay import ReplayEngine, ReplaySource
+
+
+class FakeTimebase(object):
+    """
+    sleep 推进时钟; 每次读时钟前进 0.1 us, 保证忙等能结束。
+    """
+
+    def __init__(self, start=100.0):
+        self.t = start
+
+    def now(self):
+        self.t += 1e-7
+        return self.t
+
+    def sleep(self, seconds):
+        self.t += seconds
+
+
+class FailingBus(object):
+    def __init__(self):
+        self.sent = []
+
+    def send(self, msg, timeout=None):
+        if msg.arbitration_id == 0x7FF:
+            raise can.CanOperationError("transmit buffer full")
+        self.sent.append(msg.arbitration_id)
+
+
+def frames(*timestamps):
+    return [
+        (timestamp, can.Message(timestamp=timestamp, arbitration_id=0x500 + i, is_extended_id=False, data=bytes(8)))
+        for i, timestamp in enumerate(timestamps)
+    ]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTimebase()
+    monkeypatch.setattr(replay.time, "sleep", clock.sleep)
+    return clock
+
+
+def play(clock, source, **kwargs):
+    batches = []
+    engine = ReplayEngine(source, on_frames=lambda msgs: batches.append(
+        (round(msgs[0].timestamp - 100.0, 4), [msg.arbitration_id for msg in msgs])), spin=0.0, timebase=clock, **kwargs)
+    engine.run()
+    return engine, batches
+
+
+@pytest.mark.parametrize("speed, scale", [(1.0, 1.0), (2.0, 0.5)])
+def test_frames_sent_at_deadlines(clock, speed, scale):
+    engine, batches = play(clock, frames(5.0, 5.0, 5.01, 5.03), speed=speed)
+    # 同一时刻到期的帧合成一批, 截止时间按 speed 缩放
+    assert batches == [(0.0, [0x500, 0x501]), (0.01 * scale, [0x502]), (0.03 * scale, [0x503])]
+    assert engine.summary()["sent"] == 4
+    assert engine.summary()["lateness_max"] < 0.0001
+    assert engine.finished.is_set()
+
+
+def test_loop_keeps_time_axis_continuous(clock):
+    source = frames(5.0, 5.01)
+    batches = []
+
+    def on_frames(msgs):
+        batches.append(round(msgs[0].timestamp - 100.0, 4))
+        if len(batches) == 6:
+            engine.stop()
+
+    engine = ReplayEngine(source, on_frames=on_frames, loop=True, spin=0.0, timebase=clock)
+    engine.run()
+    assert batches == [0.0, 0.01, 0.01, 0.02, 0.02, 0.03]
+    # 第三轮的最后一帧时停止, 三轮都已完整回放
+    assert engine.loops == 3
+
+
+def test_unthrottled_replay_batches(clock):
+    engine, batches = play(clock, frames(*[5.0 + i for i in range(5)]), speed=0, max_batch=2)
+    assert [ids for _, ids in batches] == [[0x500, 0x501], [0x502, 0x503], [0x504]]
+    assert clock.t < 100.001
+    assert engine.lateness.count == 0
+
+
+def test_send_errors_counted_and_logged_once(clock, caplog):
+    bus = FailingBus()
+    source = frames(5.0, 5.0, 5.0)
+    for _, msg in source[:2]:
+        msg.arbitration_id = 0x7FF
+    engine = ReplayEngine(source, bus=bus, spin=0.0, timebase=clock, log=logging.getLogger("test"))
+    with caplog.at_level(logging.ERROR):
+        engine.run()
+    assert bus.sent == [0x502]
+    assert engine.send_errors == 2
+    assert len(caplog.records) == 1
+
+
+def test_source_filters_recording(recording):
+    path = recording([
+        (float(i), frame_id, FLAG_TX if frame_id == 0x100 else 0, 8, bytes(8))
+        for i, frame_id in enumerate([0x100, 0x501, 0x502, 0x503, 0x501])
+    ])
+    ids = lambda source: [msg.arbitration_id for _, msg in source]
+    assert ids(ReplaySource(path)) == [0x100, 0x501, 0x502, 0x503, 0x501]
+    assert ids(ReplaySource(path, rx_only=True, chunk=2)) == [0x501, 0x502, 0x503, 0x501]
+    assert ids(ReplaySource(path, include=[0x501, 0x100], rx_only=True)) == [0x501, 0x501]
+    assert ids(ReplaySource(path, exclude=[0x502])) == [0x100, 0x501, 0x503, 0x501]
+    assert [timestamp for timestamp, _ in ReplaySource(path, include=[0x503])] == [3.0]
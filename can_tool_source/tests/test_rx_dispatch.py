@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+
+import can
+
+from vehicle.rx_dispatch import RxDispatcher
+
+
+def frame(frame_id, value=0):
+    return can.Message(arbitration_id=frame_id, is_extended_id=False, data=bytearray([value] * 8))
+
+
+def test_listeners_in_order_and_isolated():
+    dispatcher = RxDispatcher(logging.getLogger("test"))
+    calls = []
+
+    def broken(msgs):
+        raise RuntimeError("boom")
+
+    dispatcher.add_listener("decode", lambda msgs: calls.append(("decode", len(msgs))))
+    dispatcher.add_listener("broken", broken)
+    dispatcher.add_listener("record", lambda msgs: calls.append(("record", len(msgs))))
+    # 同名替换并移到末尾
+    dispatcher.add_listener("decode", lambda msgs: calls.append(("decode2", len(msgs))))
+    assert dispatcher.listener_names == ["broken", "record", "decode"]
+
+    dispatcher.dispatch([frame(0x100), frame(0x101)])
+    # 单个监听函数的异常不影响其他监听函数
+    assert calls == [("record", 2), ("decode2", 2)]
+    assert dispatcher.errors == 1
+
+    dispatcher.remove_listener("broken")
+    dispatcher.dispatch([frame(0x100)])
+    assert dispatcher.errors == 1 and dispatcher.received == 3
+
+
+def test_disabled_frames_are_discarded():
+    dispatcher = RxDispatcher(logging.getLogger("test"))
+    calls = []
+    dispatcher.add_listener("decode", calls.append)
+    dispatcher.on_message_received(frame(0x100))
+    assert calls == [] and dispatcher.dropped == 1
+    dispatcher.enabled.set()
+    dispatcher.on_message_received(frame(0x101))
+    assert [msg.arbitration_id for msg in calls[0]] == [0x101]
+
+
+def test_notifier_delivers_from_bus():
+    dispatcher = RxDispatcher(logging.getLogger("test"))
+    received = []
+    done = threading.Event()
+
+    def listener(msgs):
+        received.extend(msg.arbitration_id for msg in msgs)
+        if len(received) >= 3:
+            done.set()
+
+    dispatcher.add_listener("collect", listener)
+    dispatcher.enabled.set()
+    with can.Bus(interface="virtual", channel="rx-dispatch-test") as bus, \
+            can.Bus(interface="virtual", channel="rx-dispatch-test") as sender:
+        dispatcher.start(bus, timeout=0.05)
+        for frame_id in (0x100, 0x101, 0x102):
+            sender.send(frame(frame_id))
+        assert done.wait(2.0)
+        dispatcher.stop()
+    assert received == [0x100, 0x101, 0x102]
+    assert dispatcher.notifier is None and dispatcher.bus is None
+
+
+class QueueBus(object):
+    """
+    recv(0) 依次返回驱动队列中已到达的帧, 可在指定位置抛出驱动错误。
+    """
+
+    def __init__(self, msgs, error_at=None):
+        self.msgs = list(msgs)
+        self.error_at = error_at
+        self.calls = 0
+
+    def recv(self, timeout=None):
+        self.calls += 1
+        if self.calls == self.error_at:
+            raise can.CanOperationError("bus off")
+        return self.msgs.pop(0) if self.msgs else None
+
+
+def test_wakeup_drains_queue_in_bounded_batches():
+    dispatcher = RxDispatcher(logging.getLogger("test"), max_batch=4)
+    batches = []
+    dispatcher.add_listener("collect", lambda msgs: batches.append([msg.arbitration_id for msg in msgs]))
+    dispatcher.enabled.set()
+    dispatcher.bus = QueueBus([frame(frame_id) for frame_id in range(1, 6)])
+    dispatcher.on_message_received(frame(0))
+    dispatcher.on_message_received(dispatcher.bus.recv())
+    assert batches == [[0, 1, 2, 3], [4, 5]]
+    summary = dispatcher.summary()
+    assert (summary["received"], summary["batches"], summary["max_batch"]) == (6, 2, 4)
+    assert summary["mean_batch"] == 3.0
+
+
+def test_driver_error_keeps_drained_frames():
+    log = logging.getLogger("test")
+    dispatcher = RxDispatcher(log)
+    batches = []
+    dispatcher.add_listener("collect", lambda msgs: batches.append(len(msgs)))
+    dispatcher.enabled.set()
+    dispatcher.bus = QueueBus([frame(1), frame(2), frame(3)], error_at=3)
+    dispatcher.on_message_received(frame(0))
+    # 出错前取到的帧照常分发
+    assert batches == [3] and dispatcher.errors == 1
+    # 持续错误只记录一次, 收到新帧后重新计数
+    dispatcher.on_error(can.CanOperationError("bus off"))
+    assert dispatcher._error_streak == 2
+    dispatcher.on_message_received(frame(4))
+    assert dispatcher._error_streak == 0 and batches == [3, 2]
+
+
+def test_disabled_batch_counts_every_frame_dropped():
+    dispatcher = RxDispatcher(logging.getLogger("test"))
+    dispatcher.bus = QueueBus([frame(1), frame(2)])
+    dispatcher.on_message_received(frame(0))
+    assert dispatcher.dropped == 3 and dispatcher.received == 0
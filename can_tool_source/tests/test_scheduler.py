@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from vehicle.scheduler import (OVERRUN_CATCH_UP, OVERRUN_REALIGN, OVERRUN_SKIP,
+                               DeadlineScheduler)
+
+
+class FakeTimebase(object):
+    def __init__(self, start=0.0, step=0.0):
+        self.t = start
+        self.step = step
+
+    def now(self):
+        # step > 0 时每次读时钟都前进, 用于覆盖忙等分支
+        self.t += self.step
+        return self.t
+
+
+def scheduler(overrun, clock):
+    sched = DeadlineScheduler(0.01, spin=1.0, overrun=overrun, timebase=clock)
+    assert sched.wait() == 0.0  # 第一次以当前时刻为起点
+    return sched
+
+
+def test_on_time_cycles_wait_for_deadline():
+    clock = FakeTimebase(step=0.001)
+    sched = scheduler(OVERRUN_SKIP, clock)
+    for _ in range(3):
+        late = sched.wait()
+        assert 0.0 <= late < 0.002
+    assert sched.overruns == 0 and sched.skipped == 0
+    assert sched.summary()["cycles"] == 4
+
+
+def test_skip_keeps_grid():
+    clock = FakeTimebase()
+    sched = scheduler(OVERRUN_SKIP, clock)
+    clock.t = 0.035
+    assert sched.wait() == pytest.approx(0.005)
+    assert (sched.overruns, sched.skipped) == (1, 2)
+    assert sched.deadline == pytest.approx(0.04)
+
+
+def test_catch_up_is_bounded():
+    clock = FakeTimebase()
+    sched = scheduler(OVERRUN_CATCH_UP, clock)
+    clock.t = 0.035
+    # 错过的周期立即连续补发
+    lates = [sched.wait() for _ in range(3)]
+    assert lates == pytest.approx([0.025, 0.015, 0.005])
+    assert sched.skipped == 0
+    # 超过 max_catch_up 的部分被丢弃
+    clock.t = 0.1
+    assert sched.wait() == pytest.approx(0.03)
+    assert sched.skipped == 3
+    assert sched.deadline == pytest.approx(0.08)
+
+
+def test_realign_restarts_grid():
+    clock = FakeTimebase()
+    sched = scheduler(OVERRUN_REALIGN, clock)
+    clock.t = 0.035
+    assert sched.wait() == 0.0
+    assert sched.deadline == pytest.approx(0.045)
+    assert sched.skipped == 0
+
+
+def test_set_period_realigns():
+    clock = FakeTimebase()
+    sched = scheduler(OVERRUN_SKIP, clock)
+    sched.set_period(0.05)
+    clock.t = 0.5
+    assert sched.wait() == 0.0
+    assert sched.deadline == pytest.approx(0.55)
+    assert sched.overruns == 0
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        DeadlineScheduler(0.01, overrun="drop")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import pytest
+
+from tests.records import random_records, write_records
+from vehicle.batch_decode import REPORT_FRAMES, decode_batch
+from vehicle.recording import RecordingReader
+from vehicle.signal_export import clear_cache, export_signals
+
+FRAME_IDS = sorted(REPORT_FRAMES)
+
+
+def single_pass(path):
+    with RecordingReader(path, use_index_cache=False) as reader:
+        records = reader.records
+        return decode_batch(records["timestamp"], records["frame_id"], records["data"])
+
+
+def assert_export_matches(output, expected):
+    with np.load(output) as exported:
+        assert len(exported.files) == sum(len(columns) for columns in expected.values())
+        for frame_id, columns in expected.items():
+            for name, column in columns.items():
+                np.testing.assert_array_equal(exported[f"{frame_id:#05x}.{name}"], column)
+
+
+def test_export_matches_single_pass_decode(recording, tmp_path):
+    path = recording(random_records(3000, FRAME_IDS + [0x7FF]))
+    output = str(tmp_path / "signals.npz")
+    cache_dir = str(tmp_path / "cache")
+    summary = export_signals(path, output, workers=1, chunk_frames=500, cache_dir=cache_dir)
+    assert (summary["frames"], summary["chunks"], summary["cached"]) == (3000, 6, 0)
+    assert_export_matches(output, single_pass(path))
+
+    # 记录没有变化, 再次导出全部命中缓存且不读取记录
+    summary = export_signals(path, output, workers=1, chunk_frames=500, cache_dir=cache_dir)
+    assert (summary["cached"], summary["read"]) == (6, 0)
+    assert_export_matches(output, single_pass(path))
+
+
+def test_export_after_append_decodes_changed_chunk(recording, tmp_path):
+    path = recording(random_records(1200, FRAME_IDS))
+    output = str(tmp_path / "signals.npz")
+    cache_dir = str(tmp_path / "cache")
+    export_signals(path, output, workers=1, chunk_frames=500, cache_dir=cache_dir)
+    write_records(path, random_records(100, FRAME_IDS, seed=1), mode="ab")
+    summary = export_signals(path, output, workers=1, chunk_frames=500, cache_dir=cache_dir)
+    # 文件变化后每块都读取比较内容, 前两块不变, 最后一块 (1000-1300) 重新解码
+    assert (summary["chunks"], summary["cached"], summary["read"]) == (3, 2, 3)
+    assert_export_matches(output, single_pass(path))
+
+
+def cached_chunks(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(".npz"))
+
+
+def test_cache_is_evicted_least_recently_used_first(recording, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = recording(random_records(1000, FRAME_IDS, seed=1), "first.bin")
+    second = recording(random_records(1000, FRAME_IDS, seed=2), "second.bin")
+    output = str(tmp_path / "signals.npz")
+
+    export_signals(first, output, workers=1, chunk_frames=500, cache_dir=cache_dir, max_cache_bytes=None)
+    first_chunks = cached_chunks(cache_dir)
+    assert len(first_chunks) == 2
+    # 上限只够一次导出: 导出 second 时淘汰 first 的块, 本次用到的块保留
+    summary = export_signals(second, output, workers=1, chunk_frames=500, cache_dir=cache_dir, max_cache_bytes=1)
+    assert summary["evicted"] == 2
+    assert not set(first_chunks) & set(cached_chunks(cache_dir))
+    assert_export_matches(output, single_pass(second))
+
+    # first 的块记录 (.ref) 指向已删除的结果, 重新读取解码
+    summary = export_signals(first, output, workers=1, chunk_frames=500, cache_dir=cache_dir, max_cache_bytes=None)
+    assert (summary["cached"], summary["read"]) == (0, 2)
+    assert_export_matches(output, single_pass(first))
+
+
+def test_cache_hit_refreshes_use_time(recording, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    old = recording(random_records(500, FRAME_IDS, seed=1), "old.bin")
+    new = recording(random_records(500, FRAME_IDS, seed=2), "new.bin")
+    output = str(tmp_path / "signals.npz")
+    export_signals(old, output, workers=1, chunk_frames=500, cache_dir=cache_dir, max_cache_bytes=None)
+    [old_chunk] = cached_chunks(cache_dir)
+    os.utime(os.path.join(cache_dir, old_chunk), (0, 0))
+    export_signals(new, output, workers=1, chunk_frames=500, cache_dir=cache_dir, max_cache_bytes=None)
+    # 再次导出 old 命中缓存并更新使用时间, 之后超出上限时淘汰的是 new 的块
+    export_signals(old, output, workers=1, chunk_frames=500, cache_dir=cache_dir, max_cache_bytes=None)
+    size = os.path.getsize(os.path.join(cache_dir, old_chunk))
+    summary = export_signals(old, output, workers=1, chunk_frames=500, cache_dir=cache_dir, max_cache_bytes=size)
+    assert summary["evicted"] == 1
+    assert cached_chunks(cache_dir) == [old_chunk]
+
+
+def test_clear_cache(recording, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    path = recording(random_records(1000, FRAME_IDS))
+    export_signals(path, str(tmp_path / "signals.npz"), workers=1, chunk_frames=500, cache_dir=cache_dir)
+    assert clear_cache(cache_dir) == 4
+    assert os.listdir(cache_dir) == []
+    assert clear_cache(str(tmp_path / "missing")) == 0
+
+
+def test_export_rejects_unknown_format(recording, tmp_path):
+    path = recording(random_records(10, FRAME_IDS))
+    with pytest.raises(ValueError):
+        export_signals(path, str(tmp_path / "out"), fmt="csv", cache_dir=str(tmp_path / "cache"))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import random
+
+import numpy as np
+import pytest
+
+from vehicle import signal_summary
+from vehicle.batch_decode import decode_batch
+from vehicle.hooke2 import HOOKE2_REPORT_FRAMES
+from vehicle.recording import RecordingReader
+from vehicle.signal_summary import COMPARISONS, RecordingQuery, parse_condition
+from vehicle.signal_table import compile_encoders
+
+ENCODERS = compile_encoders(HOOKE2_REPORT_FRAMES)
+
+
+def synthetic_records(count=3000, seed=0):
+    """
+    车速 (0x505) 随机游走并有长时间停车, 刹车状态 (0x501) 偶尔切换, 夹杂无关的 0x620。
+    """
+    rng = random.Random(seed)
+    speed, brake, state = 0.0, 0.0, 0
+    records = []
+    for i in range(count):
+        frame_id = rng.choice((0x501, 0x505, 0x505, 0x620))
+        if frame_id == 0x505:
+            speed = 0.0 if (i // 500) % 2 else max(-1.0, min(speed + rng.uniform(-0.3, 0.3), 5.0))
+            values = [0.0] * len(ENCODERS[0x505].names)
+            values[ENCODERS[0x505].names.index("vehicle_speed")] = speed
+            data = bytes(ENCODERS[0x505].encode(values))
+        elif frame_id == 0x501:
+            if rng.random() < 0.05:
+                state = rng.randrange(4)
+            brake = max(0.0, min(brake + rng.uniform(-5, 5), 100.0))
+            data = bytes(ENCODERS[0x501].encode((state, 0, 0, brake)))
+        else:
+            data = bytes(rng.getrandbits(8) for _ in range(8))
+        records.append((i * 0.01, frame_id, 0, 8, data))
+    return records
+
+
+def reference_find(reader, conditions, min_duration=0.0):
+    """
+    全量解码, 按文件顺序逐帧保持每个信号的最新值, 在每一帧求条件。
+    """
+    records = reader.records
+    columns = decode_batch(records["timestamp"], records["frame_id"], records["data"])
+    frame_ids = np.asarray(records["frame_id"])
+    timestamps = np.asarray(records["timestamp"])
+    matched = np.ones(len(reader), dtype=bool)
+    for condition in conditions:
+        rows = np.flatnonzero(frame_ids == condition.frame_id)
+        values = columns[condition.frame_id][condition.signal]
+        position = np.searchsorted(rows, np.arange(len(reader)), side="right") - 1
+        held = values[np.maximum(position, 0)]
+        matched &= (position >= 0) & COMPARISONS[condition.op](held, condition.value)
+    intervals = []
+    begin = None
+    for row, value in enumerate(matched.tolist()):
+        if value and begin is None:
+            begin = row
+        elif not value and begin is not None:
+            intervals.append((float(timestamps[begin]), float(timestamps[row])))
+            begin = None
+    if begin is not None:
+        intervals.append((float(timestamps[begin]), reader.end_time))
+    return [(b, e) for b, e in signal_summary._merge(intervals) if e - b >= min_duration]
+
+
+CONDITIONS = [
+    ["vehicle_speed > 1.0"],
+    ["vehicle_speed >= 0.5"],
+    ["vehicle_speed < -0.2"],
+    ["vehicle_speed <= 0"],
+    ["brake_en_state == 2"],
+    ["brake_en_state != 0"],
+    ["vehicle_speed == 0"],
+    ["vehicle_speed > 0.5", "brake_pedal_actual > 20", "brake_en_state != 3"],
+    ["vehicle_speed > 100"],
+]
+
+
+@pytest.mark.parametrize("texts", CONDITIONS, ids=lambda texts: " & ".join(texts))
+@pytest.mark.parametrize("decode_rows", [1 << 20, 50])
+def test_find_matches_full_decode(recording, monkeypatch, texts, decode_rows):
+    monkeypatch.setattr(signal_summary, "DECODE_ROWS", decode_rows)
+    path = recording(synthetic_records())
+    conditions = [parse_condition(text) for text in texts]
+    with RecordingReader(path, checkpoint_every=16) as reader:
+        expected = reference_find(reader, conditions)
+        query = RecordingQuery(reader)
+        assert query.find(texts) == pytest.approx(expected)
+        assert query.find(conditions, min_duration=0.3) == pytest.approx(
+            [(b, e) for b, e in expected if e - b >= 0.3]
+        )
+        # 摘要缓存加载后结果不变
+        assert RecordingQuery(reader).find(conditions) == pytest.approx(expected)
+
+
+def test_summary_skips_chunks(recording):
+    path = recording(synthetic_records())
+    with RecordingReader(path, checkpoint_every=16) as reader:
+        query = RecordingQuery(reader, use_cache=False)
+        assert query.find(["vehicle_speed > 1.0"])
+        assert 0 < query.candidate_chunks < query.summary.chunks
+        assert query.find(["vehicle_speed > 100"]) == []
+        assert query.candidate_chunks == 0
+
+
+def test_parse_condition_errors():
+    with pytest.raises(ValueError):
+        parse_condition("vehicle_speed >> 1")
+    with pytest.raises(ValueError):
+        parse_condition("no_such_signal > 1")
+    with pytest.raises(ValueError, match="ambiguous"):
+        parse_condition("cur_fb > 1")
+    assert parse_condition("0x620.cur_fb <= -2").frame_id == 0x620
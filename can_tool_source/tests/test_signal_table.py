@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+from vehicle.hooke2 import HOOKE2_COMMAND_FRAMES, HOOKE2_REPORT_DECODERS, HOOKE2_REPORT_FRAMES
+from vehicle.lmt import LMT_COMMAND_FRAMES, LMT_REPORT_FRAMES
+from vehicle.signal_table import FrameDecoder, FrameEncoder, Signal, compile_encoders, compile_frames
+
+ALL_FRAMES = {**HOOKE2_REPORT_FRAMES, **HOOKE2_COMMAND_FRAMES, **LMT_REPORT_FRAMES, **LMT_COMMAND_FRAMES}
+
+
+def reference_raw(signal, data):
+    """
+    按 DBC 位编号逐位取出原始值 (与编译后的移位/掩码实现无关)。
+    """
+    raw = 0
+    if signal.byte_order == "little":
+        for i in range(signal.length):
+            bit = signal.start_bit + i
+            raw |= ((data[bit // 8] >> (bit % 8)) & 1) << i
+    else:
+        byte, bit = divmod(signal.start_bit, 8)
+        for _ in range(signal.length):
+            raw = (raw << 1) | ((data[byte] >> bit) & 1)
+            if bit == 0:
+                byte, bit = byte + 1, 7
+            else:
+                bit -= 1
+    if signal.signed and raw & (1 << (signal.length - 1)):
+        raw -= 1 << signal.length
+    return raw
+
+
+def reference_decode(signals, data):
+    return tuple(reference_raw(signal, data) * signal.scale + signal.offset for signal in signals)
+
+
+def reference_encode(signals, values):
+    """
+    按 DBC 位编号逐位写入, 原始值与旧的发送代码一致: int((物理值 - offset) / scale), 截断而非四舍五入。
+    """
+    data = bytearray(8)
+    for signal, value in zip(signals, values):
+        if signal.minimum is not None:
+            value = max(value, signal.minimum)
+        if signal.maximum is not None:
+            value = min(value, signal.maximum)
+        raw = int((value - signal.offset) / signal.scale) & ((1 << signal.length) - 1)
+        if signal.byte_order == "little":
+            for i in range(signal.length):
+                bit = signal.start_bit + i
+                data[bit // 8] |= ((raw >> i) & 1) << (bit % 8)
+        else:
+            byte, bit = divmod(signal.start_bit, 8)
+            for i in reversed(range(signal.length)):
+                data[byte] |= ((raw >> i) & 1) << bit
+                if bit == 0:
+                    byte, bit = byte + 1, 7
+                else:
+                    bit -= 1
+    return data
+
+
+def test_brake_report_hand_computed():
+    decoder = HOOKE2_REPORT_DECODERS[0x501]
+    # en_state=2, flt1=0x11, flt2=0x22, pedal = 0x01F4 * 0.1 = 50.0 %
+    assert decoder.decode(bytes([0x02, 0x11, 0x22, 0x01, 0xF4, 0, 0, 0])) == pytest.approx((2, 0x11, 0x22, 50.0))
+
+
+def test_vcu_report_hand_computed():
+    decoder = HOOKE2_REPORT_DECODERS[0x505]
+    values = dict(zip(decoder.names, decoder.decode(bytes([0xFF, 0x6B, 0xFC, 0x18, 0x55, 0x07, 0x00, 0x02]))))
+    # 加速度: 12 位 0xFF6 = -10 -> -0.1 m/s^2; 车速: 0xFC18 = -1000 -> -1.0 m/s
+    assert values["vehicle_acc"] == pytest.approx(-0.1)
+    assert values["vehicle_speed"] == pytest.approx(-1.0)
+    assert values["brake_light_actual"] == 1
+    assert values["steer_mode_sts"] == 3
+    assert values["aeb_state"] == 1
+    assert values["frontcrash_state"] == 0
+    assert values["backcrash_state"] == 1
+    assert values["vehicle_mode_state"] == 2
+    assert values["drive_mode_sts"] == 2
+    assert values["chassis_errcode"] == 7
+    assert values["turn_light_actual"] == 2
+
+
+def test_vcu_report_matches_legacy_formulas():
+    # 旧实现逐字段手写的位运算
+    decoder = HOOKE2_REPORT_DECODERS[0x505]
+    rng = random.Random(1)
+    for _ in range(200):
+        data = bytes(rng.getrandbits(8) for _ in range(8))
+        values = dict(zip(decoder.names, decoder.decode(data)))
+        acc = (data[0] << 4) | (data[1] >> 4) & 0x0F
+        if acc & 0x800:
+            acc -= 0x1000
+        speed = data[2] << 8 | data[3]
+        if speed & 0x8000:
+            speed -= 0x10000
+        assert values["vehicle_acc"] == pytest.approx(acc * 0.01)
+        assert values["vehicle_speed"] == pytest.approx(speed * 0.001)
+        assert values["brake_light_actual"] == (data[1] >> 3) & 0x01
+        assert values["steer_mode_sts"] == data[1] & 0x07
+        assert values["vehicle_mode_state"] == (data[4] >> 3) & 0x03
+        assert values["drive_mode_sts"] == (data[4] >> 5) & 0x07
+        assert values["turn_light_actual"] == data[7] & 0x03
+
+
+def test_throttle_command_hand_computed():
+    encoder = FrameEncoder(0x100, *HOOKE2_COMMAND_FRAMES[0x100])
+    # en=1, acc 2.5 -> 250 (小端 8 起 10 位), pedal 25.0 % -> 250 (字节 3-4), vel 1.0 -> 100 (小端 40 起), checksum 0x5A
+    data = encoder.encode((1, 2.5, 25.0, 1.0, 0x5A))
+    assert bytes(data) == bytes([0x01, 0xFA, 0x00, 0x00, 0xFA, 0x64, 0x00, 0x5A])
+
+
+def test_encoder_clamps_to_range():
+    encoder = FrameEncoder(0x100, *HOOKE2_COMMAND_FRAMES[0x100])
+    assert encoder.encode((0, 0, 150.0, 0, 0)) == encoder.encode((0, 0, 100.0, 0, 0))
+
+
+@pytest.mark.parametrize("frame_id", sorted(ALL_FRAMES))
+def test_decoder_matches_reference(frame_id):
+    name, signals = ALL_FRAMES[frame_id]
+    decoder = FrameDecoder(frame_id, name, signals)
+    rng = random.Random(frame_id)
+    for _ in range(200):
+        data = bytes(rng.getrandbits(8) for _ in range(8))
+        assert decoder.decode(data) == pytest.approx(reference_decode(signals, data))
+
+
+@pytest.mark.parametrize("frame_id", sorted(ALL_FRAMES))
+def test_encoder_matches_reference(frame_id):
+    name, signals = ALL_FRAMES[frame_id]
+    decoder = compile_frames({frame_id: (name, signals)})[frame_id]
+    encoder = compile_encoders({frame_id: (name, signals)})[frame_id]
+    rng = random.Random(frame_id)
+    for _ in range(200):
+        # 解码随机数据得到合法的物理值, 再加一点偏差, 覆盖截断和范围限制
+        values = [
+            value + rng.uniform(-1, 1) * signal.scale
+            for signal, value in zip(signals, decoder.decode(bytes(rng.getrandbits(8) for _ in range(8))))
+        ]
+        assert encoder.encode(values) == reference_encode(signals, values)
+
+
+def test_short_frame_is_zero_padded():
+    decoder = FrameDecoder(0x1, "short", (Signal("a", 7, 8), Signal("b", 15, 8)))
+    assert decoder.decode(b"\x05") == (5, 0)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+
+import can
+import pytest
+
+from vehicle.hooke2 import HOOKE2_REPORT_DECODERS, HOOKE2CanReportHandler
+from vehicle.lmt import LMT_REPORT_FRAMES
+from vehicle.signal_table import FrameEncoder
+from vehicle.signal_watch import SignalWatcher
+
+BRAKE = FrameEncoder(0x501, HOOKE2_REPORT_DECODERS[0x501].name, HOOKE2_REPORT_DECODERS[0x501].signals)
+
+
+def brake_frame(pedal, timestamp):
+    return can.Message(
+        arbitration_id=0x501, is_extended_id=False, timestamp=timestamp, data=BRAKE.encode((1, 0, 0, pedal))
+    )
+
+
+def drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get())
+    return events
+
+
+@pytest.fixture
+def handler():
+    return HOOKE2CanReportHandler(logging.getLogger("test"))
+
+
+def test_frame_signal_deadband(handler):
+    subscription = handler.subscribe("brake_pedal_actual", deadband=1.0)
+    handler.handle_messages([brake_frame(10.0, 1.0), brake_frame(10.5, 1.1), brake_frame(12.0, 1.2)])
+    events = drain(subscription)
+    # 10.5 在死区内, 12.0 与上一次通知的 10.0 比较
+    assert [(event.value, event.previous) for event in events] == pytest.approx([(10.0, None), (12.0, 10.0)])
+    assert events[0].name == "brake_pedal_actual"
+
+
+def test_status_field_notifies_once_per_batch(handler):
+    changes = []
+    handler.subscribe(["brake"], callback=changes.append)
+    handler.handle_messages([brake_frame(10.0, 1.0), brake_frame(20.0, 1.1)])
+    # 状态快照每批发布一次, 只看到这一批处理完后的值
+    assert [change.value for change in changes] == [20.0]
+    handler.handle_messages([brake_frame(20.0, 1.2)])
+    assert len(changes) == 1
+    handler.handle_messages([brake_frame(30.0, 1.3)])
+    assert [(change.value, change.previous) for change in changes[1:]] == [(30.0, 20.0)]
+
+
+def test_unsubscribe(handler):
+    subscription = handler.subscribe("brake_pedal_actual")
+    handler.handle_messages([brake_frame(10.0, 1.0)])
+    subscription.unsubscribe()
+    handler.handle_messages([brake_frame(20.0, 1.1)])
+    assert len(drain(subscription)) == 1
+    assert handler.signal_watcher.frame_watches == {}
+
+
+def test_per_signal_deadband(handler):
+    subscription = handler.subscribe(["brake_pedal_actual", "brake_en_state"], deadband={"brake_pedal_actual": 5.0})
+    handler.handle_messages([brake_frame(10.0, 1.0), brake_frame(12.0, 1.1)])
+    assert [event.name for event in drain(subscription)] == ["brake_pedal_actual", "brake_en_state"]
+
+
+def test_resolve_names():
+    watcher = SignalWatcher(LMT_REPORT_FRAMES)
+    with pytest.raises(KeyError):
+        watcher.resolve("cur_fb")
+    with pytest.raises(KeyError):
+        watcher.resolve("no_such_signal")
+    assert watcher.resolve("0x620.cur_fb") == (0x620, 0)
+    assert watcher.resolve("0x621.CUR_FB") == (0x621, 0)
+    assert watcher.resolve("speed")[0] == "status"
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+from vehicle.timebase import TimeBase
+
+
+class FakeClock(object):
+    def __init__(self, start=5000.0):
+        self.time = start
+
+    def __call__(self):
+        return self.time
+
+
+def test_missing_driver_timestamp_uses_now():
+    clock = FakeClock()
+    timebase = TimeBase(clock)
+    assert timebase.to_host(0.0) == clock.time
+    assert timebase.to_host(None) == clock.time
+
+
+def test_mapping_never_later_than_arrival():
+    clock = FakeClock()
+    timebase = TimeBase(clock, sample_interval=0.0)
+    rng = random.Random(0)
+    for i in range(2000):
+        driver = 10.0 + i * 0.001
+        # 到达时刻 = 驱动时间 + 固定偏移 + 随机排队延迟
+        clock.time = driver + 4990.0 + rng.uniform(0.0002, 0.002)
+        assert timebase.to_host(driver) <= clock.time + 1e-12
+
+
+def test_drift_is_estimated():
+    clock = FakeClock()
+    timebase = TimeBase(clock, sample_interval=0.01, window=1.0)
+    rng = random.Random(1)
+    drift = 100e-6
+    for i in range(40000):
+        driver = i * 0.001
+        clock.time = 5000.0 + driver * (1 + drift) + rng.uniform(0.0001, 0.001)
+        mapped = timebase.to_host(driver)
+    assert timebase.drift == pytest.approx(drift, abs=5e-6)
+    # 映射误差只剩最小排队延迟量级, 不随运行时间累积
+    assert 5000.0 + driver * (1 + drift) - mapped == pytest.approx(0.0, abs=0.001)
+
+
+def test_forward_jump_resets_model():
+    clock = FakeClock()
+    timebase = TimeBase(clock)
+    clock.time = 5000.0
+    timebase.to_host(1.0)
+    clock.time = 5000.1
+    assert timebase.to_host(500.0) == pytest.approx(5000.1)
+
+
+def test_backward_jump_resets_model():
+    # 设备重开或从 PCAN 切换到虚拟总线: 驱动时钟回到 0 附近
+    clock = FakeClock()
+    timebase = TimeBase(clock)
+    timebase.to_host(1000.0)
+    clock.time = 5000.1
+    assert timebase.to_host(0.5) == pytest.approx(5000.1)
+    clock.time = 5000.2
+    assert timebase.to_host(0.6) == pytest.approx(5000.2)
+
+
+def test_small_reordering_keeps_model():
+    clock = FakeClock()
+    timebase = TimeBase(clock, sample_interval=0.01)
+    timebase.to_host(100.0)
+    offset = timebase.offset
+    clock.time += 0.005
+    timebase.to_host(99.999)
+    assert timebase.offset == offset
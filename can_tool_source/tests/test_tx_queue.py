@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import can
+
+from vehicle.tx_queue import TxMailbox
+
+
+def command(frame_id, value=0):
+    return can.Message(arbitration_id=frame_id, is_extended_id=False, data=bytearray([value] * 8))
+
+
+class FlakyBus(object):
+    """
+    前 capacity 帧发送成功, 之后模拟驱动发送队列已满。
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.sent = []
+
+    def send(self, msg, timeout=None):
+        if len(self.sent) >= self.capacity:
+            raise can.CanOperationError("transmit buffer full")
+        self.sent.append((msg.arbitration_id, msg.data[0]))
+
+
+def test_latest_wins():
+    mailbox = TxMailbox()
+    mailbox.put(command(0x100, 1))
+    mailbox.put(command(0x101, 1))
+    mailbox.put(command(0x100, 2))
+    assert len(mailbox) == 2
+    assert mailbox.coalesced == 1
+    bus = FlakyBus(10)
+    assert mailbox.drain(bus.send) == 2
+    # 替换不改变入队顺序
+    assert bus.sent == [(0x100, 2), (0x101, 1)]
+    assert mailbox.pop() is None
+
+
+def test_priority_order():
+    mailbox = TxMailbox({0x200: 0, 0x300: 2})
+    for frame_id in (0x300, 0x100, 0x200, 0x101):
+        mailbox.put(command(frame_id))
+    assert [mailbox.pop().arbitration_id for _ in range(4)] == [0x200, 0x100, 0x101, 0x300]
+
+
+def test_full_mailbox_evicts_lower_priority():
+    mailbox = TxMailbox({0x200: 0, 0x300: 2}, max_pending=2)
+    assert mailbox.put(command(0x300))
+    assert mailbox.put(command(0x100))
+    # 更高优先级挤掉最低优先级的报文
+    assert mailbox.put(command(0x200))
+    # 同优先级或更低优先级在信箱满时被丢弃
+    assert not mailbox.put(command(0x101))
+    assert not mailbox.put(command(0x300))
+    assert mailbox.dropped == 3
+    assert [mailbox.pop().arbitration_id for _ in range(2)] == [0x200, 0x100]
+
+
+def test_busy_driver_keeps_latest_for_next_drain():
+    mailbox = TxMailbox({0x200: 0})
+    for frame_id in (0x100, 0x200, 0x101):
+        mailbox.put(command(frame_id, 1))
+    bus = FlakyBus(1)
+    assert mailbox.drain(bus.send) == 1
+    assert mailbox.send_errors == 1 and len(mailbox) == 2
+    # 拥塞期间到来的新报文覆盖未发出的旧报文, 并保持在队首
+    mailbox.put(command(0x100, 2))
+    bus.capacity = 10
+    assert mailbox.drain(bus.send) == 2
+    assert bus.sent == [(0x200, 1), (0x100, 2), (0x101, 1)]
+    assert mailbox.summary() == {"pending": 0, "sent": 3, "coalesced": 1, "dropped": 0, "send_errors": 1}
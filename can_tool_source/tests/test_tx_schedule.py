@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+
+import can
+
+from vehicle.tx_schedule import MultiRateSchedule
+
+RATES = {0x101: 0.01, 0x102: 0.02, 0x103: 0.02, 0x104: 0.04, 0x105: 0.04}
+
+
+def command(frame_id, value=0):
+    return can.Message(arbitration_id=frame_id, is_extended_id=False, data=bytearray([value] * 8))
+
+
+def run(schedule, messages, ticks):
+    return [[msg.arbitration_id for msg in schedule.due(messages)] for _ in range(ticks)]
+
+
+def test_tick_is_gcd_of_periods():
+    assert MultiRateSchedule(RATES).tick == 0.01
+    assert MultiRateSchedule({1: 0.02, 2: 0.05}).tick == 0.01
+    assert MultiRateSchedule({1: 0.0002}).tick == 0.001
+
+
+def test_phases_spread_load():
+    schedule = MultiRateSchedule(RATES)
+    messages = [command(frame_id) for frame_id in RATES]
+    run(schedule, messages, 4)  # 第一个节拍所有报文都视为已变化, 跳过首个超周期
+    ticks = run(schedule, messages, 8)
+    # 每个 ID 按各自周期发送
+    counts = Counter(frame_id for tick in ticks for frame_id in tick)
+    assert counts == {0x101: 8, 0x102: 4, 0x103: 4, 0x104: 2, 0x105: 2}
+    # 相位错开: 同周期的 ID 不在同一节拍发送, 每节拍最多 3 帧 (全部同相位时为 5 帧)
+    assert max(len(tick) for tick in ticks) == 3
+    for tick in ticks:
+        assert not {0x102, 0x103} <= set(tick)
+        assert not {0x104, 0x105} <= set(tick)
+    # 首个节拍不在相位 0 的 ID 因"已变化"提前发送
+    assert schedule.sent_on_change == 2
+
+
+def test_send_on_change_then_keepalive():
+    schedule = MultiRateSchedule({0x101: 0.01, 0x104: 0.04})
+    run(schedule, [command(0x101), command(0x104)], 5)
+    scheduled = schedule.sent_scheduled
+    # payload 变化在下一个节拍立即发送, 之后按原周期刷新
+    ticks = run(schedule, [command(0x101), command(0x104, 1)], 8)
+    assert [0x104 in tick for tick in ticks] == [True, False, False, True, False, False, False, True]
+    assert schedule.sent_on_change == 1
+    assert schedule.sent_scheduled == scheduled + 8 + 2
+
+
+def test_unscheduled_ids_sent_every_tick():
+    schedule = MultiRateSchedule({0x104: 0.04})
+    ticks = run(schedule, [command(0x7FF)], 3)
+    assert ticks == [[0x7FF]] * 3
+
+
+def test_reset_resends_everything():
+    schedule = MultiRateSchedule({0x101: 0.01, 0x104: 0.04})
+    messages = [command(0x101), command(0x104)]
+    run(schedule, messages, 2)
+    schedule.reset()
+    assert sorted(run(schedule, messages, 1)[0]) == [0x101, 0x104]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import math
+
+import can
+import pytest
+
+from vehicle.hooke2 import HOOKE2_REPORT_DECODERS, HOOKE2CanReportHandler
+from vehicle.signal_table import FrameEncoder
+from vehicle.ultrasonic import UltrasonicBuffer
+
+SECTORS = {"front": (0, 1), "rear": (2, 3)}
+
+
+class FakeClock(object):
+    def __init__(self, start=100.0):
+        self.time = start
+
+    def __call__(self):
+        return self.time
+
+
+def test_empty_buffer_has_no_obstacle():
+    buffer = UltrasonicBuffer(SECTORS, sensor_count=4)
+    assert buffer.nearest_obstacle("front") == math.inf
+    assert not buffer.obstacle_within(50.0)
+    assert buffer.history(0) == []
+
+
+def test_window_minimum_and_sector_nearest():
+    buffer = UltrasonicBuffer(SECTORS, sensor_count=4, depth=4, window=2)
+    buffer.update((0, 1), (80.0, 120.0), 1.0)
+    buffer.update((0, 1), (90.0, 60.0), 1.1)
+    # 窗口 2: 探头 0 = min(80, 90), 探头 1 = min(120, 60)
+    assert list(buffer.filtered_direct[:2]) == [80.0, 60.0]
+    assert buffer.nearest_obstacle("front") == 60.0
+    buffer.update((0, 1), (95.0, 100.0), 1.2)
+    buffer.update((0, 1), (97.0, 110.0), 1.3)
+    # 60 已移出窗口
+    assert buffer.nearest_obstacle("front") == 95.0
+    assert buffer.nearest_obstacle("rear") == math.inf
+    assert buffer.obstacle_within(96.0, ["front"])
+    assert not buffer.obstacle_within(96.0, ["rear"])
+
+
+def test_ring_keeps_last_depth_samples():
+    buffer = UltrasonicBuffer(SECTORS, sensor_count=4, depth=3, window=1)
+    for i in range(5):
+        buffer.update((2,), (float(i),), i)
+    assert buffer.history(2) == [2.0, 3.0, 4.0]
+    assert buffer.nearest_obstacle("rear") == 4.0
+
+
+def test_indirect_echo_does_not_change_nearest():
+    buffer = UltrasonicBuffer(SECTORS, sensor_count=4)
+    buffer.update((0, 1), (10.0, 10.0), 1.0, indirect=True)
+    assert buffer.nearest_obstacle("front") == math.inf
+    assert buffer.history(0, indirect=True) == [10.0]
+
+
+def test_stale_sector_counts_as_obstacle():
+    clock = FakeClock(100.0)
+    buffer = UltrasonicBuffer(SECTORS, sensor_count=4, clock=clock)
+    buffer.update((0, 1), (200.0, 200.0), 100.0)
+    buffer.update((2, 3), (200.0, 200.0), 100.0)
+    assert not buffer.obstacle_within(100.0, max_age=0.5)
+    clock.time = 100.4
+    buffer.update((2, 3), (200.0, 200.0), 100.4)
+    clock.time = 100.7
+    # front 超过 0.5 s 未更新, 保守地视为有障碍物; rear 仍然有效
+    assert buffer.obstacle_within(100.0, max_age=0.5)
+    assert buffer.obstacle_within(100.0, ["front"], max_age=0.5)
+    assert not buffer.obstacle_within(100.0, ["rear"], max_age=0.5)
+    # 显式传入 now 时不读时钟
+    assert not buffer.obstacle_within(100.0, max_age=0.5, now=100.2)
+
+
+def test_invalid_window():
+    with pytest.raises(ValueError):
+        UltrasonicBuffer(SECTORS, depth=4, window=5)
+
+
+def test_handler_stale_check_uses_its_timebase():
+    handler = HOOKE2CanReportHandler(logging.getLogger("test"))
+    encoder = FrameEncoder(0x509, HOOKE2_REPORT_DECODERS[0x509].name, HOOKE2_REPORT_DECODERS[0x509].signals)
+    handler.handle_messages([can.Message(arbitration_id=0x509, data=encoder.encode((150.0,) * 4))])
+    assert handler.nearest_obstacle("front") == pytest.approx(150.0, abs=1.0)
+    assert not handler.ultrasonic.obstacle_within(100.0, ["front"], max_age=0.5)
+    assert handler.ultrasonic.obstacle_within(100.0, ["rear"], max_age=0.5)
+    handler.ultrasonic.clear()
+    assert handler.nearest_obstacle("front") == math.inf
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from vehicle.hooke2 import HOOKE2_REPORT_FRAMES
+from vehicle.lmt import LMT_REPORT_FRAMES
+from vehicle.signal_table import lsb_shift
+
+# 离线分析默认解码全部 Hooke2 + LMT 反馈报文
+REPORT_FRAMES = {**HOOKE2_REPORT_FRAMES, **LMT_REPORT_FRAMES}
+
+
+def _signal_column(words, signal):
+    """
+    从 64 位整数数组中取出一个信号并转换为物理值。
+    """
+    raw = (words >> np.uint64(lsb_shift(signal))) & np.uint64((1 << signal.length) - 1)
+    raw = raw.astype(np.int64)
+    if signal.signed:
+        sign = 1 << (signal.length - 1)
+        raw = (raw ^ sign) - sign
+    if signal.scale == 1 and signal.offset == 0:
+        return raw
+    return raw * float(signal.scale) + float(signal.offset)
+
+
+def as_frame_array(data):
+    """
+    将 (N, dlc) 的数据转换为连续的 (N, 8) uint8 数组, 不足 8 字节补零。
+    """
+    data = np.asarray(data, dtype=np.uint8)
+    if data.ndim != 2:
+        raise ValueError(f"data must be a (N, 8) array, got shape {data.shape}")
+    if data.shape[1] < 8:
+        data = np.pad(data, ((0, 0), (0, 8 - data.shape[1])))
+    return np.ascontiguousarray(data[:, :8])
+
+
+def decode_batch(timestamps, arbitration_ids, data, frames=None):
+    """
+    批量解码录制的 CAN 帧。
+    :param timestamps: (N,) 时间戳
+    :param arbitration_ids: (N,) 报文 ID
+    :param data: (N, 8) uint8 数据
+    :param frames: 信号表 {frame_id: (name, signals)}, 默认为全部 Hooke2 + LMT 反馈报文
+    :return: {frame_id: {"timestamp": 列, 信号名: 列, ...}}, 只包含出现过的 ID;
+             位定义与 HOOKE2CanReportHandler / LMTCanReportHandler 使用的信号表一致
+    """
+    frames = REPORT_FRAMES if frames is None else frames
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    arbitration_ids = np.asarray(arbitration_ids)
+    data = as_frame_array(data)
+
+    # 按 ID 稳定排序, 每个 ID 的帧在排序后是连续的一段, 保持时间顺序
+    order = np.argsort(arbitration_ids, kind="stable")
+    sorted_ids = arbitration_ids[order]
+    be_words = data.view(">u8").ravel().astype(np.uint64)
+    le_words = None
+
+    columns = {}
+    for frame_id, (_, signals) in frames.items():
+        start, end = np.searchsorted(sorted_ids, [frame_id, frame_id + 1])
+        if start == end:
+            continue
+        rows = order[start:end]
+        be = be_words[rows]
+        le = None
+        if any(signal.byte_order == "little" for signal in signals):
+            if le_words is None:
+                le_words = data.view("<u8").ravel().astype(np.uint64)
+            le = le_words[rows]
+
+        frame_columns = {"timestamp": timestamps[rows]}
+        for signal in signals:
+            words = le if signal.byte_order == "little" else be
+            frame_columns[signal.name] = _signal_column(words, signal)
+        columns[frame_id] = frame_columns
+    return columns
+
+
+def messages_to_arrays(messages):
+    """
+    将 can.Message 序列 (例如 can.LogReader) 转换为 decode_batch 的输入数组。
+    """
+    timestamps = []
+    arbitration_ids = []
+    payload = bytearray()
+    for msg in messages:
+        timestamps.append(msg.timestamp)
+        arbitration_ids.append(msg.arbitration_id)
+        payload += bytes(msg.data[:8]).ljust(8, b"\x00")
+    data = np.frombuffer(bytes(payload), dtype=np.uint8).reshape(-1, 8)
+    return (
+        np.asarray(timestamps, dtype=np.float64),
+        np.asarray(arbitration_ids, dtype=np.uint32),
+        data,
+    )
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+STANDARD_ID_MASK = 0x7FF
+EXTENDED_ID_MASK = 0x1FFFFFFF
+
+
+def build_filters(frame_ids, max_filters=None, extended=False):
+    """
+    由报文 ID 表计算 id/mask 接收过滤器 (python-can set_filters 格式)。
+    先把只差一位的过滤器两两合并 (合并后接收的 ID 集合不变), 直到不能再合并;
+    硬件过滤器个数有限时 (max_filters), 再合并多接收 ID 最少的两个过滤器,
+    多收的帧由解码分发表丢弃。
+    :return: [{"can_id": ..., "can_mask": ..., "extended": ...}]
+    """
+    full_mask = EXTENDED_ID_MASK if extended else STANDARD_ID_MASK
+    filters = {(frame_id & full_mask, full_mask) for frame_id in frame_ids}
+
+    merged = True
+    while merged:
+        merged = False
+        for code, mask in sorted(filters):
+            for bit in _bits(mask):
+                other = (code ^ bit, mask)
+                if other in filters:
+                    filters -= {(code, mask), other}
+                    filters.add((code & ~bit, mask & ~bit))
+                    merged = True
+                    break
+            if merged:
+                break
+
+    if max_filters is not None:
+        while len(filters) > max(max_filters, 1):
+            first, second = min(
+                ((a, b) for a in filters for b in filters if a < b),
+                key=lambda pair: _accepted(_merge(pair[0], pair[1], full_mask), full_mask),
+            )
+            filters -= {first, second}
+            filters.add(_merge(first, second, full_mask))
+
+    return [
+        {"can_id": code, "can_mask": mask, "extended": extended}
+        for code, mask in sorted(filters)
+    ]
+
+
+def accepted_ids(filters):
+    """
+    过滤器接收的 ID 个数 (用于评估合并后多收的帧)。
+    """
+    full_mask = STANDARD_ID_MASK
+    if any(f.get("extended") for f in filters):
+        full_mask = EXTENDED_ID_MASK
+    return sum(_accepted((f["can_id"], f["can_mask"]), full_mask) for f in filters)
+
+
+def _bits(mask):
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
+def _merge(first, second, full_mask):
+    mask = first[1] & second[1] & ~(first[0] ^ second[0]) & full_mask
+    return first[0] & mask, mask
+
+
+def _accepted(item, full_mask):
+    return 1 << bin(~item[1] & full_mask).count("1")
+
+
+def apply_filters(bus, frame_ids, log=None):
+    """
+    按 ID 表设置接收过滤器。
+    SocketCAN 等接口在内核/驱动中过滤; PCAN 在 python-can 中只做软件过滤,
+    因此额外把 PCAN 硬件接收范围收窄到 [最小 ID, 最大 ID]。
+    :return: 设置的过滤器
+    """
+    frame_ids = sorted(frame_ids)
+    filters = build_filters(frame_ids)
+    bus.set_filters(filters)
+    if frame_ids and _is_pcan(bus):
+        _set_pcan_range(bus, frame_ids[0], frame_ids[-1], log)
+    return filters
+
+
+def clear_filters(bus, log=None):
+    """
+    取消过滤, 接收总线上的全部报文。
+    """
+    bus.set_filters(None)
+    if _is_pcan(bus):
+        _set_pcan_range(bus, None, None, log)
+
+
+def _is_pcan(bus):
+    return hasattr(bus, "m_objPCANBasic") and hasattr(bus, "m_PcanHandle")
+
+
+def _set_pcan_range(bus, low, high, log):
+    from can.interfaces.pcan.basic import (
+        PCAN_ERROR_OK,
+        PCAN_FILTER_CLOSE,
+        PCAN_FILTER_OPEN,
+        PCAN_MESSAGE_FILTER,
+        PCAN_MODE_STANDARD,
+    )
+
+    basic = bus.m_objPCANBasic
+    handle = bus.m_PcanHandle
+    if low is None:
+        result = basic.SetValue(handle, PCAN_MESSAGE_FILTER, PCAN_FILTER_OPEN)
+    else:
+        # 先关闭再设置, 否则 FilterMessages 会在原有范围上扩大
+        result = basic.SetValue(handle, PCAN_MESSAGE_FILTER, PCAN_FILTER_CLOSE)
+        if result == PCAN_ERROR_OK:
+            result = basic.FilterMessages(handle, low, high, PCAN_MODE_STANDARD)
+    if result != PCAN_ERROR_OK and log is not None:
+        log.error(f"set PCAN acceptance range failed: {bus._get_formatted_error(result)}")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import can
+
+from vehicle.timebase import DEFAULT_TIMEBASE
+from vehicle.trace import NULL_TRACER, TRACE_TX
+
+
+class CommandMessageCache(object):
+    """
+    控制报文的预分配 can.Message, Hooke2/LMT 控制处理类共用。
+    每个 ID 一个 can.Message, 编码结果直接写入其 data, 发送线程复用同一对象;
+    物理值与上一次相同时跳过编码, 只更新时间戳。
+    """
+
+    def __init__(self, encoders, frame_ids, tracer=None, timebase=None):
+        """
+        :param encoders: {frame_id: encode(values, data)}
+        """
+        self.encoders = encoders
+        self.tracer = tracer or NULL_TRACER
+        self.timebase = timebase or DEFAULT_TIMEBASE
+        self.messages = {
+            frame_id: can.Message(arbitration_id=frame_id, data=bytearray(8), is_extended_id=False)
+            for frame_id in frame_ids
+        }
+        # 上一次编码的物理值
+        self._values = dict.fromkeys(frame_ids)
+
+    def encode(self, frame_id, values):
+        """
+        编码控制报文到预分配的 can.Message, 开启追踪时记录编码前的物理值。
+        """
+        now = self.timebase.now()
+        if self.tracer.enabled:
+            self.tracer.emit(frame_id, TRACE_TX, now, values)
+        msg = self.messages[frame_id]
+        if values != self._values[frame_id]:
+            # 切片赋值是一次原子操作, 发送线程不会读到写了一半的 payload
+            self.encoders[frame_id](values, msg.data)
+            self._values[frame_id] = values
+        msg.timestamp = now
+        return msg
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+DBC 文件导入: 解析 DBC, 生成编解码 Python 模块并按 DBC 哈希缓存到磁盘。
+
+生成的模块包含:
+    FRAMES:    {frame_id: (name, dlc, signal_names)}
+    DECODERS:  {frame_id: decode(data) -> tuple}
+    ENCODERS:  {frame_id: encode(values, data=None) -> bytearray}
+    decode_message(frame_id, data) -> {signal_name: value}
+
+缓存文件为普通 .py 模块, 再次启动时直接 import (由 Python 复用 __pycache__ 中的字节码),
+不会重新解析 DBC。
+"""
+
+import hashlib
+import importlib.util
+import os
+import re
+import threading
+
+from vehicle.signal_table import Signal, frame_size, lsb_shift
+
+# 代码生成格式版本, 修改生成逻辑时递增以废弃旧缓存
+CODEGEN_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "can_tool", "dbc")
+
+_BO_RE = re.compile(r"^BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)")
+_SG_RE = re.compile(
+    r"^SG_\s+(\w+)\s*(\w*)\s*:\s*(\d+)\|(\d+)@([01])([+-])\s*"
+    r"\(([^,]+),([^)]+)\)\s*\[([^|]*)\|([^\]]*)\]\s*\"([^\"]*)\""
+)
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def parse_dbc(text):
+    """
+    解析 DBC 文本, 返回 {frame_id: (name, dlc, signals)}。
+    暂不支持多路复用信号 (mN), 这类信号会被忽略。
+    """
+    frames = {}
+    current = None
+    for line in text.splitlines():
+        line = line.strip()
+        match = _BO_RE.match(line)
+        if match:
+            frame_id = int(match.group(1)) & 0x1FFFFFFF
+            current = []
+            frames[frame_id] = (match.group(2), int(match.group(3)), current)
+            continue
+        match = _SG_RE.match(line)
+        if match and current is not None:
+            (name, mux, start, length, order, sign,
+             scale, offset, minimum, maximum, unit) = match.groups()
+            if mux.startswith("m") and mux != "M":
+                continue
+            minimum, maximum = float(minimum), float(maximum)
+            if minimum == maximum:
+                # DBC 中 [0|0] 表示未限定范围
+                minimum = maximum = None
+            current.append(Signal(
+                name,
+                int(start),
+                int(length),
+                signed=(sign == "-"),
+                scale=_number(scale),
+                offset=_number(offset),
+                unit=unit,
+                byte_order="little" if order == "1" else "big",
+                minimum=minimum,
+                maximum=maximum,
+            ))
+        elif line and not line.startswith("SG_"):
+            current = None
+    return {frame_id: (name, dlc, tuple(signals)) for frame_id, (name, dlc, signals) in frames.items()}
+
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def apply_layout(frames, layout):
+    """
+    按内置信号表 layout ({frame_id: (name, signals)}) 调整信号顺序, 使生成的解码函数
+    与手写处理函数的元组顺序一致。信号名按不区分大小写匹配;
+    DBC 中缺少的报文回退到内置定义, 报文存在但缺少信号时抛出 ValueError。
+    """
+    result = dict(frames)
+    for frame_id, (name, signals) in layout.items():
+        if frame_id not in frames:
+            result[frame_id] = (name, max(8, frame_size(signals)), tuple(signals))
+            continue
+        dbc_name, dlc, dbc_signals = frames[frame_id]
+        by_name = {signal.name.lower(): signal for signal in dbc_signals}
+        ordered = []
+        for signal in signals:
+            found = by_name.get(signal.name.lower())
+            if found is None:
+                raise ValueError(f"DBC frame 0x{frame_id:03X} ({dbc_name}) has no signal '{signal.name}'")
+            ordered.append(found._replace(name=signal.name))
+        result[frame_id] = (dbc_name, dlc, tuple(ordered))
+    return result
+
+
+def _scaled(raw, signal):
+    expr = raw
+    if signal.scale != 1:
+        expr = f"{expr} * {signal.scale!r}"
+    if signal.offset != 0:
+        expr = f"{expr} + {signal.offset!r}"
+    return expr
+
+
+def _decode_expr(signal):
+    word = "le" if signal.byte_order == "little" else "be"
+    shift = lsb_shift(signal)
+    mask = (1 << signal.length) - 1
+    raw = f"({word} >> {shift}) & {mask:#x}" if shift else f"{word} & {mask:#x}"
+    if signal.signed:
+        sign = 1 << (signal.length - 1)
+        raw = f"((({raw}) ^ {sign:#x}) - {sign:#x})"
+    elif signal.scale != 1 or signal.offset != 0:
+        raw = f"({raw})"
+    return _scaled(raw, signal)
+
+
+def _encode_lines(index, signal):
+    value = f"v{index}"
+    lines = []
+    if signal.minimum is not None:
+        lines.append(f"    if {value} < {signal.minimum!r}: {value} = {signal.minimum!r}")
+    if signal.maximum is not None:
+        lines.append(f"    if {value} > {signal.maximum!r}: {value} = {signal.maximum!r}")
+    raw = value
+    if signal.offset != 0:
+        raw = f"({raw} - {signal.offset!r})"
+    raw = f"int({raw} / {signal.scale!r})" if signal.scale != 1 else f"int({raw})"
+    shift = lsb_shift(signal)
+    mask = (1 << signal.length) - 1
+    word = "le" if signal.byte_order == "little" else "be"
+    lines.append(f"    {word} |= ({raw} & {mask:#x}) << {shift}")
+    return lines
+
+
+def generate_codec_source(frames, source_hash=""):
+    """
+    根据 {frame_id: (name, dlc, signals)} 生成编解码模块源码。
+    """
+    out = [
+        "# -*- coding: utf-8 -*-",
+        f"# Generated by vehicle.dbc (codegen v{CODEGEN_VERSION}), source sha1 {source_hash}",
+        "# Do not edit: regenerated whenever the DBC changes.",
+        "",
+        "import struct",
+        "",
+        "_BE = struct.Struct('>Q')",
+        "_LE = struct.Struct('<Q')",
+        "",
+    ]
+    for frame_id, (name, dlc, signals) in sorted(frames.items()):
+        if not signals:
+            continue
+        dlc = max(dlc, frame_size(signals))
+        little = any(signal.byte_order == "little" for signal in signals)
+        big = any(signal.byte_order != "little" for signal in signals)
+
+        out.append(f"def decode_{frame_id:#05x}(data, _be=_BE.unpack_from, _le=_LE.unpack_from):")
+        out.append(f'    """{name} (0x{frame_id:03X})"""')
+        out.append("    if len(data) < 8:")
+        out.append("        data = bytes(data).ljust(8, b'\\x00')")
+        if big:
+            out.append("    be = _be(data)[0]")
+        if little:
+            out.append("    le = _le(data)[0]")
+        out.append("    return (")
+        for signal in signals:
+            out.append(f"        {_decode_expr(signal)},")
+        out.append("    )")
+        out.append("")
+
+        out.append(f"def encode_{frame_id:#05x}(values, data=None):")
+        out.append(f'    """{name} (0x{frame_id:03X})"""')
+        names = ", ".join(f"v{i}" for i in range(len(signals)))
+        out.append(f"    {names}, = values")
+        out.append("    be = 0")
+        out.append("    le = 0")
+        for i, signal in enumerate(signals):
+            out.extend(_encode_lines(i, signal))
+        out.append("    if le:")
+        out.append("        be |= int.from_bytes(le.to_bytes(8, 'little'), 'big')")
+        out.append("    if data is None:")
+        out.append(f"        data = bytearray({dlc})")
+        out.append(f"    data[:{dlc}] = be.to_bytes(8, 'big')[:{dlc}]")
+        out.append("    return data")
+        out.append("")
+
+    out.append("FRAMES = {")
+    for frame_id, (name, dlc, signals) in sorted(frames.items()):
+        if signals:
+            names = tuple(signal.name for signal in signals)
+            out.append(f"    {frame_id:#05x}: ({name!r}, {max(dlc, frame_size(signals))}, {names!r}),")
+    out.append("}")
+    out.append("DECODERS = {frame_id: globals()[f'decode_{frame_id:#05x}'] for frame_id in FRAMES}")
+    out.append("ENCODERS = {frame_id: globals()[f'encode_{frame_id:#05x}'] for frame_id in FRAMES}")
+    out.append("")
+    out.append("")
+    out.append("def decode_message(frame_id, data):")
+    out.append("    decode = DECODERS.get(frame_id)")
+    out.append("    if decode is None:")
+    out.append("        return None")
+    out.append("    return dict(zip(FRAMES[frame_id][2], decode(data)))")
+    out.append("")
+    return "\n".join(out)
+
+
+def _layout_digest(layout):
+    if not layout:
+        return ""
+    return repr(sorted((frame_id, tuple(signals)) for frame_id, (_, signals) in layout.items()))
+
+
+def load_dbc(path, layout=None, cache_dir=None):
+    """
+    加载 DBC 对应的编解码模块。
+    缓存键 = sha1(生成器版本 + DBC 内容 + layout), 命中时不重新解析 DBC。
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    digest = hashlib.sha1()
+    digest.update(f"v{CODEGEN_VERSION}\n".encode())
+    digest.update(content)
+    digest.update(_layout_digest(layout).encode())
+    key = digest.hexdigest()
+
+    with _loaded_lock:
+        module = _loaded.get(key)
+        if module is not None:
+            return module
+
+        cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        module_path = os.path.join(cache_dir, f"dbc_{key}.py")
+        if not os.path.exists(module_path):
+            frames = parse_dbc(content.decode("latin-1"))
+            if layout:
+                frames = apply_layout(frames, layout)
+            source = generate_codec_source(frames, hashlib.sha1(content).hexdigest())
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{module_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(source)
+            os.replace(tmp_path, module_path)
+
+        spec = importlib.util.spec_from_file_location(f"_dbc_codec_{key}", module_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded[key] = module
+        return module
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import math
+import threading
+from collections import deque
+from itertools import islice
+
+
+class FrameRing(object):
+    """
+    监视窗口使用的定长帧缓冲区。
+    收发线程按批写入帧的副本 (时间戳, ID, 扩展帧, DLC, 数据), 缓冲区满后最早的帧被挤出,
+    内存占用固定; 界面线程按绝对序号读取需要显示的几行。
+
+    序号: 自上次 clear() 以来第 n 个写入的帧序号为 n (从 0 开始),
+    缓冲区中保存的是 [first, total) 区间的帧, first 之前的帧已被挤出 (evicted)。
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self._frames = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def extend(self, msgs):
+        """
+        写入一批 can.Message; 保存数据副本, 调用方之后原地修改报文不影响显示。
+        """
+        frames = [
+            (msg.timestamp, msg.arbitration_id, msg.is_extended_id, msg.dlc, bytes(msg.data))
+            for msg in msgs
+        ]
+        with self._lock:
+            self._frames.extend(frames)
+            self.total += len(frames)
+
+    @property
+    def first(self):
+        """
+        缓冲区中最早一帧的序号。
+        """
+        return self.total - len(self._frames)
+
+    @property
+    def evicted(self):
+        """
+        已被挤出缓冲区、无法再显示的帧数。
+        """
+        return self.first
+
+    def window(self, start, rows):
+        """
+        返回序号 start 开始的最多 rows 帧 (start 早于 first 时从 first 开始)。
+        """
+        with self._lock:
+            offset = max(0, start - (self.total - len(self._frames)))
+            return list(islice(self._frames, offset, offset + rows))
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.total = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+
+def format_frame(frame):
+    """
+    格式化 FrameRing 中的一帧。
+    """
+    timestamp, frame_id, extended, dlc, data = frame
+    frame_id = f"{frame_id:08X}" if extended else f"{frame_id:03X}"
+    return f"{timestamp or 0.0:14.6f}  ID: {frame_id}  DL: {dlc}  {data.hex(' ')}"
+
+
+class IdStats(object):
+    """
+    单个报文 ID 的聚合统计。
+    """
+
+    __slots__ = ("frame_id", "extended", "count", "first", "last", "dlc", "data", "min_interval", "max_interval")
+
+    def __init__(self, msg):
+        self.frame_id = msg.arbitration_id
+        self.extended = msg.is_extended_id
+        self.count = 1
+        self.first = msg.timestamp
+        self.last = msg.timestamp
+        self.dlc = msg.dlc
+        self.data = bytes(msg.data)
+        self.min_interval = math.inf
+        self.max_interval = -math.inf
+
+    @property
+    def period(self):
+        """
+        平均周期 (秒), 少于两帧时为 None。
+        """
+        return (self.last - self.first) / (self.count - 1) if self.count > 1 else None
+
+
+class FrameIdTable(object):
+    """
+    按报文 ID 聚合的接收统计: 最新数据、帧数、平均周期、最小/最大间隔。
+    每帧只做几次比较和赋值, 大小只与 ID 个数有关, 与总线负载无关;
+    由 RX 线程写入, 界面线程通过 rows() 读取。
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.version = 0
+
+    def update(self, msgs):
+        entries = self._entries
+        for msg in msgs:
+            entry = entries.get(msg.arbitration_id)
+            if entry is None:
+                entries[msg.arbitration_id] = IdStats(msg)
+                continue
+            timestamp = msg.timestamp
+            interval = timestamp - entry.last
+            if interval < entry.min_interval:
+                entry.min_interval = interval
+            if interval > entry.max_interval:
+                entry.max_interval = interval
+            entry.last = timestamp
+            entry.count += 1
+            entry.dlc = msg.dlc
+            entry.data = bytes(msg.data)
+        self.version += 1
+
+    def rows(self):
+        """
+        按 ID 排序的 IdStats 列表。
+        """
+        entries = self._entries
+        return [entries[frame_id] for frame_id in sorted(entries)]
+
+    def clear(self):
+        self._entries = {}
+        self.version += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def format_id_stats(entry, signals=None):
+    """
+    格式化一行按 ID 聚合的统计; signals 为 [(信号名, 值), ...]。
+    周期和抖动单位为 ms, 抖动为最小/最大间隔相对平均周期的偏差。
+    """
+    frame_id = f"{entry.frame_id:08X}" if entry.extended else f"{entry.frame_id:03X}"
+    period = entry.period
+    if period is None:
+        timing = f"{'-':>8}    {'-':>15}"
+    else:
+        timing = (
+            f"{period * 1000:8.2f} ms "
+            f"{(entry.min_interval - period) * 1000:+7.2f}/{(entry.max_interval - period) * 1000:+7.2f}"
+        )
+    line = f"ID: {frame_id}  DL: {entry.dlc}  {entry.data.hex(' '):<23}  n={entry.count:<8d} {timing}"
+    if signals:
+        line += "  " + " ".join(f"{name}={value:g}" if isinstance(value, float) else f"{name}={value}"
+                                for name, value in signals)
+    return line
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import math
+from array import array
+
+
+class Histogram(object):
+    """
+    固定桶宽的增量直方图, 内存大小固定。
+    最后一个桶收集所有超出范围的值; 同时维护计数、均值、方差 (Welford)、最小值和最大值。
+    """
+
+    def __init__(self, bin_width, bin_count):
+        self.bin_width = bin_width
+        self.counts = array("Q", [0]) * (bin_count + 1)
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value):
+        index = int(value / self.bin_width)
+        if index < 0:
+            index = 0
+        elif index >= len(self.counts):
+            index = len(self.counts) - 1
+        self.counts[index] += 1
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    @property
+    def stddev(self):
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def percentile(self, p):
+        """
+        近似百分位数 (桶上沿), 没有数据时返回 None。
+        """
+        if not self.count:
+            return None
+        target = self.count * p / 100.0
+        total = 0
+        for index, count in enumerate(self.counts):
+            total += count
+            if total >= target:
+                return min((index + 1) * self.bin_width, self.maximum)
+        return self.maximum
+
+    def reset(self):
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+
+class SequenceTracker(object):
+    """
+    单个报文 ID 的滚动计数器跟踪和到达统计。
+
+    dropped:      计数器跳过的帧数, 说明帧在到达本机前就丢失了 (控制器未发出或总线/驱动丢帧)
+    duplicated:   计数器与上一帧相同
+    out_of_order: 计数器落后于上一帧 (迟到帧), 迟到帧会从 dropped 中扣除
+    interval:     驱动时间戳的到达间隔直方图, 反映控制器发送周期抖动
+    latency:      处理时刻 - 帧时间戳, 持续增大说明本机 RX 线程处理不过来
+    """
+
+    def __init__(self, modulus, bin_width=0.0005, bin_count=100):
+        self.modulus = modulus
+        self.received = 0
+        self.dropped = 0
+        self.duplicated = 0
+        self.out_of_order = 0
+        self.last_counter = None
+        self.last_timestamp = None
+        self.interval = Histogram(bin_width, bin_count)
+        self.latency = Histogram(bin_width, bin_count)
+
+    def update(self, counter, timestamp, now=None):
+        """
+        :param counter: 帧中的滚动计数器
+        :param timestamp: 帧时间戳 (主机单调时钟)
+        :param now: 处理时刻, 不为 None 时统计处理延迟
+        """
+        counter = int(counter)
+        self.received += 1
+        if now is not None:
+            self.latency.add(now - timestamp)
+
+        last = self.last_counter
+        if last is None:
+            self.last_counter = counter
+            self.last_timestamp = timestamp
+            return
+        step = (counter - last) % self.modulus
+        if step == 0:
+            self.duplicated += 1
+            return
+        if step > self.modulus // 2:
+            # 迟到帧: 之前按丢帧统计过, 这里扣回
+            self.out_of_order += 1
+            if self.dropped:
+                self.dropped -= 1
+            return
+        self.dropped += step - 1
+        self.interval.add(timestamp - self.last_timestamp)
+        self.last_counter = counter
+        self.last_timestamp = timestamp
+
+    @property
+    def loss_rate(self):
+        expected = self.received + self.dropped
+        return self.dropped / expected if expected else 0.0
+
+    def summary(self):
+        """
+        返回统计摘要 (时间单位: 秒)。
+        """
+        return {
+            "received": self.received,
+            "dropped": self.dropped,
+            "duplicated": self.duplicated,
+            "out_of_order": self.out_of_order,
+            "loss_rate": self.loss_rate,
+            "interval_mean": self.interval.mean,
+            "interval_jitter": self.interval.stddev,
+            "interval_max": self.interval.maximum if self.interval.count else None,
+            "interval_p99": self.interval.percentile(99),
+            "latency_mean": self.latency.mean,
+            "latency_p99": self.latency.percentile(99),
+        }
+
+    def reset(self):
+        self.received = 0
+        self.dropped = 0
+        self.duplicated = 0
+        self.out_of_order = 0
+        self.last_counter = None
+        self.last_timestamp = None
+        self.interval.reset()
+        self.latency.reset()
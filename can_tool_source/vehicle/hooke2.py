@@ -1,18 +1,211 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import struct
 import can
-import time
-from vehicle.vehicle_status import VehicleStatus
+from vehicle.vehicle_status import VehicleStatus, VehicleStatusPublisher
+from vehicle.signal_table import Signal, compile_frames, compile_encoders
+from vehicle.dbc import load_dbc
+from vehicle.command_cache import CommandMessageCache
+from vehicle.trace import NULL_TRACER, TRACE_RX
+from vehicle.timebase import DEFAULT_TIMEBASE
+from vehicle.signal_watch import SignalWatcher
+from vehicle.ultrasonic import UltrasonicBuffer
 
 HOOKE2_SEND_PERIOD = 0.02  # 发送周期，单位：秒
 
+# 控制报文按 ID 的发送周期 (秒): 制动/转向保持最高频率, 档位/驻车/模式很少变化, 变化时立即发送
+HOOKE2_TX_RATES = {
+    0x100: 0.02,  # throttle
+    0x101: 0.01,  # brake
+    0x102: 0.01,  # steering
+    0x103: 0.1,   # gear
+    0x104: 0.1,   # park
+    0x105: 0.1,   # vehicle mode
+}
+
+# 发送优先级 (数值越小越优先), 总线拥塞时制动/转向先发, 未列出的 ID 为默认优先级
+HOOKE2_TX_PRIORITIES = {
+    0x101: 0,  # brake
+    0x102: 0,  # steering
+}
+
+BRAKE_DEC = 0.25        # 制动减速度 (m/s^2), 固定值
+STEER_ANGLE_SPD = 250   # 转向速度 (deg/s), 固定值
+
+# 超声波距离比例 (cm/LSB)
+ULTRASONIC_SCALE = 0.017240
+
+TURN_LIGHT_STATES = {0: "None", 1: "Left", 2: "Right", 3: "Hazard"}
+DRIVING_MODES = {0: "MANUAL", 1: "AUTO", 2: "EMERGENCY", 3: "STANDBY"}
+GEAR_STATES = {1: "P", 2: "R", 3: "N", 4: "D"}
+
+
+# 超声波报文: ID -> (探头编号, 是否为间接回波)
+ULTRASONIC_REPORTS = {
+    0x507: ((8, 9, 10, 11), False),
+    0x508: ((8, 9, 10, 11), True),
+    0x509: ((2, 3, 4, 5), False),
+    0x510: ((2, 3, 4, 5), True),
+    0x511: ((0, 1, 6, 7), False),
+}
+
+# 最近障碍物查询的扇区划分, 默认按反馈报文分组, 需与实车探头安装位置一致
+ULTRASONIC_SECTORS = {
+    "front": (2, 3, 4, 5),
+    "rear": (8, 9, 10, 11),
+    "side": (0, 1, 6, 7),
+}
+
+
+def _ultrasonic_frame(name, sensors, indirect):
+    suffix = "indirect" if indirect else "direct"
+    return (name, tuple(
+        Signal(f"uiuss{sensor}_tof_{suffix}", 7 + 16 * i, 16, scale=ULTRASONIC_SCALE, unit="cm")
+        for i, sensor in enumerate(sensors)
+    ))
+
+
+def _vin_frame(name, first, count):
+    return (name, tuple(Signal(f"vin{first + i:02d}", 7 + 8 * i, 8) for i in range(count)))
+
+
+# Hooke2 反馈报文信号表 (start_bit 为 MSB 位置: 字节号 * 8 + 位号)
+HOOKE2_REPORT_FRAMES = {
+    0x500: ("Throttle Report", (
+        # 0: 'MANUAL', 1: 'AUTO', 2: 'TAKEOVER', 3: 'STANDBY'
+        Signal("throttle_en_state", 1, 2),
+        Signal("throttle_flt1_type", 15, 8),
+        Signal("throttle_flt2_type", 23, 8),
+        Signal("throttle_pedal_actual", 31, 16, scale=0.1, unit="%"),
+    )),
+    0x501: ("Brake Report", (
+        Signal("brake_en_state", 1, 2),
+        Signal("brake_flt1_type", 15, 8),
+        Signal("brake_flt2_type", 23, 8),
+        Signal("brake_pedal_actual", 31, 16, scale=0.1, unit="%"),
+    )),
+    0x502: ("Steering Report", (
+        Signal("steer_en_state", 1, 2),
+        Signal("steer_flt1_type", 15, 8),
+        Signal("steer_flt2_type", 23, 8),
+        Signal("steer_angle_actual", 31, 16, offset=-500.0, unit="deg"),
+        Signal("steer_angle_spd_actual", 63, 8, unit="deg/s"),
+    )),
+    0x503: ("Gear Report", (
+        Signal("gear_actual", 2, 3),
+        Signal("gear_flt_type", 15, 8),
+    )),
+    0x504: ("Park Report", (
+        Signal("parking_actual", 0, 1),
+        Signal("parking_flt", 15, 8),
+    )),
+    0x505: ("VCU Report", (
+        # 12 位有符号加速度
+        Signal("vehicle_acc", 7, 12, signed=True, scale=0.01, unit="m/s^2"),
+        Signal("brake_light_actual", 11, 1),
+        Signal("steer_mode_sts", 10, 3),
+        # 16 位有符号车速
+        Signal("vehicle_speed", 23, 16, signed=True, scale=0.001, unit="m/s"),
+        Signal("aeb_state", 32, 1),
+        Signal("frontcrash_state", 33, 1),
+        Signal("backcrash_state", 34, 1),
+        # 0: 'MANUAL_REMOTE', 1: 'AUTO', 2: 'EMERGENCY', 3: 'STANDBY'
+        Signal("vehicle_mode_state", 36, 2),
+        Signal("drive_mode_sts", 39, 3),
+        Signal("chassis_errcode", 47, 8),
+        Signal("turn_light_actual", 57, 2),
+    )),
+    0x506: ("Wheel Speed Report", (
+        Signal("front_left_wheel_speed", 7, 16, scale=0.001, unit="m/s"),
+        Signal("front_right_wheel_speed", 23, 16, scale=0.001, unit="m/s"),
+        Signal("rear_left_wheel_speed", 39, 16, scale=0.001, unit="m/s"),
+        Signal("rear_right_wheel_speed", 55, 16, scale=0.001, unit="m/s"),
+    )),
+    0x507: _ultrasonic_frame("Ultrasonic Sensor Report", *ULTRASONIC_REPORTS[0x507]),
+    0x508: _ultrasonic_frame("Ultrasonic Sensor Report", *ULTRASONIC_REPORTS[0x508]),
+    0x509: _ultrasonic_frame("Ultrasonic Sensor Report", *ULTRASONIC_REPORTS[0x509]),
+    0x510: _ultrasonic_frame("Ultrasonic Sensor Report", *ULTRASONIC_REPORTS[0x510]),
+    0x511: _ultrasonic_frame("Ultrasonic Sensor Report", *ULTRASONIC_REPORTS[0x511]),
+    0x512: ("BMS Report", (
+        Signal("battery_voltage", 7, 16, scale=0.01, unit="V"),
+        Signal("battery_current", 23, 16, scale=0.1, offset=-3200.0, unit="A"),
+        Signal("battery_soc", 39, 8, unit="%"),
+    )),
+    0x514: _vin_frame("VIN Report", 0, 8),
+    0x515: _vin_frame("VIN Report", 8, 8),
+    0x516: _vin_frame("VIN Report", 16, 1),
+}
+
+# Hooke2 控制报文信号表, 范围限制由 minimum/maximum 完成
+HOOKE2_COMMAND_FRAMES = {
+    0x100: ("Throttle Command", (
+        Signal("throttle_en_ctrl", 0, 1),
+        Signal("throttle_acc", 8, 10, scale=0.01, byte_order="little", minimum=0.0, maximum=10.0),
+        Signal("throttle_pedal_target", 31, 16, scale=0.1, minimum=0.0, maximum=100.0),
+        Signal("vel_target", 40, 10, scale=0.01, byte_order="little", minimum=0.0, maximum=10.23),
+        Signal("checksum_100", 63, 8),
+    )),
+    0x101: ("Brake Command", (
+        Signal("brake_en_ctrl", 0, 1),
+        Signal("aeb_en_ctrl", 1, 1),
+        Signal("brake_dec", 8, 10, scale=0.01, byte_order="little"),
+        Signal("brake_pedal_target", 31, 16, scale=0.1),
+        Signal("checksum_101", 63, 8),
+    )),
+    0x102: ("Steering Command", (
+        Signal("steer_en_ctrl", 0, 1),
+        Signal("steer_angle_spd", 15, 8, minimum=0, maximum=250),
+        Signal("steer_angle_target", 31, 16, offset=-500, minimum=-500, maximum=500),
+        Signal("checksum_102", 63, 8),
+    )),
+    0x103: ("Gear Command", (
+        Signal("gear_en_ctrl", 0, 1),
+        Signal("gear_target", 10, 3),
+        Signal("checksum_103", 63, 8),
+    )),
+    0x104: ("Park Command", (
+        Signal("park_en_ctrl", 0, 1),
+        Signal("park_target", 8, 1),
+        Signal("checksum_104", 63, 8),
+    )),
+    0x105: ("Vehicle Mode Command", (
+        Signal("steer_mode_ctrl", 2, 3),
+        Signal("drive_mode_ctrl", 15, 3),
+        Signal("turn_light_ctrl", 23, 2),
+        Signal("vin_req", 31, 1),
+        Signal("checksum_105", 63, 8),
+    )),
+}
+
+# 启动时一次性编译
+HOOKE2_REPORT_DECODERS = compile_frames(HOOKE2_REPORT_FRAMES)
+HOOKE2_COMMAND_ENCODERS = compile_encoders(HOOKE2_COMMAND_FRAMES)
+
+
+def load_hooke2_dbc(dbc_path, cache_dir=None):
+    """
+    从 DBC 生成 Hooke2 编解码模块, 信号顺序与内置信号表一致。
+    DBC 只提供位定义 (起始位、位宽、符号、字节序、scale/offset、范围);
+    处理的报文 ID、每个报文的信号名和顺序 (处理函数按位置解包) 仍由 HOOKE2_REPORT_FRAMES /
+    HOOKE2_COMMAND_FRAMES 决定, DBC 中缺少的报文使用内置定义, 见 apply_layout。
+    """
+    return load_dbc(dbc_path, layout={**HOOKE2_REPORT_FRAMES, **HOOKE2_COMMAND_FRAMES}, cache_dir=cache_dir)
+
+
 # 创建CAN解析类
 class HOOKE2CanReportHandler:
-    def __init__(self, logger):
+    def __init__(self, logger, dbc_path=None, tracer=None, timebase=None):
         self.log = logger
+        self.tracer = tracer or NULL_TRACER
+        # 统一时基, RX/TX 时间戳均为主机单调时钟
+        self.timebase = timebase or DEFAULT_TIMEBASE
+        # vehicle_status 只由 RX 线程修改, 其他线程通过 status_publisher 读取快照
         self.vehicle_status = VehicleStatus()
+        self.status_publisher = VehicleStatusPublisher(self.vehicle_status)
+        # 信号变化订阅, 见 subscribe()
+        self.signal_watcher = SignalWatcher(HOOKE2_REPORT_FRAMES)
+        # 超声波 TOF 环形缓冲区, 见 nearest_obstacle()
+        self.ultrasonic = UltrasonicBuffer(ULTRASONIC_SECTORS, clock=self.timebase.now)
         # 定义目标 ID 和对应的处理函数
         self.dtv_can_report_ids = {
             0x500: self.on_throttle_report_500,
@@ -32,359 +225,270 @@ class HOOKE2CanReportHandler:
             0x515: self.on_vin_report_515,
             0x516: self.on_vin_report_516,
         }
+        # ID -> 解码函数, 默认使用内置信号表, 指定 DBC 时使用生成的代码
+        if dbc_path is None:
+            self.report_decoders = {
+                frame_id: decoder.decode for frame_id, decoder in HOOKE2_REPORT_DECODERS.items()
+            }
+        else:
+            self.report_decoders = load_hooke2_dbc(dbc_path).DECODERS
+        # ID -> (解码函数, 处理函数)
+        self._dispatch = {
+            frame_id: (self.report_decoders[frame_id], handler)
+            for frame_id, handler in self.dtv_can_report_ids.items()
+        }
+
+    @property
+    def frame_ids(self):
+        """
+        需要接收的报文 ID, 用于设置接收过滤器。
+        """
+        return list(self._dispatch)
+
+    def describe_frame(self, frame_id, data):
+        """
+        解码一帧用于显示, 返回 [(信号名, 值), ...]; 不是本车型的报文返回 None。
+        """
+        # 指定 DBC 时 report_decoders 还包含控制报文, 只描述本车型处理的反馈报文
+        entry = self._dispatch.get(frame_id)
+        if entry is None:
+            return None
+        decode, _ = entry
+        _, signals = self.signal_watcher.frames[frame_id]
+        return list(zip((signal.name for signal in signals), decode(data)))
 
     def handle_message(self, msg: can.Message):
         """
-        处理 CAN 消息。
+        处理单帧 CAN 消息, 只更新状态, 不发布快照 (逐帧生成快照的开销与解码本身相当);
+        调用 publish_status() 后读取方才能看到。接收线程请使用 handle_messages() 按批处理。
         """
         if msg is not None:
-            if msg.arbitration_id in self.dtv_can_report_ids:
-                self.dtv_can_report_ids[msg.arbitration_id](msg.data)
-                
-    def on_throttle_report_500(self, data):
+            entry = self._dispatch.get(msg.arbitration_id)
+            if entry is not None:
+                decode, handler = entry
+                signals = decode(msg.data)
+                timestamp = self.timebase.to_host(msg.timestamp)
+                if self.tracer.enabled:
+                    self.tracer.emit(msg.arbitration_id, TRACE_RX, timestamp, signals)
+                watches = self.signal_watcher.frame_watches.get(msg.arbitration_id)
+                if watches:
+                    self.signal_watcher.check_frame(watches, signals, timestamp)
+                handler(signals, timestamp)
+
+    def handle_messages(self, msgs):
+        """
+        处理一批 CAN 消息。
+        逐帧解码并更新状态, 整批只发布一次快照, 读取方看到的是这一批处理完后的状态。
+        """
+        dispatch = self._dispatch
+        frame_watches = self.signal_watcher.frame_watches
+        to_host = self.timebase.to_host
+        tracing = self.tracer.enabled
+        handled = False
+        for msg in msgs:
+            entry = dispatch.get(msg.arbitration_id)
+            if entry is None:
+                continue
+            decode, handler = entry
+            signals = decode(msg.data)
+            timestamp = to_host(msg.timestamp)
+            if tracing:
+                self.tracer.emit(msg.arbitration_id, TRACE_RX, timestamp, signals)
+            watches = frame_watches.get(msg.arbitration_id)
+            if watches:
+                self.signal_watcher.check_frame(watches, signals, timestamp)
+            handler(signals, timestamp)
+            handled = True
+        if handled:
+            self.publish_status()
+
+    def publish_status(self):
+        """
+        发布当前状态的快照并检查状态订阅, handle_messages() 每批调用一次。
+        """
+        snapshot = self.status_publisher.publish()
+        if self.signal_watcher.status_watches:
+            self.signal_watcher.check_status(snapshot)
+        return snapshot
+
+    def subscribe(self, names, callback=None, deadband=0.0):
+        """
+        订阅信号变化, 只在值变化 (超过死区) 时回调或入队, 参见 SignalWatcher.subscribe。
+        """
+        return self.signal_watcher.subscribe(names, callback, deadband)
+
+    def on_throttle_report_500(self, signals, timestamp):
         """
         处理 Throttle Report (0x500) 消息。
         """
-        throttle_pedal_actual = (data[3] << 8 | data[4]) * 0.1
-        throttle_flt2_type = data[2]
-        throttle_flt1_type = data[1]
-        # 0: 'MANUAL', 1: 'AUTO', 2: 'TAKEOVER', 3: 'STANDBY'
-        throttle_en_state = data[0] & 0x03
+        throttle_en_state, throttle_flt1_type, throttle_flt2_type, throttle_pedal_actual = signals
 
-        self.log.debug(
-            f"Throttle Report (0x500): "
-            f"Pedal: {throttle_pedal_actual:.2f}%, "
-            f"Fault1: {throttle_flt1_type}, "
-            f"Fault2: {throttle_flt2_type}, "
-            f"En State: {throttle_en_state}"
-        )
         self.vehicle_status.throttle = round(throttle_pedal_actual, 2)
-        self.vehicle_status.timestamp = time.time()
+        self.vehicle_status.timestamp = timestamp
 
-    def on_brake_report_501(self, data):
+    def on_brake_report_501(self, signals, timestamp):
         """
         处理 Brake Report (0x501) 消息。
         """
+        brake_en_state, brake_flt1_type, brake_flt2_type, brake_pedal_actual = signals
 
-        brake_pedal_actual = (data[3] << 8 | data[4]) * 0.1
-        brake_flt2_type = data[2]
-        brake_flt1_type = data[1]
-        # 0: 'MANUAL', 1: 'AUTO', 2: 'TAKEOVER', 3: 'STANDBY'
-        brake_en_state = data[0] & 0x03
-
-        self.log.debug(
-            f"Brake Report (0x501): "
-            f"Pedal: {brake_pedal_actual:.2f}%, "
-            f"Fault1: {brake_flt1_type}, "
-            f"Fault2: {brake_flt2_type}, "
-            f"En_State: {brake_en_state}"
-        )
         self.vehicle_status.brake = round(brake_pedal_actual, 2)
-        self.vehicle_status.timestamp = time.time()
+        self.vehicle_status.timestamp = timestamp
 
-    def on_steering_report_502(self, data):
+    def on_steering_report_502(self, signals, timestamp):
         """
         处理 Steering Report (0x502) 消息。
         """
-        steer_angle_spd_actual = data[7]
-        steer_flt2_type = data[2]
-        steer_flt1_type = data[1]
-        # 0: 'MANUAL', 1: 'AUTO', 2: 'TAKEOVER', 3: 'STANDBY'
-        steer_en_state = data[0] & 0x03
-        steer_angle_actual =(data[3] << 8 | data[4]) - 500.0
-
-        self.log.debug(
-            f"Steering Report (0x502): "
-            f"Steering Angle: {steer_angle_actual}, "
-            f"Steering_Speed: {steer_angle_spd_actual}, "
-            f"Fault1: {steer_flt1_type}, "
-            f"Fault2: {steer_flt2_type}, "
-            f"En State: {steer_en_state}"
-        )
+        (steer_en_state, steer_flt1_type, steer_flt2_type,
+         steer_angle_actual, steer_angle_spd_actual) = signals
 
         steering_in_perc = round(steer_angle_actual / 5.0, 2)
         steering_in_perc = max(-100, min(steering_in_perc, 100))
         self.vehicle_status.steering = steering_in_perc
-        self.vehicle_status.timestamp = time.time()
+        self.vehicle_status.timestamp = timestamp
 
-    def on_gear_report_503(self, data):
+    def on_gear_report_503(self, signals, timestamp):
         """
         处理 Gear Report (0x503) 消息。
         """
-        gear_flt_type = data[1]
-        gear_actual = data[0] & 0x07
+        gear_actual, gear_flt_type = signals
 
-        self.log.debug(
-            f"Gear Report (0x503): " f"Gear: {gear_actual}, " f"Fault: {gear_flt_type}"
-        )
         self.vehicle_status.gear = self.get_gear_state(gear_actual)
-        self.vehicle_status.timestamp = time.time()
+        self.vehicle_status.timestamp = timestamp
 
-    def on_park_report_504(self, data):
+    def on_park_report_504(self, signals, timestamp):
         """
         处理 Park Report (0x504) 消息。
         """
-        parking_actual = data[0] & 0x01
-        parking_flt = data[1]
+        parking_actual, parking_flt = signals
 
-        self.log.debug(
-            f"Parking Report (0x504): "
-            f"parking: {parking_actual}, "
-            f"Fault: {parking_flt}"
-        )
         self.vehicle_status.parking_brake = 1 if parking_actual else 0
-        self.vehicle_status.timestamp = time.time()
+        self.vehicle_status.timestamp = timestamp
 
-    def on_vcu_report_505(self, data):
+    def on_vcu_report_505(self, signals, timestamp):
         """
         处理 VCU Report (0x505) 消息。
         """
-        brake_light_actual = (data[1] >> 3) & 0x01
-        turn_light_actual = data[7] & 0x03
-        chassis_errcode = data[5]
-        drive_mode_sts = (data[4] >> 5) & 0x07
-        steer_mode_sts = data[1] & 0x07
-        # 0: 'MANUAL_REMOTE', 1: 'AUTO', 2: 'EMERGENCY', 3: 'STANDBY'
-        vehicle_mode_state = (data[4] >> 3) & 0x03
-        frontcrash_state = (data[4] >> 1) & 0x01
-        backcrash_state = (data[4] >> 2) & 0x01
-        aeb_state = data[4] & 0x01
-
-        # 拼接成一个12位的整数
-        x = (data[0] << 4) | (data[1] >> 4) & 0x0F
-        # 将12位整数转换为有符号整数
-        if x & 0x800:  # 检查符号位
-            x -= 0x1000  # 转换为负数
-        # 转换为浮点数
-        vehicle_acc = x * 0.010000
-        vehicle_acc = max(-10, min(vehicle_acc, 10))  # 限制 vehicle_acc 在 -10 到 10 的范围内
-
-        # 拼接成一个16位的整数
-        x = (data[2] << 8 | data[3])
-        # 将16位整数转换为有符号整数
-        # 16位有符号整数的最大值为 32767 (0x7FFF)，最小值为 -32768 (0x8000)
-        if x & 0x8000:  # 检查符号位
-            x -= 0x10000  # 转换为负数  
-        vehicle_speed = x * 0.001
-        vehicle_speed = max(-32.768, min(vehicle_speed, 32.767))  # 限制 vehicle_speed 在 -32.768 到 32.767 的范围内
-
-        self.log.debug(
-            f"VCU Report (0x505): "
-            f"Brake Light: {brake_light_actual}, "
-            f"Turn Light: {turn_light_actual}, "
-            f"Chassis Error: {chassis_errcode}, "
-            f"Drive Mode: {drive_mode_sts}, "
-            f"Steer Mode: {steer_mode_sts}, "
-            f"Vehicle Mode: {vehicle_mode_state}, "
-            f"Front Crash: {frontcrash_state}, "
-            f"Back Crash: {backcrash_state}, "
-            f"AEB State: {aeb_state}, "
-            f"Acceleration: {vehicle_acc:.2f} m/s^2, "
-            f"Speed: {vehicle_speed:.2f} m/s"
-        )
+        (vehicle_acc, brake_light_actual, steer_mode_sts, vehicle_speed,
+         aeb_state, frontcrash_state, backcrash_state, vehicle_mode_state,
+         drive_mode_sts, chassis_errcode, turn_light_actual) = signals
 
         self.vehicle_status.speed = round(vehicle_speed * 3.6, 2)   # km/h
         self.vehicle_status.turn_light = self.get_turn_light_state(turn_light_actual)
         self.vehicle_status.driving_mode = self.get_driving_mode(vehicle_mode_state)
-        self.vehicle_status.timestamp = time.time()
+        self.vehicle_status.timestamp = timestamp
 
-    def on_wheel_speed_report_506(self, data):
+    def on_wheel_speed_report_506(self, signals, timestamp):
         """
         处理 Wheel Speed Report (0x506) 消息。
         """
-        # 解析数据
-        front_left_wheel_speed = (data[0] << 8 | data[1]) * 0.001
-        front_right_wheel_speed = (data[2] << 8 | data[3]) * 0.001
-        rear_left_wheel_speed = (data[4] << 8 | data[5]) * 0.001
-        rear_right_wheel_speed = (data[6] << 8 | data[7]) * 0.001
+        # 只用于追踪 (见 handle_messages)
+        pass
 
-        # 打印或发布消息
-        self.log.debug(
-            f"Wheel Speed Report (0x506): "
-            f"Front Left: {front_left_wheel_speed:.3f} m/s, "
-            f"Front Right: {front_right_wheel_speed:.3f} m/s, "
-            f"Rear Left: {rear_left_wheel_speed:.3f} m/s, "
-            f"Rear Right: {rear_right_wheel_speed:.3f} m/s"
-        )
-
-    def on_ultr_sensor_507(self, data):
+    def on_ultr_sensor_507(self, signals, timestamp):
         """
         处理 Ultrasonic Sensor Report (0x507) 消息。
         """
-        # uiuss9_tof_direct, 0-65535 cm (ultrasonic distance)
-        uiuss9_tof_direct = ((data[2] << 8) | data[3]) * 0.017240
-        # uiuss8_tof_direct, 0-65535 cm (ultrasonic distance)
-        uiuss8_tof_direct = ((data[0] << 8) | data[1]) * 0.017240
-        # uiuss11_tof_direct, 0-65535 cm (ultrasonic distance)
-        uiuss11_tof_direct = ((data[6] << 8) | data[7]) * 0.017240
-        # uiuss10_tof_direct, 0-65535 cm (ultrasonic distance)
-        uiuss10_tof_direct = ((data[4] << 8) | data[5]) * 0.017240
-
-        self.log.debug(
-            f"Ultrasonic Sensor Report (0x507): "
-            f"UIUSS8: {uiuss8_tof_direct:.2f} cm, "
-            f"UIUSS9: {uiuss9_tof_direct:.2f} cm, "
-            f"UIUSS10: {uiuss10_tof_direct:.2f} cm, "
-            f"UIUSS11: {uiuss11_tof_direct:.2f} cm"
-        )
+        sensors, indirect = ULTRASONIC_REPORTS[0x507]
+        self.ultrasonic.update(sensors, signals, timestamp, indirect)
 
-    def on_ultr_sensor_508(self, data):
+    def on_ultr_sensor_508(self, signals, timestamp):
         """
         处理 Ultrasonic Sensor Report (0x508) 消息。
         """
-        uiuss9_tof_indirect = ((data[2] << 8) | data[3]) * 0.017240
-        uiuss8_tof_indirect = ((data[0] << 8) | data[1]) * 0.017240
-        uiuss11_tof_indirect = ((data[6] << 8) | data[7]) * 0.017240
-        uiuss10_tof_indirect = ((data[4] << 8) | data[5]) * 0.017240
-
-        self.log.debug(
-            f"Ultrasonic Sensor Report (0x508): "
-            f"UIUSS8: {uiuss8_tof_indirect:.2f} cm, "
-            f"UIUSS9: {uiuss9_tof_indirect:.2f} cm, "
-            f"UIUSS10: {uiuss10_tof_indirect:.2f} cm, "
-            f"UIUSS11: {uiuss11_tof_indirect:.2f} cm"
-        )
+        sensors, indirect = ULTRASONIC_REPORTS[0x508]
+        self.ultrasonic.update(sensors, signals, timestamp, indirect)
 
-    def on_ultr_sensor_509(self, data):
+    def on_ultr_sensor_509(self, signals, timestamp):
         """
         处理 Ultrasonic Sensor Report (0x509) 消息。
         """
-        uiuss5_tof_direct = ((data[6] << 8) | data[7]) * 0.017240
-        uiuss4_tof_direct = ((data[4] << 8) | data[5]) * 0.017240
-        uiuss3_tof_direct = ((data[2] << 8) | data[3]) * 0.017240
-        uiuss2_tof_direct = ((data[0] << 8) | data[1]) * 0.017240
+        sensors, indirect = ULTRASONIC_REPORTS[0x509]
+        self.ultrasonic.update(sensors, signals, timestamp, indirect)
 
-        self.log.debug(
-            f"Ultrasonic Sensor Report (0x509): "
-            f"UIUSS2: {uiuss2_tof_direct:.2f} cm, "
-            f"UIUSS3: {uiuss3_tof_direct:.2f} cm, "
-            f"UIUSS4: {uiuss4_tof_direct:.2f} cm, "
-            f"UIUSS5: {uiuss5_tof_direct:.2f} cm"
-        )
-
-    def on_ultr_sensor_510(self, data):
+    def on_ultr_sensor_510(self, signals, timestamp):
         """
         处理 Ultrasonic Sensor Report (0x510) 消息。
         """
-        uiuss5_tof_indirect = ((data[6] << 8) | data[7]) * 0.017240
-        uiuss4_tof_indirect = ((data[4] << 8) | data[5]) * 0.017240
-        uiuss3_tof_indirect = ((data[2] << 8) | data[3]) * 0.017240
-        uiuss2_tof_indirect = ((data[0] << 8) | data[1]) * 0.017240
-
-        self.log.debug(
-            f"Ultrasonic Sensor Report (0x510): "
-            f"UIUSS2: {uiuss2_tof_indirect:.2f} cm, "
-            f"UIUSS3: {uiuss3_tof_indirect:.2f} cm, "
-            f"UIUSS4: {uiuss4_tof_indirect:.2f} cm, "
-            f"UIUSS5: {uiuss5_tof_indirect:.2f} cm"
-        )
+        sensors, indirect = ULTRASONIC_REPORTS[0x510]
+        self.ultrasonic.update(sensors, signals, timestamp, indirect)
 
-    def on_ultr_sensor_511(self, data):
+    def on_ultr_sensor_511(self, signals, timestamp):
         """
         处理 Ultrasonic Sensor Report (0x511) 消息。
         """
-        uiuss7_tof_direct = ((data[6] << 8) | data[7]) * 0.017240
-        uiuss6_tof_direct = ((data[4] << 8) | data[5]) * 0.017240
-        uiuss1_tof_direct = ((data[2] << 8) | data[3]) * 0.017240
-        uiuss0_tof_direct = ((data[0] << 8) | data[1]) * 0.017240
+        sensors, indirect = ULTRASONIC_REPORTS[0x511]
+        self.ultrasonic.update(sensors, signals, timestamp, indirect)
 
-        self.log.debug(
-            f"Ultrasonic Sensor Report (0x511): "
-            f"uiuss0_tof_direct: {uiuss0_tof_direct:.2f} cm, "
-            f"uiuss1_tof_direct: {uiuss1_tof_direct:.2f} cm, "
-            f"uiuss6_tof_direct: {uiuss6_tof_direct:.2f} cm, "
-            f"uiuss7_tof_direct: {uiuss7_tof_direct:.2f} cm"
-        )
-
-    def on_bms_report_512(self, data):
+    def on_bms_report_512(self, signals, timestamp):
         """
         处理 BMS Report (0x512) 消息。
         """
-        
-        # battery_current = struct.unpack_from("<h", data, 2)[0] * 0.1
-        
-        battery_voltage = ((data[0] << 8) | data[1]) * 0.01
-        battery_current = ((data[2] << 8) | data[3]) * 0.1 - 3200.0
-        battery_soc = int(min(max(data[4], 0), 100))
+        battery_voltage, battery_current, battery_soc = signals
+        battery_soc = int(min(max(battery_soc, 0), 100))
 
-        self.log.debug(
-            f"BMS Report (0x512): "
-            f"Voltage: {battery_voltage:.2f} V, "
-            f"Current: {battery_current:.2f} A, "
-            f"SOC: {battery_soc}%"
-        )
         self.vehicle_status.battery = round(battery_soc, 2)
 
-    def on_vin_report_514(self, data):
+    def on_vin_report_514(self, signals, timestamp):
         """
         处理 VIN Report (0x514) 消息。
         """
-        vin07 = data[7]
-        vin06 = data[6]
-        vin05 = data[5]
-        vin04 = data[4]
-        vin03 = data[3]
-        vin02 = data[2]
-        vin01 = data[1]
-        vin00 = data[0]
-
-        self.log.debug(f"VIN Report (0x514): VIN07-VIN00: {vin07},{vin06},{vin05},{vin04},{vin03},{vin02},{vin01},{vin00}")
+        # 只用于追踪 (见 handle_messages)
+        pass
 
-    def on_vin_report_515(self, data):
+    def on_vin_report_515(self, signals, timestamp):
         """
         处理 VIN Report (0x515) 消息。
         """
-        vin15 = data[7]
-        vin14 = data[6]
-        vin13 = data[5]
-        vin12 = data[4]
-        vin11 = data[3]
-        vin10 = data[2]
-        vin09 = data[1]
-        vin08 = data[0]
-
-        vin_report515 = {
-            "vin15": vin15,
-            "vin14": vin14,
-            "vin13": vin13,
-            "vin12": vin12,
-            "vin11": vin11,
-            "vin10": vin10,
-            "vin09": vin09,
-            "vin08": vin08
-        }
-
-        self.log.debug(f"VIN Report (0x515): VIN15-VIN08: {vin15},{vin14},{vin13},{vin12},{vin11},{vin10},{vin09},{vin08}")
+        # 只用于追踪 (见 handle_messages)
+        pass
 
-    def on_vin_report_516(self, data):
+    def on_vin_report_516(self, signals, timestamp):
         """
         处理 VIN Report (0x516) 消息。
         """
-        vin16 = data[0]
-        self.log.debug(f"VIN Report (0x516): VIN16: {vin16}")
+        # 只用于追踪 (见 handle_messages)
+        pass
 
     @staticmethod
     def get_turn_light_state(state_code):
-        states = {0: "None", 1: "Left", 2: "Right", 3: "Hazard"}
-        return states.get(state_code, "Unknown")
+        return TURN_LIGHT_STATES.get(state_code, "Unknown")
 
     @staticmethod
     def get_driving_mode(mode_code):
-        modes = {0: "MANUAL", 1: "AUTO", 2: "EMERGENCY", 3: "STANDBY"}
-        return modes.get(mode_code)
+        return DRIVING_MODES.get(mode_code)
 
     @staticmethod
     def get_gear_state(gear_code):
-        gears = {1: "P", 2: "R", 3: "N", 4: "D"}
-        return gears.get(gear_code, "Unknown")
+        return GEAR_STATES.get(gear_code, "Unknown")
+
+    def nearest_obstacle(self, sector):
+        """
+        扇区内最近障碍物距离 (cm), 参见 UltrasonicBuffer。
+        """
+        return self.ultrasonic.nearest_obstacle(sector)
 
     def get_vehicle_status(self):
-        self.log.debug(f"update vehicle status, time:{self.vehicle_status.timestamp}, speed:{self.vehicle_status.speed}, throttle:{self.vehicle_status.throttle}, brake:{self.vehicle_status.brake}, steering:{self.vehicle_status.steering}, gear:{self.vehicle_status.gear}, park_braking:{self.vehicle_status.parking_brake}, driving_mode: {self.vehicle_status.driving_mode}")
-        return self.vehicle_status
+        """
+        返回最新的不可变快照 (VehicleStatusSnapshot), 可在任意线程调用。
+        """
+        status = self.status_publisher.latest()
+        self.log.debug(
+            "update vehicle status, time:%s, speed:%s, throttle:%s, brake:%s, steering:%s, gear:%s, park_braking:%s, driving_mode: %s",
+            status.timestamp, status.speed, status.throttle, status.brake,
+            status.steering, status.gear, status.parking_brake, status.driving_mode,
+        )
+        return status
+
+    def wait_vehicle_status(self, version, timeout=None):
+        """
+        等待比 version 更新的快照, 超时返回 None。
+        """
+        return self.status_publisher.wait_newer(version, timeout)
 
 
 class HOOKE2CanCommandHandler:
-    def __init__(self, log):
+    def __init__(self, log, dbc_path=None, tracer=None, timebase=None):
         # 默认命令值
         # 0x100
         self.throttle_pedal_target = 0
@@ -408,6 +512,20 @@ class HOOKE2CanCommandHandler:
 
         self.reset_can_msg = False      # 是否重置 CAN message
         self.log = log
+        self.tracer = tracer or NULL_TRACER
+        self.timebase = timebase or DEFAULT_TIMEBASE
+
+        # ID -> 编码函数, 默认使用内置信号表, 指定 DBC 时使用生成的代码
+        if dbc_path is None:
+            self.command_encoders = {
+                frame_id: encoder.encode for frame_id, encoder in HOOKE2_COMMAND_ENCODERS.items()
+            }
+        else:
+            self.command_encoders = load_hooke2_dbc(dbc_path).ENCODERS
+        # 预分配的控制报文, 输入不变时跳过编码
+        self.command_cache = CommandMessageCache(
+            self.command_encoders, HOOKE2_COMMAND_FRAMES, self.tracer, self.timebase
+        )
 
     def set_auto_drive(self, auto_drive = None):
         """
@@ -431,10 +549,7 @@ class HOOKE2CanCommandHandler:
             enable=0
             throttle_cmd=0
 
-        msg = can.Message(arbitration_id=0x100, dlc=8, is_extended_id=False)
-        msg.timestamp = time.time()  
-        msg.data = self._pack_throttle_data(self, enable, throttle_cmd)
-        return msg
+        return self._pack_throttle_data(self, enable, throttle_cmd)
 
     def send_brake_command(self, enable=0, brake_cmd=0):
         """
@@ -445,10 +560,7 @@ class HOOKE2CanCommandHandler:
             enable=0
             brake_cmd=0
 
-        msg = can.Message(arbitration_id=0x101, dlc=8, is_extended_id=False)
-        msg.timestamp = time.time()  
-        msg.data = self._pack_brake_data(self, enable, brake_cmd)
-        return msg
+        return self._pack_brake_data(self, enable, brake_cmd)
 
     def send_steering_command(self, enable=0, steering_cmd=0):
         """
@@ -459,10 +571,7 @@ class HOOKE2CanCommandHandler:
             enable=0
             steering_cmd=0
             
-        msg = can.Message(arbitration_id=0x102, dlc=8, is_extended_id=False)
-        msg.timestamp = time.time()  
-        msg.data = self._pack_steering_data(self, enable, steering_cmd)
-        return msg
+        return self._pack_steering_data(self, enable, steering_cmd)
 
     def send_gear_command(self, enable=0, gear_cmd=4):
         """
@@ -473,10 +582,7 @@ class HOOKE2CanCommandHandler:
             enable=0
             gear_cmd=0
 
-        msg = can.Message(arbitration_id=0x103, dlc=8, is_extended_id=False)
-        msg.timestamp = time.time()  
-        msg.data = self._pack_gear_data(self, enable, gear_cmd)
-        return msg
+        return self._pack_gear_data(self, enable, gear_cmd)
 
     def send_park_command(self, enable=0, park_cmd=0):
         """
@@ -487,10 +593,7 @@ class HOOKE2CanCommandHandler:
             enable=0
             park_cmd=0
 
-        msg = can.Message(arbitration_id=0x104, dlc=8, is_extended_id=False)
-        msg.timestamp = time.time()  
-        msg.data = self._pack_park_data(self, enable, park_cmd)
-        return msg
+        return self._pack_park_data(self, enable, park_cmd)
 
     def send_vehicle_mode_command(self, light_cmd=0, vin_req=0, drive_mode=0, steer_mode=0):
         """
@@ -503,10 +606,7 @@ class HOOKE2CanCommandHandler:
             drive_mode=0
             steer_mode=0
 
-        msg = can.Message(arbitration_id=0x105, dlc=8, is_extended_id=False)
-        msg.timestamp = time.time()     
-        msg.data = self._pack_vehicle_mode_data(self, light_cmd, vin_req, drive_mode, steer_mode)
-        return msg
+        return self._pack_vehicle_mode_data(self, light_cmd, vin_req, drive_mode, steer_mode)
 
     @staticmethod
     def _pack_throttle_data(self, enable, cmd):
@@ -519,35 +619,14 @@ class HOOKE2CanCommandHandler:
         self.throttle_pedal_target = cmd    # 踏板目标值
         checksum_100 = 0                    # 校验和
 
-        data = bytearray(8)  # 创建一个 8 字节的字节数组
-
-        # 设置使能
-        throttle_en_ctrl = throttle_en_ctrl & 0x01  # 限制为 0 或 1
-        data[0] = throttle_en_ctrl & 0x01
-
-        # 设置目标速度
-        vel_target = min(max(0.0, vel_target / 4.0), 10.23) # 限制范围 [0, 10.23]
-        vel_target_int = int(vel_target / 0.01)  # 转换为整数
-        data[5] = vel_target_int & 0xFF
-        data[6] = (vel_target_int >> 8) & 0x03
-
-        # 设置加速度
-        throttle_acc = min(max(0.0, throttle_acc), 10.0)  # 限制范围 [0, 10.0]
-        throttle_acc_int = int(throttle_acc / 0.01)  # 转换为整数
-        data[1] = throttle_acc_int & 0xFF
-        data[2] = (throttle_acc_int >> 8) & 0x03
-
-        # 设置踏板目标值
-        throttle_pedal_target = min(max(0.0, self.throttle_pedal_target), 100.0)  # 限制范围 [0, 100.0]
-        throttle_pedal_int = int(throttle_pedal_target / 0.1)
-        data[3] = (throttle_pedal_int >> 8) & 0xFF
-        data[4] = throttle_pedal_int & 0xFF
-
-        # 设置校验和
-        # checksum_100 = sum(data[:7]) & 0xFF  # 计算校验和
-        data[7] = checksum_100
-        self.log.debug(f'throttle en:{data[0]}, brake_pedal:{throttle_pedal_int}, {data[3],data[4]}')
-        return data
+        # 范围限制 (目标速度 [0, 10.23], 加速度 [0, 10.0], 踏板 [0, 100.0]) 由信号表完成
+        return self.command_cache.encode(0x100, (
+            throttle_en_ctrl & 0x01,
+            throttle_acc,
+            self.throttle_pedal_target,
+            vel_target / 4.0,
+            checksum_100,
+        ))
 
     @staticmethod
     def _pack_brake_data(self, enable, cmd):
@@ -555,30 +634,17 @@ class HOOKE2CanCommandHandler:
         制动can message数据
         """
         aeb_en_ctrl = 0                 # 默认值：AEB 禁用
-        brake_dec = 0.25                # 制动减速度
         self.brake_pedal_target = cmd   # 制动踏板目标值
         self.brake_en_ctrl = enable     # 制动使能
         checksum_101 = 0                # 校验和
 
-        data = bytearray(8)  # 创建一个 8 字节的字节数组
-
-        # 设置 AEB 使能
-        data[0] = (aeb_en_ctrl << 1) | (self.brake_en_ctrl & 0x01)
-
-        # 设置制动减速度
-        brake_dec_int = int(brake_dec / 0.01)  # 转换为整数
-        data[1] = brake_dec_int & 0xFF
-        data[2] = (brake_dec_int >> 8) & 0x03
-
-        # 设置制动踏板目标值
-        brake_pedal_int = int(self.brake_pedal_target / 0.1)
-        data[3] = (brake_pedal_int >> 8) & 0xFF
-        data[4] = brake_pedal_int & 0xFF
-
-        # 设置校验和
-        data[7] = checksum_101
-        self.log.debug(f'brake en:{data[0]}, brake_pedal:{brake_pedal_int}, {data[3],data[4]}')
-        return data
+        return self.command_cache.encode(0x101, (
+            self.brake_en_ctrl & 0x01,
+            aeb_en_ctrl,
+            BRAKE_DEC,
+            self.brake_pedal_target,
+            checksum_101,
+        ))
 
     @staticmethod
     def _pack_steering_data(self, enable, cmd):
@@ -587,33 +653,15 @@ class HOOKE2CanCommandHandler:
         """
         self.steer_en_ctrl = enable         # 默认值：转向使能禁用
         self.steer_angle_target = cmd/100.0 * 500  # 目标转向角度, degree
-        steer_angle_spd = 250               # 转向速度, degree/s
         checksum_102 = 0                    # 校验和
 
-        data = bytearray(8)  # 创建一个 8 字节的字节数组
-
-        # 设置转向使能
-        steer_en_ctrl = self.steer_en_ctrl & 0x01  # 限制为 0 或 1
-        data[0] = steer_en_ctrl & 0x01
-
-        # 设置目标转向角度
-        # 偏移量 -500
-        steer_angle_target = max(-500, min(500, self.steer_angle_target))
-        angle_int = int(steer_angle_target + 500)
-        data[3] = (angle_int >> 8) & 0xFF
-        data[4] = angle_int & 0xFF
-
-        # 设置转向速度
-        # 范围 [0, 250]
-        steer_angle_spd = max(0, min(250, steer_angle_spd))
-        data[1] = steer_angle_spd & 0xFF
-
-        # 设置校验和
-        # checksum_102 = sum(data[:7]) & 0xFF  # 计算校验和
-        data[7] = checksum_102
-
-        self.log.debug(f'steering en:{data[0]}, steer angle target:{steer_angle_target}, {data[3],data[4]}')
-        return data
+        # 目标转向角度偏移量 -500, 范围 [-500, 500]; 转向速度范围 [0, 250]
+        return self.command_cache.encode(0x102, (
+            self.steer_en_ctrl & 0x01,
+            STEER_ANGLE_SPD,
+            self.steer_angle_target,
+            checksum_102,
+        ))
 
     @staticmethod
     def _pack_gear_data(self, enable, cmd):
@@ -624,20 +672,11 @@ class HOOKE2CanCommandHandler:
         self.gear_en_ctrl = enable  # 默认值：挡位使能/禁用
         checksum_103 = 0            # 校验和
 
-        data = bytearray(8)  # 创建一个 8 字节的字节数组
-
-        # 设置挡位使能
-        gear_en_ctrl = self.gear_en_ctrl & 0x01  # 限制为 0 或 1
-        data[0] = gear_en_ctrl & 0x01
-
-        # 设置挡位目标
-        gear_target = self.gear_target & 0x07  # 限制为 0-7
-        data[1] = gear_target & 0x0F  # 档位目标占低 4 位
-
-        # 设置校验和
-        data[7] = checksum_103
-        self.log.debug(f'gear en:{data[0]}, gear target:{gear_target}, {data[1]}')
-        return data
+        return self.command_cache.encode(0x103, (
+            self.gear_en_ctrl & 0x01,
+            self.gear_target & 0x07,  # 限制为 0-7
+            checksum_103,
+        ))
 
     @staticmethod
     def _pack_park_data(self, enable, cmd):
@@ -648,21 +687,12 @@ class HOOKE2CanCommandHandler:
         self.park_target = cmd       # 默认值：释放驻车
         self.park_en_ctrl = enable   # 默认值：驻车使能/禁用
 
-        data = bytearray(8)  # 创建一个 8 字节的字节数组
-
-        # 设置驻车使能
-        park_en_ctrl = self.park_en_ctrl & 0x01  # 限制为 0 或 1
-        data[0] = park_en_ctrl & 0x01
-
-        # 设置驻车目标
-        park_target = self.park_target & 0x01  # 限制为 0 或 1, 0: 'PARK_TARGET_RELEASE', 1: 'PARK_TARGET_PARKING_TRIGGER
-        data[1] = park_target
-
-        # 设置校验和
-        # checksum_104 = sum(data[:7]) & 0xFF  # 计算校验和
-        data[7] = checksum_104
-        self.log.debug(f'gear en:{data[0]}, park target:{park_target}, {data[1]}')
-        return data
+        # 0: 'PARK_TARGET_RELEASE', 1: 'PARK_TARGET_PARKING_TRIGGER
+        return self.command_cache.encode(0x104, (
+            self.park_en_ctrl & 0x01,
+            self.park_target & 0x01,
+            checksum_104,
+        ))
 
     @staticmethod
     def _pack_vehicle_mode_data(self, light_cmd, vin_req, drive_mode, steer_mode):
@@ -675,27 +705,10 @@ class HOOKE2CanCommandHandler:
         self.drive_mode_ctrl = 0     # 默认值：驾驶模式, throttle pedal-0, speed-1
         self.steer_mode_ctrl = 0     # 默认值：标准转向模式, front wheel-0, four-wheel-non-direction-1, four-wheel-sync-direction-2
 
-        data = bytearray(8)  # 创建一个 8 字节的字节数组
-
-        # 设置转向模式控制
-        steer_mode_ctrl = self.steer_mode_ctrl & 0x07  # 限制为 0-7
-        data[0] = (steer_mode_ctrl & 0x07)
-
-        # 设置驾驶模式控制
-        drive_mode_ctrl = self.drive_mode_ctrl & 0x07  # 限制为 0-7
-        data[1] = (drive_mode_ctrl & 0x07) << 5
-
-        # 设置转向灯控制
-        turn_light_ctrl = self.turn_light_ctrl & 0x07  # 限制为 0-7
-        data[2] = (turn_light_ctrl & 0x03) << 6
-
-        # 设置 VIN 请求
-        vin_req = vin_req & 0x01  # 限制为 0 或 1
-        data[3] = (vin_req & 0x01) << 7
-
-        # 设置校验和
-        # checksum_105 = sum(data[:7]) & 0xFF  # 计算校验和
-        data[7] = checksum_105
-        self.log.debug(f'steer_mode_ctrl:{data[0]}, drive_mode_ctrl:{data[1]}, turn_light_ctrl:{data[2]}, vin_req:{data[3]}')
-        return data
-    
+        return self.command_cache.encode(0x105, (
+            self.steer_mode_ctrl & 0x07,
+            self.drive_mode_ctrl & 0x07,
+            self.turn_light_ctrl & 0x03,
+            vin_req & 0x01,
+            checksum_105,
+        ))
@@ -1,20 +1,101 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import struct
 import can
-import time
 import math
 
-from vehicle.vehicle_status import VehicleStatus
+from vehicle.vehicle_status import VehicleStatus, VehicleStatusPublisher
+from vehicle.signal_table import Signal, compile_frames, compile_encoders
+from vehicle.dbc import load_dbc
+from vehicle.command_cache import CommandMessageCache
+from vehicle.trace import NULL_TRACER, TRACE_RX
+from vehicle.timebase import DEFAULT_TIMEBASE
+from vehicle.signal_watch import SignalWatcher
+from vehicle.frame_stats import SequenceTracker
 
 LMT_SEND_PERIOD = 0.01  # 发送周期（单位：秒）
 
+
+def _motor_fb1_frame(name):
+    return (name, (
+        Signal("cur_fb", 7, 16, scale=0.0078125, unit="A"),
+        Signal("spd_fb", 23, 16, signed=True, scale=0.25, unit="rpm"),
+        Signal("workmod", 35, 4),
+        Signal("leg_sta", 43, 4),
+        Signal("temp", 55, 8, scale=1.0, unit="°C"),
+        Signal("rolling", 63, 8),
+    ))
+
+
+def _motor_fb2_frame(name):
+    return (name, (
+        Signal("circles", 7, 32, scale=1.0, unit="revolutions"),
+        Signal("rolling", 35, 4),
+    ))
+
+
+# LMT 电机反馈报文信号表 (start_bit 为 MSB 位置: 字节号 * 8 + 位号)
+LMT_REPORT_FRAMES = {
+    0x620: _motor_fb1_frame("Motor Feedback 1"),
+    0x621: _motor_fb1_frame("Motor Feedback 1"),
+    0x622: _motor_fb2_frame("Motor Feedback 2"),
+    0x623: _motor_fb2_frame("Motor Feedback 2"),
+}
+
+
+def _motor_ctrlcmd_frame(name):
+    return (name, (
+        Signal("workmod_req", 3, 4),
+        # 限制 target_spd 在 -3000 到 3000 之间, target_cur 在 -80 到 80 之间
+        Signal("target_spd", 31, 16, signed=True, scale=0.25, unit="rpm", minimum=-3000, maximum=3000),
+        Signal("target_cur", 47, 16, signed=True, scale=0.0078125, unit="A", minimum=-80, maximum=80),
+        Signal("rolling", 63, 8),
+    ))
+
+
+# LMT 电机控制报文信号表
+LMT_COMMAND_FRAMES = {
+    0x520: _motor_ctrlcmd_frame("Motor Control Command"),
+    0x521: _motor_ctrlcmd_frame("Motor Control Command"),
+}
+
+# 反馈报文滚动计数器模数, 由 rolling 信号位宽决定
+LMT_ROLLING_MODULUS = {
+    frame_id: 1 << next(signal.length for signal in signals if signal.name == "rolling")
+    for frame_id, (_, signals) in LMT_REPORT_FRAMES.items()
+}
+
+# 启动时一次性编译
+LMT_REPORT_DECODERS = compile_frames(LMT_REPORT_FRAMES)
+LMT_COMMAND_ENCODERS = compile_encoders(LMT_COMMAND_FRAMES)
+
+
+def load_lmt_dbc(dbc_path, cache_dir=None):
+    """
+    从 DBC 生成 LMT 编解码模块, 信号顺序与内置信号表一致。
+    DBC 只提供位定义 (起始位、位宽、符号、字节序、scale/offset、范围);
+    处理的报文 ID、每个报文的信号名和顺序 (处理函数按位置解包) 仍由 LMT_REPORT_FRAMES /
+    LMT_COMMAND_FRAMES 决定, DBC 中缺少的报文使用内置定义, 见 apply_layout。
+    """
+    return load_dbc(dbc_path, layout={**LMT_REPORT_FRAMES, **LMT_COMMAND_FRAMES}, cache_dir=cache_dir)
+
+
 # 创建CAN解析类
 class LMTCanReportHandler:
-    def __init__(self, log):
+    def __init__(self, log, dbc_path=None, tracer=None, timebase=None):
         self.log = log
+        self.tracer = tracer or NULL_TRACER
+        # 统一时基, RX/TX 时间戳均为主机单调时钟
+        self.timebase = timebase or DEFAULT_TIMEBASE
+        # vehicle_status 只由 RX 线程修改, 其他线程通过 status_publisher 读取快照
         self.vehicle_status = VehicleStatus()
+        self.status_publisher = VehicleStatusPublisher(self.vehicle_status)
+        # 信号变化订阅, 见 subscribe()
+        self.signal_watcher = SignalWatcher(LMT_REPORT_FRAMES)
+        # 每个反馈 ID 的滚动计数器跟踪 (丢帧/重复/乱序, 到达间隔和处理延迟直方图)
+        self.sequence_trackers = {
+            frame_id: SequenceTracker(modulus) for frame_id, modulus in LMT_ROLLING_MODULUS.items()
+        }
         # 定义目标 ID 和对应的处理函数
         self.lmt_can_report_ids = {
             0x620: self.on_motor_fb1_620,
@@ -22,106 +103,174 @@ class LMTCanReportHandler:
             0x622: self.on_motor_fb2_622,
             0x623: self.on_motor_fb2_623,
         }
+        # ID -> 解码函数, 默认使用内置信号表, 指定 DBC 时使用生成的代码
+        if dbc_path is None:
+            self.report_decoders = {
+                frame_id: decoder.decode for frame_id, decoder in LMT_REPORT_DECODERS.items()
+            }
+        else:
+            self.report_decoders = load_lmt_dbc(dbc_path).DECODERS
+        # ID -> (解码函数, 处理函数)
+        self._dispatch = {
+            frame_id: (self.report_decoders[frame_id], handler)
+            for frame_id, handler in self.lmt_can_report_ids.items()
+        }
+
+    @property
+    def frame_ids(self):
+        """
+        需要接收的报文 ID, 用于设置接收过滤器。
+        """
+        return list(self._dispatch)
+
+    def describe_frame(self, frame_id, data):
+        """
+        解码一帧用于显示, 返回 [(信号名, 值), ...]; 不是本车型的报文返回 None。
+        """
+        # 指定 DBC 时 report_decoders 还包含控制报文, 只描述本车型处理的反馈报文
+        entry = self._dispatch.get(frame_id)
+        if entry is None:
+            return None
+        decode, _ = entry
+        _, signals = self.signal_watcher.frames[frame_id]
+        return list(zip((signal.name for signal in signals), decode(data)))
 
     def handle_message(self, msg: can.Message):
         """
-        处理 CAN 消息。
+        处理单帧 CAN 消息, 只更新状态, 不发布快照 (逐帧生成快照的开销与解码本身相当);
+        调用 publish_status() 后读取方才能看到。接收线程请使用 handle_messages() 按批处理。
         """
         if msg is not None:
-            if msg.arbitration_id in self.lmt_can_report_ids:
-                self.lmt_can_report_ids[msg.arbitration_id](msg.data)
-                
-    def on_motor_fb1_620(self, data):
+            entry = self._dispatch.get(msg.arbitration_id)
+            if entry is not None:
+                decode, handler = entry
+                signals = decode(msg.data)
+                timestamp = self.timebase.to_host(msg.timestamp)
+                if self.tracer.enabled:
+                    self.tracer.emit(msg.arbitration_id, TRACE_RX, timestamp, signals)
+                watches = self.signal_watcher.frame_watches.get(msg.arbitration_id)
+                if watches:
+                    self.signal_watcher.check_frame(watches, signals, timestamp)
+                handler(signals, timestamp, self.timebase.now())
+
+    def handle_messages(self, msgs):
+        """
+        处理一批 CAN 消息。
+        逐帧解码并更新状态, 整批只发布一次快照, 读取方看到的是这一批处理完后的状态。
+        处理时刻 (统计处理延迟用) 每批只取一次, 同一批的帧共用。
+        """
+        dispatch = self._dispatch
+        frame_watches = self.signal_watcher.frame_watches
+        to_host = self.timebase.to_host
+        tracing = self.tracer.enabled
+        received = self.timebase.now()
+        handled = False
+        for msg in msgs:
+            entry = dispatch.get(msg.arbitration_id)
+            if entry is None:
+                continue
+            decode, handler = entry
+            signals = decode(msg.data)
+            timestamp = to_host(msg.timestamp)
+            if tracing:
+                self.tracer.emit(msg.arbitration_id, TRACE_RX, timestamp, signals)
+            watches = frame_watches.get(msg.arbitration_id)
+            if watches:
+                self.signal_watcher.check_frame(watches, signals, timestamp)
+            handler(signals, timestamp, received)
+            handled = True
+        if handled:
+            self.publish_status()
+
+    def publish_status(self):
+        """
+        发布当前状态的快照并检查状态订阅, handle_messages() 每批调用一次。
+        """
+        snapshot = self.status_publisher.publish()
+        if self.signal_watcher.status_watches:
+            self.signal_watcher.check_status(snapshot)
+        return snapshot
+
+    def subscribe(self, names, callback=None, deadband=0.0):
+        """
+        订阅信号变化, 只在值变化 (超过死区) 时回调或入队, 参见 SignalWatcher.subscribe。
+        """
+        return self.signal_watcher.subscribe(names, callback, deadband)
+
+    def on_motor_fb1_620(self, signals, timestamp, received):
         """
         处理 Motor Feedback 1 (0x620) 消息。
         """
-        cur_fb = (data[0] << 8 | data[1]) * 0.0078125
-        spd_fb = struct.unpack('>h', data[2:4])[0] * 0.25
-        workmod = data[4] & 0x0F
-        leg_sta = data[5] & 0x0F
-        temp = data[6] * 1.0
-        rolling = data[7] 
-
-        self.log.debug(
-            f"Motor Feedback 1 (0x620): "
-            f"CurFb: {cur_fb:.2f} A, "
-            f"SpdFb: {spd_fb:.2f} rpm, "
-            f"WorkMod: {workmod}, "
-            f"LegSta: {leg_sta}, "
-            f"Temp: {temp:.2f} °C, "
-            f"Rolling: {rolling}"
-        )
+        cur_fb, spd_fb, workmod, leg_sta, temp, rolling = signals
 
         self.vehicle_status.motor1_current = cur_fb
         self.vehicle_status.motor1_speed = spd_fb
-        self.motor1_work_mode = workmod
-        self.motor1_remote_status = leg_sta
-        self.motor1_temperature = temp
-        self.vehicle_status.timestamp = time.time()
+        self.vehicle_status.motor1_work_mode = workmod
+        self.vehicle_status.motor1_remote_status = leg_sta
+        self.vehicle_status.motor1_temperature = temp
+        self.sequence_trackers[0x620].update(rolling, timestamp, received)
+        self.vehicle_status.timestamp = timestamp
 
-    def on_motor_fb1_621(self, data):
+    def on_motor_fb1_621(self, signals, timestamp, received):
         """
         处理 Motor Feedback 1 (0x621) 消息。
         """
-        cur_fb = (data[0] << 8 | data[1]) * 0.0078125
-        spd_fb = struct.unpack('>h', data[2:4])[0] * 0.25
-        workmod = data[4] & 0x0F
-        leg_sta = data[5] & 0x0F
-        temp = data[6] * 1.0
-        rolling = data[7] 
-
-        self.log.debug(
-            f"Motor Feedback 1 (0x621): "
-            f"CurFb: {cur_fb:.2f} A, "
-            f"SpdFb: {spd_fb:.2f} rpm, "
-            f"WorkMod: {workmod}, "
-            f"LegSta: {leg_sta}, "
-            f"Temp: {temp:.2f} °C, "
-            f"Rolling: {rolling}"
-        )
+        cur_fb, spd_fb, workmod, leg_sta, temp, rolling = signals
+
         self.vehicle_status.motor2_current = cur_fb
         self.vehicle_status.motor2_speed = spd_fb
-        self.motor2_work_mode = workmod
-        self.motor2_remote_status = leg_sta
-        self.motor2_temperature = temp
-        self.vehicle_status.timestamp = time.time()
+        self.vehicle_status.motor2_work_mode = workmod
+        self.vehicle_status.motor2_remote_status = leg_sta
+        self.vehicle_status.motor2_temperature = temp
+        self.sequence_trackers[0x621].update(rolling, timestamp, received)
+        self.vehicle_status.timestamp = timestamp
 
-    def on_motor_fb2_622(self, data):
+    def on_motor_fb2_622(self, signals, timestamp, received):
         """
         处理 Motor Feedback 2 (0x622) 消息。
         """
-        circles = (data[0] << 24 | data[1] << 16 | data[2] << 8 | data[3]) * 1.0
-        rolling = data[4] & 0x0F
+        circles, rolling = signals
 
-        self.log.debug(
-            f"Motor Feedback 2 (0x622): "
-            f"Circles: {circles:.6f} revolutions, "
-            f"Rolling: {rolling}"
-        )
-        self.motor1_pulse_count = circles
-        self.vehicle_status.timestamp = time.time()
+        self.vehicle_status.motor1_pulse_count = circles
+        self.sequence_trackers[0x622].update(rolling, timestamp, received)
+        self.vehicle_status.timestamp = timestamp
 
-    def on_motor_fb2_623(self, data):
+    def on_motor_fb2_623(self, signals, timestamp, received):
         """
         处理 Motor Feedback 2 (0x623) 消息。
         """
-        circles = (data[0] << 24 | data[1] << 16 | data[2] << 8 | data[3]) * 1.0
-        rolling = data[4] & 0x0F
+        circles, rolling = signals
 
-        self.log.debug(
-            f"Motor Feedback 2 (0x623): "
-            f"Circles: {circles:.6f} revolutions, "
-            f"Rolling: {rolling}"
-        )
-        self.motor2_pulse_count = circles
-        self.vehicle_status.timestamp = time.time()
+        self.vehicle_status.motor2_pulse_count = circles
+        self.sequence_trackers[0x623].update(rolling, timestamp, received)
+        self.vehicle_status.timestamp = timestamp
     
     def get_vehicle_status(self):
-        self.log.debug(f"update vehicle status, time:{self.vehicle_status.timestamp}")
-        return self.vehicle_status
+        """
+        返回最新的不可变快照 (VehicleStatusSnapshot), 可在任意线程调用。
+        """
+        status = self.status_publisher.latest()
+        self.log.debug("update vehicle status, time:%s", status.timestamp)
+        return status
+
+    def wait_vehicle_status(self, version, timeout=None):
+        """
+        等待比 version 更新的快照, 超时返回 None。
+        """
+        return self.status_publisher.wait_newer(version, timeout)
+
+    def get_frame_stats(self):
+        """
+        返回 {frame_id: 统计摘要}, 参见 SequenceTracker.summary。
+        """
+        return {frame_id: tracker.summary() for frame_id, tracker in self.sequence_trackers.items()}
+
+    def reset_frame_stats(self):
+        for tracker in self.sequence_trackers.values():
+            tracker.reset()
 
 class LMTCanCommandHandler:
-    def __init__(self, log):
+    def __init__(self, log, dbc_path=None, tracer=None, timebase=None):
         # 默认命令值
         self.wheelbase = 1.0
         # 0x520 
@@ -138,6 +287,20 @@ class LMTCanCommandHandler:
 
         self.reset_can_msg = False      # 是否重置 CAN message
         self.log = log
+        self.tracer = tracer or NULL_TRACER
+        self.timebase = timebase or DEFAULT_TIMEBASE
+
+        # ID -> 编码函数, 默认使用内置信号表, 指定 DBC 时使用生成的代码
+        if dbc_path is None:
+            self.command_encoders = {
+                frame_id: encoder.encode for frame_id, encoder in LMT_COMMAND_ENCODERS.items()
+            }
+        else:
+            self.command_encoders = load_lmt_dbc(dbc_path).ENCODERS
+        # 预分配的控制报文, 输入不变时跳过编码
+        self.command_cache = CommandMessageCache(
+            self.command_encoders, LMT_COMMAND_FRAMES, self.tracer, self.timebase
+        )
 
     def send_drive_command(self, speed, steering_angle, rolling):
         """
@@ -181,10 +344,7 @@ class LMTCanCommandHandler:
             target_cur = 0.0
             rolling = 0
 
-        msg = can.Message(arbitration_id=0x520, dlc=8, is_extended_id=False)
-        msg.timestamp = time.time()  
-        msg.data = self._pack_motor_ctrlcmd_data(self, workmod_req=workmod_req, target_spd=-target_spd, target_cur=-target_cur, rolling=rolling, motor_num=1)
-        return msg
+        return self._pack_motor_ctrlcmd_data(self, workmod_req=workmod_req, target_spd=-target_spd, target_cur=-target_cur, rolling=rolling, motor_num=1)
 
     def send_motor_ctrlcmd_521(self, workmod_req=0, target_spd=0, target_cur=0, rolling=0):
         """
@@ -197,10 +357,7 @@ class LMTCanCommandHandler:
             target_cur = 0.0
             rolling = 0
 
-        msg = can.Message(arbitration_id=0x521, dlc=8, is_extended_id=False)
-        msg.timestamp = time.time()  
-        msg.data = self._pack_motor_ctrlcmd_data(self, workmod_req=workmod_req, target_spd=target_spd, target_cur=target_cur, rolling=rolling, motor_num=2)
-        return msg
+        return self._pack_motor_ctrlcmd_data(self, workmod_req=workmod_req, target_spd=target_spd, target_cur=target_cur, rolling=rolling, motor_num=2)
 
     @staticmethod
     def _pack_motor_ctrlcmd_data(self, workmod_req, target_spd, target_cur, rolling, motor_num):
@@ -223,19 +380,5 @@ class LMTCanCommandHandler:
             self.motor2_target_cur = target_cur
             self.motor2_rolling = rolling
 
-        data = bytearray(8)  # 创建一个 8 字节的字节数组
-
-        data[0] = workmod_req & 0x0F
-
-        target_spd_int = int(target_spd / 0.25)
-        data[4] = target_spd_int & 0xFF
-        data[3] = (target_spd_int >> 8) & 0xFF
-        
-        target_cur_int = int(target_cur / 0.0078125)
-        data[6] = target_cur_int & 0xFF
-        data[5] = (target_cur_int >> 8) & 0xFF
-
-        data[7] = rolling 
-        self.log.debug(f'workmod: {workmod_req}, target_spd:{target_spd_int}, target_cur:{target_cur_int}, rolling: {rolling}')
-        return data
-    
+        frame_id = 0x520 if motor_num == 1 else 0x521
+        return self.command_cache.encode(frame_id, (workmod_req & 0x0F, target_spd, target_cur, rolling))
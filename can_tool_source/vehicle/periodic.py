@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import copy
+import threading
+
+import can
+from can.broadcastmanager import ModifiableCyclicTaskABC, ThreadBasedCyclicSendTask
+
+
+class PeriodicCommandSender(object):
+    """
+    把一组控制报文注册为驱动层周期发送任务 (bus.send_periodic)。
+    SocketCAN 等支持的接口由内核 (BCM) 定时发送, 不受 GIL 和 Tk 卡顿影响;
+    不支持的接口 python-can 会退回到自带的线程定时发送 (native 为 False)。
+
+    每个报文 ID 一个任务。update() 传入最新的报文, payload 变化时通过 modify_data
+    整体替换该任务的报文; 任务内部持有报文副本, 调用方原地修改 can.Message 不会影响正在发送的数据。
+    """
+
+    def __init__(self, bus, log):
+        self.bus = bus
+        self.log = log
+        self._periods = None
+        self._tasks = {}  # frame_id -> (task, payload)
+        self._lock = threading.Lock()
+
+    @property
+    def native(self):
+        """
+        所有任务都由驱动/内核定时发送时为 True。
+        """
+        return bool(self._tasks) and not any(
+            isinstance(task, ThreadBasedCyclicSendTask) for task, _ in self._tasks.values()
+        )
+
+    def update(self, messages, period, rates=None):
+        """
+        同步周期任务: 新 ID 创建任务, payload 变化的 ID 调用 modify_data, 不再出现的 ID 停止。
+        :param period: 默认周期
+        :param rates: 可选的 {frame_id: 周期}, 覆盖默认周期
+        周期变化时重建全部任务。
+        :return: 本次新建或修改了任务的报文 (交给驱动的新 payload)
+        """
+        periods = (period, tuple(sorted(rates.items())) if rates else None)
+        with self._lock:
+            if periods != self._periods:
+                self._stop_tasks()
+                self._periods = periods
+
+            seen = set()
+            changed = []
+            for msg in messages:
+                frame_id = msg.arbitration_id
+                seen.add(frame_id)
+                payload = bytes(msg.data)
+                entry = self._tasks.get(frame_id)
+                task_period = rates.get(frame_id, period) if rates else period
+                if entry is None:
+                    task = self.bus.send_periodic(copy.deepcopy(msg), task_period)
+                    self._tasks[frame_id] = (task, payload)
+                    changed.append(msg)
+                    self.log.debug(
+                        "periodic task 0x%03X every %.3f s (%s)",
+                        frame_id, task_period, type(task).__name__,
+                    )
+                elif entry[1] != payload:
+                    task = entry[0]
+                    if isinstance(task, ModifiableCyclicTaskABC):
+                        task.modify_data(copy.deepcopy(msg))
+                    else:
+                        task.stop()
+                        task = self.bus.send_periodic(copy.deepcopy(msg), task_period)
+                    self._tasks[frame_id] = (task, payload)
+                    changed.append(msg)
+
+            for frame_id in [frame_id for frame_id in self._tasks if frame_id not in seen]:
+                self._tasks.pop(frame_id)[0].stop()
+        return changed
+
+    def stop(self):
+        """
+        停止全部周期任务。
+        """
+        with self._lock:
+            self._stop_tasks()
+            self._periods = None
+
+    def _stop_tasks(self):
+        for task, _ in self._tasks.values():
+            try:
+                task.stop()
+            except can.CanError as e:
+                self.log.error(f"stop periodic task failed: {e}")
+        self._tasks.clear()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+
+import numpy as np
+
+from vehicle.recording import RecordingReader, to_messages
+
+
+class RecordedTime(object):
+    """
+    记录文件的时间基: 记录中的时间戳已经是主机单调时钟 (见 FrameRecorder), 解码时不再映射。
+    """
+
+    now = staticmethod(time.monotonic)
+
+    @staticmethod
+    def to_host(timestamp):
+        return timestamp
+
+
+RECORDED_TIME = RecordedTime()
+
+
+class RecordingPlayback(object):
+    """
+    离线分析: 在记录文件上移动播放头, 只解码播放头需要的帧。
+
+    播放头处的车辆状态 = 每个反馈 ID 在播放头之前的最后一帧依次经报文处理类解码的结果,
+    通过 RecordingReader 的按 ID 索引定位, 与记录长度无关;
+    监视窗口只取播放头之前的 window_frames 帧, 曲线只在 points 个采样时刻求状态。
+    报文处理类与实时接收使用的相同 (handler_type, 如 HOOKE2CanReportHandler), 界面直接读取 handler 的快照。
+
+    打开时只做内存映射和加载索引缓存 (首次打开时建立索引), 与记录时长无关。
+    dbc_path 与实时接收相同, 指定时报文处理类用 DBC 生成的解码代替内置信号表。
+    """
+
+    def __init__(self, path, handler_type, log, window_frames=1000, dbc_path=None):
+        self.reader = RecordingReader(path)
+        self.path = path
+        self.handler_type = handler_type
+        self.window_frames = window_frames
+        self.handler = handler_type(log, dbc_path, timebase=RECORDED_TIME)
+        # 计算曲线用的处理类, 不影响界面显示的状态
+        self._scratch = handler_type(log, dbc_path, timebase=RECORDED_TIME)
+        self.index = 0
+        self.position = self.start_time or 0.0
+
+    @property
+    def start_time(self):
+        return self.reader.start_time
+
+    @property
+    def end_time(self):
+        return self.reader.end_time
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time if len(self.reader) else 0.0
+
+    def seek(self, timestamp):
+        """
+        移动播放头到 timestamp, 更新 handler 的车辆状态。
+        """
+        self.index = self.reader.index_of_time(timestamp)
+        self.position = timestamp
+        self._state_at(self.handler, self.index)
+
+    def _state_at(self, handler, index):
+        reader = self.reader
+        latest = []
+        for frame_id in handler.frame_ids:
+            indices = reader.frame_indices(frame_id, 0, index)
+            if len(indices):
+                latest.append(int(indices[-1]))
+        latest.sort()
+        self._reset(handler)
+        if latest:
+            handler.handle_messages(to_messages(reader.records[latest]))
+        else:
+            handler.publish_status()
+
+    @staticmethod
+    def _reset(handler):
+        # 状态从头计算, 避免保留播放头之后的帧的值
+        handler.vehicle_status.__init__()
+        if hasattr(handler, "ultrasonic"):
+            handler.ultrasonic.clear()
+        if hasattr(handler, "reset_frame_stats"):
+            handler.reset_frame_stats()
+
+    def window(self, frames=None):
+        """
+        播放头之前的最后 frames 帧 (can.Message 列表)。
+        """
+        frames = self.window_frames if frames is None else frames
+        return self.reader.messages(max(0, self.index - frames), self.index)
+
+    def history(self, fields, span, points=100):
+        """
+        播放头之前 span 秒内均匀取 points 个时刻的车辆状态字段 (早于记录起点的时刻跳过)。
+        各时刻每个 ID 的最后一帧由按 ID 索引一次 searchsorted 得到, 相邻时刻之间只解码变化的帧。
+        :return: {字段名: [值, ...]}
+        """
+        series = {field: [] for field in fields}
+        reader = self.reader
+        times = np.linspace(self.position - span, self.position, points)
+        stops = np.array([reader.index_of_time(timestamp) for timestamp in times if timestamp >= self.start_time])
+        if not len(stops):
+            return series
+        handler = self._scratch
+
+        # latest[i, k]: 第 i 个 ID 在第 k 个时刻之前的最后一帧序号, 没有时为 -1
+        rows = []
+        for frame_id in handler.frame_ids:
+            indices = reader.frame_indices(frame_id)
+            if not len(indices):
+                continue
+            position = np.searchsorted(indices, stops) - 1
+            rows.append(np.where(position >= 0, indices[np.maximum(position, 0)].astype(np.int64), -1))
+        if not rows:
+            return series
+        latest = np.array(rows, dtype=np.int64)
+        changed = latest >= 0
+        changed[:, 1:] &= latest[:, 1:] != latest[:, :-1]
+        wanted = np.unique(latest[changed])
+        messages = dict(zip(wanted.tolist(), to_messages(reader.records[wanted])))
+
+        self._reset(handler)
+        for column in range(len(stops)):
+            new = np.sort(latest[changed[:, column], column])
+            if len(new):
+                handler.handle_messages([messages[index] for index in new.tolist()])
+            snapshot = handler.status_publisher.latest()
+            for field in fields:
+                series[field].append(getattr(snapshot, field))
+        return series
+
+    def close(self):
+        self.reader.close()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import struct
+import threading
+from collections import deque
+
+import can
+
+from vehicle.timebase import DEFAULT_TIMEBASE
+
+RECORD_MAGIC = b"CANREC1\n"
+# 定长记录: 时间戳 (主机单调时钟), 报文 ID, 标志, DLC, 8 字节数据
+RECORD_FRAME = struct.Struct("<dIBB8s")
+
+# 标志位
+FLAG_EXTENDED = 0x01
+FLAG_TX = 0x02
+FLAG_REMOTE = 0x04
+FLAG_ERROR = 0x08
+
+RECORD_FORMATS = ("bin", "blf", "asc")
+
+
+class FrameRecorder(object):
+    """
+    原始收发帧记录。
+    record() 在 RX/TX 线程中调用, 只把帧的副本放入队列, 不做格式化和 IO, 不会阻塞调用线程;
+    后台线程定时把队列中的帧整块写入文件。
+    队列超过 max_pending 时丢弃新帧并计数 (dropped), 停止记录时报告。
+    时间戳统一为主机单调时钟: 接收帧由驱动时间戳经 timebase 映射, 发送帧取记录时刻。
+
+    文件格式由扩展名决定:
+        .blf / .asc: python-can 的 BLFWriter / ASCWriter, 可用 CANalyzer 等工具打开
+        其他: RECORD_MAGIC 后接定长 RECORD_FRAME 记录, 写入开销最小, 用 read_recording() 读取
+    """
+
+    def __init__(self, max_pending=200_000, flush_interval=0.1, buffer_size=4 << 20, timebase=None):
+        self.timebase = timebase or DEFAULT_TIMEBASE
+        self.enabled = False
+        self.path = None
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self._pending = deque()
+        self._file = None
+        self._writer = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self, path):
+        """
+        开始记录到 path。
+        """
+        if self._thread is not None:
+            self.stop()
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".blf":
+            self._writer = can.BLFWriter(path)
+        elif extension == ".asc":
+            self._writer = can.ASCWriter(path)
+        else:
+            self._file = open(path, "wb", buffering=self.buffer_size)
+            self._file.write(RECORD_MAGIC)
+        self.path = path
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._writer_handler, name="frame-recorder", daemon=True)
+        self._thread.start()
+        self.enabled = True
+
+    def stop(self):
+        """
+        停止记录, 写完队列中剩余的帧并关闭文件。
+        """
+        self.enabled = False
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._writer is not None:
+            self._writer.stop()
+            self._writer = None
+
+    def record(self, msgs, flags=0):
+        """
+        热路径: 记录一批帧 (默认为接收帧)。
+        接收帧只应在 RX 线程中记录 (见 TimeBase.to_host)。
+        """
+        if not self.enabled:
+            return
+        pending = self._pending
+        if len(pending) >= self.max_pending:
+            self.dropped += len(msgs)
+            return
+        if flags & FLAG_TX:
+            now = self.timebase.now()
+            stamp = lambda _timestamp: now
+        else:
+            stamp = self.timebase.to_host
+        pending.extend([
+            (
+                stamp(msg.timestamp),
+                msg.arbitration_id,
+                flags
+                | (FLAG_EXTENDED if msg.is_extended_id else 0)
+                | (FLAG_REMOTE if msg.is_remote_frame else 0)
+                | (FLAG_ERROR if msg.is_error_frame else 0),
+                msg.dlc,
+                bytes(msg.data),
+            )
+            for msg in msgs
+        ])
+        self.recorded += len(msgs)
+
+    def record_tx(self, msgs):
+        """
+        记录一批发送帧。
+        """
+        self.record(msgs, FLAG_TX)
+
+    def _writer_handler(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        pending = self._pending
+        count = 0
+        if self._writer is not None:
+            on_message = self._writer.on_message_received
+            while pending:
+                on_message(_to_message(pending.popleft()))
+                count += 1
+        else:
+            chunk = bytearray()
+            pack = RECORD_FRAME.pack
+            while pending:
+                timestamp, frame_id, flags, dlc, data = pending.popleft()
+                chunk += pack(timestamp or 0.0, frame_id, flags, dlc, data)
+                count += 1
+            if chunk:
+                self._file.write(chunk)
+        self.written += count
+
+    def summary(self):
+        return {
+            "path": self.path,
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "pending": len(self._pending),
+        }
+
+
+def _to_message(record):
+    timestamp, frame_id, flags, dlc, data = record
+    return can.Message(
+        timestamp=timestamp or 0.0,
+        arbitration_id=frame_id,
+        is_extended_id=bool(flags & FLAG_EXTENDED),
+        is_remote_frame=bool(flags & FLAG_REMOTE),
+        is_error_frame=bool(flags & FLAG_ERROR),
+        is_rx=not (flags & FLAG_TX),
+        dlc=dlc,
+        data=data[:dlc],
+        check=False,
+    )
+
+
+def read_recording(path):
+    """
+    读取二进制记录文件, 逐条返回 can.Message (is_rx 区分收发)。
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    if not content.startswith(RECORD_MAGIC):
+        raise ValueError(f"{path} is not a CAN recording")
+    body = memoryview(content)[len(RECORD_MAGIC):]
+    # 记录中途停止时最后一条可能不完整
+    body = body[:len(body) - len(body) % RECORD_FRAME.size]
+    for record in RECORD_FRAME.iter_unpack(body):
+        yield _to_message(record)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+import can
+import numpy as np
+
+from vehicle.recorder import RECORD_FRAME, RECORD_MAGIC, FLAG_EXTENDED, FLAG_REMOTE, FLAG_ERROR, FLAG_TX
+
+# 与 RECORD_FRAME ("<dIBB8s") 相同的内存布局
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("frame_id", "<u4"),
+    ("flags", "u1"),
+    ("dlc", "u1"),
+    ("data", "u1", (8,)),
+])
+assert RECORD_DTYPE.itemsize == RECORD_FRAME.size
+
+INDEX_VERSION = 1
+
+
+class RecordingReader(object):
+    """
+    二进制记录文件 (FrameRecorder 的 .bin 格式) 的内存映射读取。
+
+    records 是整个文件的 numpy 结构化数组视图, 不读入内存; 按时间取区间返回其切片 (零拷贝)。
+    首次打开时建立索引并保存在旁边的 <path>.idx.npz 和 <path>.offsets.npy 中,
+    之后打开只加载索引 (offsets 也是内存映射), 与文件大小无关:
+        时间检查点: 每 checkpoint_every 帧一块, 记录到该块为止的最大时间戳 (单调不减),
+                    收发帧交错导致时间戳局部乱序时仍可二分查找
+        按 ID 的帧序号: 所有帧序号按 ID 稳定排序后的数组, 每个 ID 对应其中一段
+    记录文件大小或修改时间变化 (例如仍在记录中) 时重新建立索引。
+    """
+
+    def __init__(self, path, checkpoint_every=4096, use_index_cache=True):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        with open(path, "rb") as f:
+            if f.read(len(RECORD_MAGIC)) != RECORD_MAGIC:
+                raise ValueError(f"{path} is not a CAN recording")
+        stat = os.stat(path)
+        count = (stat.st_size - len(RECORD_MAGIC)) // RECORD_DTYPE.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=len(RECORD_MAGIC), shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+        self.stamp = np.array([stat.st_size, stat.st_mtime_ns, count, checkpoint_every, INDEX_VERSION], dtype=np.int64)
+        self.index_path = f"{path}.idx.npz"
+        self.offsets_path = f"{path}.offsets.npy"
+        if not (use_index_cache and self._load_index()):
+            self._build_index()
+            if use_index_cache:
+                self._save_index()
+
+    def _load_index(self):
+        try:
+            with np.load(self.index_path) as index:
+                if not np.array_equal(index["stamp"], self.stamp):
+                    return False
+                self.checkpoints = index["checkpoints"]
+                self.frame_ids = index["frame_ids"]
+                self.id_starts = index["id_starts"]
+            self.offsets = np.load(self.offsets_path, mmap_mode="r")
+        except (OSError, KeyError, ValueError):
+            return False
+        return len(self.offsets) == len(self.records)
+
+    def _build_index(self):
+        records = self.records
+        count = len(records)
+        if not count:
+            self.checkpoints = np.empty(0)
+            self.frame_ids = np.empty(0, dtype=np.uint32)
+            self.id_starts = np.zeros(1, dtype=np.int64)
+            self.offsets = np.empty(0, dtype=np.uint32)
+            return
+        timestamps = np.asarray(records["timestamp"])
+        block_max = np.maximum.reduceat(timestamps, np.arange(0, count, self.checkpoint_every))
+        self.checkpoints = np.maximum.accumulate(block_max)
+
+        frame_ids = np.asarray(records["frame_id"])
+        offsets = np.argsort(frame_ids, kind="stable")
+        self.offsets = offsets.astype(np.uint32 if count < 1 << 32 else np.uint64)
+        self.frame_ids, starts = np.unique(frame_ids[offsets], return_index=True)
+        self.id_starts = np.append(starts, count).astype(np.int64)
+
+    def _save_index(self):
+        try:
+            np.save(self.offsets_path, self.offsets)
+            np.savez(
+                self.index_path,
+                stamp=self.stamp,
+                checkpoints=self.checkpoints,
+                frame_ids=self.frame_ids,
+                id_starts=self.id_starts,
+            )
+        except OSError:
+            # 只读目录: 不缓存索引, 下次打开重新建立
+            pass
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def start_time(self):
+        return float(self.records["timestamp"][0]) if len(self.records) else None
+
+    @property
+    def end_time(self):
+        return float(self.checkpoints[-1]) if len(self.checkpoints) else None
+
+    def index_of_time(self, timestamp):
+        """
+        第一个时间戳 >= timestamp 的帧序号, 没有时返回 len(self)。
+        """
+        block = int(np.searchsorted(self.checkpoints, timestamp, side="left"))
+        if block >= len(self.checkpoints):
+            return len(self.records)
+        start = block * self.checkpoint_every
+        chunk = np.asarray(self.records["timestamp"][start:start + self.checkpoint_every])
+        return start + int(np.argmax(chunk >= timestamp))
+
+    def time_range(self, start=None, end=None):
+        """
+        时间区间 [start, end) 内的帧 (按文件顺序), 返回 records 的切片视图。
+        """
+        first = self.index_of_time(start) if start is not None else 0
+        last = self.index_of_time(end) if end is not None else len(self.records)
+        return self.records[first:last]
+
+    def frame_indices(self, frame_id, first=0, last=None):
+        """
+        某个 ID 的帧序号 (升序), 可限定在帧序号区间 [first, last) 内。
+        """
+        position = int(np.searchsorted(self.frame_ids, frame_id))
+        if position >= len(self.frame_ids) or self.frame_ids[position] != frame_id:
+            return self.offsets[0:0]
+        indices = self.offsets[self.id_starts[position]:self.id_starts[position + 1]]
+        if first or last is not None:
+            # 键转换为索引的类型, 否则 searchsorted 会把整个索引转换为 int64
+            key = indices.dtype.type
+            lo = np.searchsorted(indices, key(first))
+            hi = np.searchsorted(indices, key(last)) if last is not None else len(indices)
+            indices = indices[lo:hi]
+        return indices
+
+    def next_frame(self, frame_id, after=-1):
+        """
+        帧序号 after 之后该 ID 的下一帧序号, 没有时返回 None。
+        """
+        indices = self.frame_indices(frame_id, after + 1)
+        return int(indices[0]) if len(indices) else None
+
+    def frames(self, frame_id, start=None, end=None):
+        """
+        某个 ID 在时间区间 [start, end) 内的帧; 按 ID 取帧需要按序号收集, 返回副本。
+        """
+        first = self.index_of_time(start) if start is not None else 0
+        last = self.index_of_time(end) if end is not None else None
+        return self.records[self.frame_indices(frame_id, first, last)]
+
+    def messages(self, first=0, last=None):
+        """
+        帧序号区间内的 can.Message 列表。
+        """
+        return to_messages(self.records[first:last])
+
+    def close(self):
+        """
+        释放内存映射 (调用方仍持有的切片视图会保持映射直到被释放)。
+        """
+        self.records = np.empty(0, dtype=RECORD_DTYPE)
+        self.offsets = np.empty(0, dtype=np.uint32)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def to_messages(records):
+    """
+    把 RECORD_DTYPE 记录 (切片或按序号取出的副本) 转换为 can.Message 列表。
+    """
+    data = records["data"]
+    return [
+        can.Message(
+            timestamp=timestamp,
+            arbitration_id=frame_id,
+            is_extended_id=bool(flags & FLAG_EXTENDED),
+            is_remote_frame=bool(flags & FLAG_REMOTE),
+            is_error_frame=bool(flags & FLAG_ERROR),
+            is_rx=not (flags & FLAG_TX),
+            dlc=dlc,
+            data=data[row, :dlc].tobytes(),
+            check=False,
+        )
+        for row, (timestamp, frame_id, flags, dlc) in enumerate(zip(
+            records["timestamp"].tolist(), records["frame_id"].tolist(),
+            records["flags"].tolist(), records["dlc"].tolist(),
+        ))
+    ]
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import time
+
+import can
+import numpy as np
+
+from vehicle.frame_stats import Histogram
+from vehicle.recorder import FLAG_TX
+from vehicle.recording import RecordingReader, to_messages
+from vehicle.timebase import DEFAULT_TIMEBASE
+
+
+class ReplaySource(object):
+    """
+    回放的帧来源, 按文件顺序逐条返回 (记录时间戳, can.Message)。
+    .bin 记录使用 RecordingReader, ID 和方向过滤在 numpy 中完成; 其他格式 (BLF/ASC 等) 使用 can.LogReader。
+    """
+
+    def __init__(self, path, include=None, exclude=None, rx_only=False, chunk=4096):
+        self.path = path
+        self.include = set(include) if include else None
+        self.exclude = set(exclude) if exclude else None
+        self.rx_only = rx_only
+        self.chunk = chunk
+        self.reader = RecordingReader(path) if os.path.splitext(path)[1].lower() == ".bin" else None
+
+    def accept(self, frame_id, is_rx):
+        if self.include is not None and frame_id not in self.include:
+            return False
+        if self.exclude is not None and frame_id in self.exclude:
+            return False
+        return is_rx or not self.rx_only
+
+    def __iter__(self):
+        if self.reader is None:
+            for msg in can.LogReader(self.path):
+                if self.accept(msg.arbitration_id, msg.is_rx):
+                    yield msg.timestamp, msg
+            return
+
+        records = self.reader.records
+        mask = np.ones(len(records), dtype=bool)
+        if self.include is not None:
+            mask &= np.isin(records["frame_id"], list(self.include))
+        if self.exclude is not None:
+            mask &= ~np.isin(records["frame_id"], list(self.exclude))
+        if self.rx_only:
+            mask &= (records["flags"] & FLAG_TX) == 0
+        indices = np.flatnonzero(mask)
+        for start in range(0, len(indices), self.chunk):
+            for msg in to_messages(records[indices[start:start + self.chunk]]):
+                yield msg.timestamp, msg
+
+
+class ReplayEngine(object):
+    """
+    按记录时间回放到总线和/或接收监听函数。
+
+    第 i 帧的截止时间 = 起点 + (t_i - t_0) / speed (主机单调时钟), 与 DeadlineScheduler 相同,
+    先 sleep 到截止时间前 spin 秒再忙等, 误差不会累积; speed 为 0 或 None 时不等待 (尽快回放)。
+    已到期的帧合成一批 (最多 max_batch 帧): 逐帧 bus.send, 再整批交给 on_frames (如 RxDispatcher.dispatch),
+    这样回放帧和实时接收走同一条解码路径。
+    交给 on_frames 的帧时间戳改为实际发出时刻, 与实时接收的帧一致。
+
+    loop 为 True 时到结尾后从头再来, 时间轴连续。
+    """
+
+    def __init__(self, source, bus=None, on_frames=None, speed=1.0, loop=False, spin=0.0003,
+                 max_batch=256, timebase=None, log=None):
+        self.source = source
+        self.bus = bus
+        self.on_frames = on_frames
+        self.speed = speed
+        self.loop = loop
+        self.spin = spin
+        self.max_batch = max_batch
+        self.now = (timebase or DEFAULT_TIMEBASE).now
+        self.log = log
+        self.sent = 0
+        self.loops = 0
+        self.send_errors = 0
+        # 实际发出时刻相对截止时间的迟到量, 10 us 一个桶
+        self.lateness = Histogram(0.00001, 1000)
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        在后台线程中回放。
+        """
+        self.stop()
+        self._stop.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self.run, name="replay", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and not self.finished.is_set()
+
+    def run(self):
+        """
+        阻塞回放, 直到结束或 stop()。
+        """
+        try:
+            rate = self.speed if self.speed else float("inf")
+            start = None
+            elapsed = 0.0  # 之前各轮的记录时长
+            while not self._stop.is_set():
+                first = last = None
+                batch = []
+                for timestamp, msg in self.source:
+                    if self._stop.is_set():
+                        break
+                    if first is None:
+                        first = timestamp
+                        if start is None:
+                            start = self.now()
+                    last = timestamp
+                    deadline = start + (elapsed + timestamp - first) / rate
+                    # 已到期的帧并入当前批, 下一帧未到期时先发出当前批再等待
+                    if batch and (len(batch) >= self.max_batch or deadline > self.now()):
+                        self._emit(batch)
+                        batch = []
+                    if not batch:
+                        self._wait(deadline)
+                    batch.append(msg)
+                if batch and not self._stop.is_set():
+                    self._emit(batch)
+                if not self.loop or first is None:
+                    break
+                elapsed += last - first
+                self.loops += 1
+        finally:
+            self.finished.set()
+
+    def _wait(self, deadline):
+        if not self.speed:
+            return
+        remaining = deadline - self.now() - self.spin
+        if remaining > 0:
+            time.sleep(remaining)
+        while self.now() < deadline:
+            pass
+        self.lateness.add(max(0.0, self.now() - deadline))
+
+    def _emit(self, msgs):
+        if self.bus is not None:
+            for msg in msgs:
+                try:
+                    self.bus.send(msg)
+                except can.CanError as e:
+                    self.send_errors += 1
+                    if self.log is not None and self.send_errors == 1:
+                        self.log.error(f"replay: send failed {e}")
+        if self.on_frames is not None:
+            now = self.now()
+            for msg in msgs:
+                msg.timestamp = now
+            self.on_frames(msgs)
+        self.sent += len(msgs)
+
+    def summary(self):
+        """
+        返回统计摘要 (时间单位: 秒)。
+        """
+        return {
+            "sent": self.sent,
+            "loops": self.loops,
+            "send_errors": self.send_errors,
+            "lateness_mean": self.lateness.mean,
+            "lateness_max": self.lateness.maximum if self.lateness.count else None,
+            "lateness_p99": self.lateness.percentile(99),
+        }
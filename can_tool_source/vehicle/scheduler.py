@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+
+from vehicle.frame_stats import Histogram
+from vehicle.timebase import DEFAULT_TIMEBASE
+
+# 超时策略
+OVERRUN_SKIP = "skip"          # 跳过已错过的周期, 下一个截止时间仍在原网格上
+OVERRUN_CATCH_UP = "catch_up"  # 立即连续补发错过的周期 (最多 max_catch_up 个)
+OVERRUN_REALIGN = "realign"    # 以当前时刻为起点重新对齐网格
+
+
+class DeadlineScheduler(object):
+    """
+    基于绝对截止时间的周期调度器。
+    截止时间 = 起点 + n * period (主机单调时钟), 每周期的处理耗时不会累积成漂移;
+    先 sleep 到截止时间前 spin 秒, 再忙等到截止时间, 以减少 sleep 唤醒误差。
+
+    用法:
+        scheduler = DeadlineScheduler(0.01)
+        while running:
+            scheduler.wait()
+            do_cycle()
+    """
+
+    def __init__(self, period, spin=0.0003, overrun=OVERRUN_SKIP, max_catch_up=3, timebase=None):
+        if overrun not in (OVERRUN_SKIP, OVERRUN_CATCH_UP, OVERRUN_REALIGN):
+            raise ValueError(f"unknown overrun policy '{overrun}'")
+        self.period = period
+        self.spin = spin
+        self.overrun = overrun
+        self.max_catch_up = max_catch_up
+        self.now = (timebase or DEFAULT_TIMEBASE).now
+        self.deadline = None
+        self.cycles = 0
+        self.overruns = 0
+        self.skipped = 0
+        # 唤醒时刻相对截止时间的迟到量, 0.1 ms 一个桶
+        self.lateness = Histogram(0.0001, 200)
+
+    def set_period(self, period):
+        """
+        修改周期, 从下一个周期开始生效并重新对齐。
+        """
+        if period != self.period:
+            self.period = period
+            self.deadline = None
+
+    def reset(self):
+        """
+        重新开始 (例如停止发送后), 下一次 wait() 立即返回并以该时刻为起点。
+        """
+        self.deadline = None
+
+    def wait(self):
+        """
+        等待下一个截止时间, 返回本周期的迟到量 (秒)。
+        """
+        now = self.now()
+        if self.deadline is None:
+            self.deadline = now
+        elif now < self.deadline:
+            remaining = self.deadline - now - self.spin
+            if remaining > 0:
+                time.sleep(remaining)
+            while self.now() < self.deadline:
+                pass
+            now = self.now()
+        else:
+            # 上一周期的处理超出了时间片
+            self.overruns += 1
+            missed = int((now - self.deadline) / self.period)
+            if missed:
+                self._handle_missed(now, missed)
+
+        late = now - self.deadline
+        self.lateness.add(late)
+        self.cycles += 1
+        self.deadline += self.period
+        return late
+
+    def _handle_missed(self, now, missed):
+        if self.overrun == OVERRUN_SKIP:
+            self.deadline += missed * self.period
+            self.skipped += missed
+        elif self.overrun == OVERRUN_REALIGN:
+            self.deadline = now
+        elif missed > self.max_catch_up:
+            self.skipped += missed - self.max_catch_up
+            self.deadline += (missed - self.max_catch_up) * self.period
+
+    def summary(self):
+        """
+        返回统计摘要 (时间单位: 秒)。
+        """
+        return {
+            "period": self.period,
+            "cycles": self.cycles,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "lateness_mean": self.lateness.mean,
+            "lateness_max": self.lateness.maximum if self.lateness.count else None,
+            "lateness_p99": self.lateness.percentile(99),
+        }
+
+    def reset_stats(self):
+        self.cycles = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.lateness.reset()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+记录导出为按信号的列存表: 把 .bin 记录按帧数切块, 在进程池中批量解码 (decode_batch),
+每个反馈报文一张表, 列为 timestamp 和该报文的全部信号 (包括车辆状态中没有的轮速、超声波、BMS 电压/电流等)。
+
+输出格式:
+    npz:     单个文件, 键为 "0x505.timestamp", "0x505.vehicle_speed", ...
+    parquet: 目录, 每个报文一个 0x505.parquet (需要 pyarrow), 每块写一个 row group
+
+每块的解码结果缓存为 <cache_dir>/<key>.npz,
+key = sha1(导出格式版本 + 信号表 + 块内容), 记录文件或信号定义不变时再次导出只读缓存;
+记录仍在增长时只有变化的最后一块重新解码。
+另外按 (记录路径, 文件大小, 修改时间, 块区间) 记下每块对应的 key (<stamp>.ref, 与 RecordingReader
+判断索引是否过期的方式相同), 记录文件没有变化时再次导出不读取记录、不计算哈希。
+
+缓存超过 max_cache_bytes 时按最近使用时间 (命中时更新 mtime) 删除最旧的块, 本次导出用到的块保留。
+"""
+
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from vehicle.batch_decode import REPORT_FRAMES, decode_batch
+from vehicle.recorder import RECORD_MAGIC
+from vehicle.recording import RECORD_DTYPE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# 缓存格式版本, 修改解码或缓存内容时递增以废弃旧缓存
+EXPORT_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "can_tool", "signals")
+
+# 缓存大小上限, 超过时按最近使用时间淘汰
+DEFAULT_CACHE_BYTES = 2 << 30
+
+EXPORT_FORMATS = ("npz", "parquet")
+
+
+def decoder_digest(frames):
+    """
+    信号表的摘要, 与 EXPORT_VERSION 一起作为缓存键的一部分。
+    """
+    digest = hashlib.sha1()
+    digest.update(f"v{EXPORT_VERSION}\n".encode())
+    digest.update(repr(sorted((frame_id, tuple(signals)) for frame_id, (_, signals) in frames.items())).encode())
+    return digest.hexdigest()
+
+
+def _stamp_key(path, stat, first, last, decoder_key):
+    """
+    不读取记录内容的块键: 记录路径、大小、修改时间和块区间, 与 RecordingReader.stamp 一样
+    以文件大小和修改时间判断记录是否变化。
+    """
+    digest = hashlib.sha1(decoder_key.encode())
+    digest.update(f"{os.path.abspath(path)}\n{stat.st_size}\n{stat.st_mtime_ns}\n{first}\n{last}".encode())
+    return digest.hexdigest()
+
+
+def _lookup_stamp(cache_dir, stamp_key):
+    """
+    由块键找到缓存的解码结果并更新其使用时间, 没有 (或已被淘汰) 时返回 None。
+    """
+    try:
+        with open(os.path.join(cache_dir, f"{stamp_key}.ref")) as f:
+            cache_path = os.path.join(cache_dir, f.read().strip())
+        os.utime(cache_path)
+    except OSError:
+        return None
+    return cache_path
+
+
+def _write_stamp(cache_dir, stamp_key, cache_path):
+    ref_path = os.path.join(cache_dir, f"{stamp_key}.ref")
+    tmp_path = f"{ref_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(os.path.basename(cache_path))
+    os.replace(tmp_path, ref_path)
+
+
+def _decode_chunk(path, first, last, frames, decoder_key, cache_dir):
+    """
+    进程池任务: 解码帧序号区间 [first, last) 并写入缓存, 只返回缓存文件路径, 不在进程间传递数据。
+    """
+    with open(path, "rb") as f:
+        f.seek(len(RECORD_MAGIC) + first * RECORD_DTYPE.itemsize)
+        content = f.read((last - first) * RECORD_DTYPE.itemsize)
+    digest = hashlib.sha1(decoder_key.encode())
+    digest.update(content)
+    cache_path = os.path.join(cache_dir, f"{digest.hexdigest()}.npz")
+    if os.path.exists(cache_path):
+        os.utime(cache_path)
+        return cache_path, True
+
+    records = np.frombuffer(content, dtype=RECORD_DTYPE)
+    columns = decode_batch(records["timestamp"], records["frame_id"], records["data"], frames)
+    arrays = {
+        f"{frame_id:#05x}.{name}": column
+        for frame_id, frame_columns in columns.items()
+        for name, column in frame_columns.items()
+    }
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, cache_path)
+    return cache_path, False
+
+
+def export_signals(
+    path, output, fmt="npz", workers=None, chunk_frames=1 << 20, cache_dir=None, frames=None,
+    max_cache_bytes=DEFAULT_CACHE_BYTES,
+):
+    """
+    把 .bin 记录导出为按信号的列存表。
+    :param output: npz 为文件路径, parquet 为目录
+    :param workers: 进程数, 默认为 CPU 核数
+    :param frames: 信号表 {frame_id: (name, signals)}, 默认为全部 Hooke2 + LMT 反馈报文
+    :param max_cache_bytes: 导出后缓存目录的大小上限, None 为不限制
+    :return: 统计摘要
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format {fmt}, expected one of {EXPORT_FORMATS}")
+    if fmt == "parquet" and pq is None:
+        raise RuntimeError("parquet export requires pyarrow")
+    frames = REPORT_FRAMES if frames is None else frames
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, "rb") as f:
+        if f.read(len(RECORD_MAGIC)) != RECORD_MAGIC:
+            raise ValueError(f"{path} is not a CAN recording")
+    stat = os.stat(path)
+    # 记录中途停止时最后一条可能不完整
+    count = (stat.st_size - len(RECORD_MAGIC)) // RECORD_DTYPE.itemsize
+    decoder_key = decoder_digest(frames)
+
+    start = time.perf_counter()
+    bounds = [(first, min(first + chunk_frames, count)) for first in range(0, count, chunk_frames)]
+    stamp_keys = [_stamp_key(path, stat, first, last, decoder_key) for first, last in bounds]
+    # 记录文件没有变化的块直接取缓存, 只有其余的块读取记录 (内容相同时仍命中缓存)
+    results = [(_lookup_stamp(cache_dir, stamp_key), True) for stamp_key in stamp_keys]
+    missing = [position for position, (cache_path, _) in enumerate(results) if cache_path is None]
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                position: pool.submit(_decode_chunk, path, *bounds[position], frames, decoder_key, cache_dir)
+                for position in missing
+            }
+            for position, future in futures.items():
+                results[position] = future.result()
+                _write_stamp(cache_dir, stamp_keys[position], results[position][0])
+    decoded = time.perf_counter()
+
+    chunk_paths = [cache_path for cache_path, _ in results]
+    if fmt == "npz":
+        rows = _write_npz(chunk_paths, output, frames)
+    else:
+        rows = _write_parquet(chunk_paths, output, frames)
+    evicted = 0
+    if max_cache_bytes is not None:
+        evicted = evict_cache(cache_dir, max_cache_bytes, keep=chunk_paths)
+    return {
+        "frames": count,
+        "chunks": len(results),
+        "cached": sum(1 for _, cached in results if cached),
+        "read": len(missing),
+        "evicted": evicted,
+        "rows": rows,
+        "decode_time": decoded - start,
+        "write_time": time.perf_counter() - decoded,
+    }
+
+
+def evict_cache(cache_dir=None, max_bytes=DEFAULT_CACHE_BYTES, keep=()):
+    """
+    缓存超过 max_bytes 时按使用时间 (mtime) 从旧到新删除解码结果, keep 中的文件不删除;
+    再删除指向已删除结果的 .ref。
+    :return: 删除的解码结果个数
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    keep = {os.path.abspath(cache_path) for cache_path in keep}
+    entries = []
+    refs = []
+    with os.scandir(cache_dir) as scan:
+        for entry in scan:
+            if entry.name.endswith(".npz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            elif entry.name.endswith(".ref"):
+                refs.append(entry.path)
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for _, size, cache_path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if os.path.abspath(cache_path) in keep:
+            continue
+        try:
+            os.remove(cache_path)
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    if evicted:
+        for ref_path in refs:
+            try:
+                with open(ref_path) as f:
+                    target = f.read().strip()
+                if not os.path.exists(os.path.join(cache_dir, target)):
+                    os.remove(ref_path)
+            except OSError:
+                pass
+    return evicted
+
+
+def clear_cache(cache_dir=None):
+    """
+    删除全部缓存的解码结果。
+    :return: 删除的文件个数
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return 0
+    removed = 0
+    with os.scandir(cache_dir) as scan:
+        for entry in scan:
+            if entry.name.endswith((".npz", ".ref", ".tmp")):
+                os.remove(entry.path)
+                removed += 1
+    return removed
+
+
+def _frame_columns(chunk, frame_id, signals):
+    """
+    一块缓存中某报文的列 (timestamp + 信号), 该块没有该报文时返回 None。
+    """
+    prefix = f"{frame_id:#05x}."
+    if f"{prefix}timestamp" not in chunk:
+        return None
+    return {name: chunk[f"{prefix}{name}"] for name in ["timestamp"] + [signal.name for signal in signals]}
+
+
+def _write_npz(chunk_paths, output, frames):
+    parts = {}
+    for chunk_path in chunk_paths:
+        with np.load(chunk_path) as chunk:
+            for frame_id, (_, signals) in frames.items():
+                columns = _frame_columns(chunk, frame_id, signals)
+                if columns is not None:
+                    parts.setdefault(frame_id, []).append(columns)
+    arrays = {}
+    rows = {}
+    for frame_id, chunks in sorted(parts.items()):
+        for name in chunks[0]:
+            arrays[f"{frame_id:#05x}.{name}"] = np.concatenate([columns[name] for columns in chunks])
+        rows[frame_id] = len(arrays[f"{frame_id:#05x}.timestamp"])
+    with open(output, "wb") as f:
+        np.savez(f, **arrays)
+    return rows
+
+
+def _write_parquet(chunk_paths, output, frames):
+    os.makedirs(output, exist_ok=True)
+    writers = {}
+    rows = {}
+    try:
+        for chunk_path in chunk_paths:
+            with np.load(chunk_path) as chunk:
+                for frame_id, (name, signals) in frames.items():
+                    columns = _frame_columns(chunk, frame_id, signals)
+                    if columns is None:
+                        continue
+                    table = pa.table(columns)
+                    writer = writers.get(frame_id)
+                    if writer is None:
+                        schema = table.schema.with_metadata({"frame_id": f"{frame_id:#05x}", "name": name})
+                        writer = pq.ParquetWriter(os.path.join(output, f"{frame_id:#05x}.parquet"), schema)
+                        writers[frame_id] = writer
+                    writer.write_table(table)
+                    rows[frame_id] = rows.get(frame_id, 0) + table.num_rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return rows
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import operator
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from vehicle.batch_decode import REPORT_FRAMES, decode_batch
+
+SUMMARY_VERSION = 1
+
+# 每次解码的最大帧数, 限制建立摘要和查询时的内存占用
+DECODE_ROWS = 1 << 20
+
+COMPARISONS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# 条件: frame_id 报文的 signal 信号 (物理值) 与 value 比较
+Condition = namedtuple("Condition", ["frame_id", "signal", "op", "value"])
+
+_CONDITION_PATTERN = re.compile(r"^\s*([\w.]+)\s*(>=|<=|==|!=|>|<)\s*(\S+)\s*$")
+
+
+def resolve_signal(name, frames=None):
+    """
+    信号名 -> (frame_id, 信号名)。
+    多个报文有同名信号 (如 LMT 两个电机的 cur_fb) 时需写成 "0x620.cur_fb"。
+    """
+    frames = REPORT_FRAMES if frames is None else frames
+    prefix, _, signal = name.rpartition(".")
+    if prefix:
+        frame_id = int(prefix, 0)
+        if frame_id not in frames or signal not in (s.name for s in frames[frame_id][1]):
+            raise ValueError(f"unknown signal {name}")
+        return frame_id, signal
+    matches = [frame_id for frame_id, (_, signals) in frames.items() if any(s.name == signal for s in signals)]
+    if not matches:
+        raise ValueError(f"unknown signal {name}")
+    if len(matches) > 1:
+        choices = ", ".join(f"{frame_id:#05x}.{signal}" for frame_id in matches)
+        raise ValueError(f"ambiguous signal {name}, use one of {choices}")
+    return matches[0], signal
+
+
+def parse_condition(text, frames=None):
+    """
+    解析 "vehicle_speed > 1.4" / "0x620.cur_fb <= -2" 形式的条件。
+    """
+    match = _CONDITION_PATTERN.match(text)
+    if match is None:
+        raise ValueError(f"invalid condition {text!r}")
+    name, op, value = match.groups()
+    frame_id, signal = resolve_signal(name, frames)
+    return Condition(frame_id, signal, op, float(value))
+
+
+class SignalSummary(object):
+    """
+    记录文件按块的信号摘要: 每块 (chunk 帧, 与 RecordingReader 的时间检查点相同) 每个报文的帧数,
+    以及每个信号物理值的最小/最大值。没有该报文的块最小值为 inf、最大值为 -inf, 任何比较都不会命中。
+
+    首次使用时用批量解码建立 (每个 ID 的帧由 RecordingReader 的按 ID 索引取出, 不解码其他报文),
+    保存在 <path>.sum.npz 中, 记录文件或索引变化时重新建立。
+    """
+
+    def __init__(self, reader, frames=None, use_cache=True):
+        self.reader = reader
+        self.frames = REPORT_FRAMES if frames is None else frames
+        self.chunk = reader.checkpoint_every
+        self.chunks = len(reader.checkpoints)
+        self.path = f"{reader.path}.sum.npz"
+        self.frame_ids = np.array(sorted(self.frames), dtype=np.uint32)
+        # 信号行号: (frame_id, 信号名) -> minimum/maximum 的行
+        self.signal_rows = {}
+        for frame_id in self.frame_ids.tolist():
+            for signal in self.frames[frame_id][1]:
+                self.signal_rows[(frame_id, signal.name)] = len(self.signal_rows)
+        self.stamp = np.append(reader.stamp, [SUMMARY_VERSION, len(self.signal_rows)])
+        if not (use_cache and self._load()):
+            self._build()
+            if use_cache:
+                self._save()
+
+    def _load(self):
+        try:
+            with np.load(self.path) as summary:
+                if not np.array_equal(summary["stamp"], self.stamp):
+                    return False
+                if not np.array_equal(summary["frame_ids"], self.frame_ids):
+                    return False
+                self.counts = summary["counts"]
+                self.minimum = summary["minimum"]
+                self.maximum = summary["maximum"]
+        except (OSError, KeyError, ValueError):
+            return False
+        return True
+
+    def _build(self):
+        reader = self.reader
+        chunk = self.chunk
+        self.counts = np.zeros((len(self.frame_ids), self.chunks), dtype=np.int32)
+        self.minimum = np.full((len(self.signal_rows), self.chunks), np.inf)
+        self.maximum = np.full((len(self.signal_rows), self.chunks), -np.inf)
+        for position, frame_id in enumerate(self.frame_ids.tolist()):
+            frame = {frame_id: self.frames[frame_id]}
+            indices = reader.frame_indices(frame_id)
+            for start in range(0, len(indices), DECODE_ROWS):
+                rows = np.asarray(indices[start:start + DECODE_ROWS], dtype=np.int64)
+                records = reader.records[rows]
+                columns = decode_batch(records["timestamp"], records["frame_id"], records["data"], frame)[frame_id]
+                # 帧序号升序, 同一块的帧是连续的一段
+                blocks, starts, sizes = np.unique(rows // chunk, return_index=True, return_counts=True)
+                self.counts[position, blocks] += sizes
+                for signal in self.frames[frame_id][1]:
+                    row = self.signal_rows[(frame_id, signal.name)]
+                    values = columns[signal.name]
+                    # 一块的帧可能跨两次解码, 与已有结果合并
+                    np.minimum.at(self.minimum[row], blocks, np.minimum.reduceat(values, starts))
+                    np.maximum.at(self.maximum[row], blocks, np.maximum.reduceat(values, starts))
+
+    def _save(self):
+        try:
+            np.savez(
+                self.path,
+                stamp=self.stamp,
+                frame_ids=self.frame_ids,
+                counts=self.counts,
+                minimum=self.minimum,
+                maximum=self.maximum,
+            )
+        except OSError:
+            pass
+
+    def frame_counts(self, frame_id):
+        position = int(np.searchsorted(self.frame_ids, frame_id))
+        return self.counts[position]
+
+    def may_match(self, condition):
+        """
+        每块是否可能满足条件 (bool 数组)。
+        信号在两帧之间保持上一帧的值, 所以一块除了块内的帧, 还要考虑进入该块时保持的值,
+        即之前最后一个有该报文的块的范围。
+        """
+        row = self.signal_rows[(condition.frame_id, condition.signal)]
+        low, high, value = self.minimum[row], self.maximum[row], condition.value
+        op = condition.op
+        if op in (">", ">="):
+            possible = COMPARISONS[op](high, value)
+        elif op in ("<", "<="):
+            possible = COMPARISONS[op](low, value)
+        elif op == "==":
+            possible = (low <= value) & (value <= high)
+        else:
+            # 块内所有值都等于 value 时才不可能满足 "!="
+            possible = (low != value) | (high != value)
+        chunks = np.arange(self.chunks)
+        present = self.frame_counts(condition.frame_id) > 0
+        possible &= present
+        # 之前最后一个有该报文的块
+        previous = np.maximum.accumulate(np.where(present, chunks, -1))
+        previous = np.concatenate(([-1], previous[:-1]))
+        held = np.zeros(self.chunks, dtype=bool)
+        has_previous = previous >= 0
+        held[has_previous] = possible[previous[has_previous]]
+        return possible | held
+
+
+class RecordingQuery(object):
+    """
+    在记录中查找所有条件同时成立的时间区间, 如 speed > 5 km/h 且 brake > 20 %:
+        query = RecordingQuery(reader)
+        query.find(["vehicle_speed > 1.39", "brake_pedal_actual > 20"])
+
+    每个信号在两帧之间保持上一帧的值 (与 RecordingPlayback 的状态一致)。
+    先用 SignalSummary 排除不可能满足的块, 只批量解码候选块中条件涉及的报文。
+    """
+
+    def __init__(self, reader, frames=None, use_cache=True):
+        self.reader = reader
+        self.frames = REPORT_FRAMES if frames is None else frames
+        self.summary = SignalSummary(reader, self.frames, use_cache)
+        self.candidate_chunks = 0
+
+    def find(self, conditions, min_duration=0.0):
+        """
+        :param conditions: Condition 或条件字符串 (见 parse_condition) 的列表, 全部成立时命中
+        :param min_duration: 忽略短于该时长 (秒) 的区间
+        :return: [(开始时间, 结束时间), ...]
+        """
+        conditions = [
+            parse_condition(condition, self.frames) if isinstance(condition, str) else condition
+            for condition in conditions
+        ]
+        reader = self.reader
+        if not conditions or not len(reader):
+            return []
+        candidates = np.ones(self.summary.chunks, dtype=bool)
+        for condition in conditions:
+            candidates &= self.summary.may_match(condition)
+        self.candidate_chunks = int(np.count_nonzero(candidates))
+
+        intervals = []
+        # 连续的候选块一起解码, 区间可以跨块
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], candidates.astype(np.int8), [0]))))
+        for first_chunk, last_chunk in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            first = first_chunk * self.summary.chunk
+            last = min(last_chunk * self.summary.chunk, len(reader))
+            # 每批最多 DECODE_ROWS 帧, 批之间只是事件序列的切分, 区间在最后合并
+            for start in range(first, last, DECODE_ROWS):
+                intervals.extend(self._scan(conditions, start, min(start + DECODE_ROWS, last)))
+        return [
+            (begin, end) for begin, end in _merge(intervals)
+            if end - begin >= min_duration
+        ]
+
+    def _scan(self, conditions, first, last):
+        """
+        帧序号区间 [first, last) 内条件成立的区间。
+        """
+        reader = self.reader
+        timestamps = reader.records["timestamp"]
+        signals = {}
+        for condition in conditions:
+            key = (condition.frame_id, condition.signal)
+            if key in signals:
+                continue
+            # 区间内的帧, 加上进入区间时保持的上一帧
+            indices = np.asarray(reader.frame_indices(condition.frame_id, first, last), dtype=np.int64)
+            before = reader.frame_indices(condition.frame_id, 0, first)
+            if len(before):
+                indices = np.concatenate(([int(before[-1])], indices))
+            records = reader.records[indices]
+            frame = {condition.frame_id: self.frames[condition.frame_id]}
+            columns = decode_batch(records["timestamp"], records["frame_id"], records["data"], frame)
+            values = columns[condition.frame_id][condition.signal] if columns else np.empty(0)
+            signals[key] = (indices, values)
+
+        # 事件: 任一条件涉及的报文到达 (以及区间起点), 事件之间所有信号保持不变
+        events = np.unique(np.concatenate(
+            [[first]] + [indices[indices >= first] for indices, _ in signals.values()]
+        ))
+        matched = np.ones(len(events), dtype=bool)
+        for condition in conditions:
+            indices, values = signals[(condition.frame_id, condition.signal)]
+            position = np.searchsorted(indices, events, side="right") - 1
+            valid = position >= 0
+            held = values[np.maximum(position, 0)] if len(values) else np.zeros(len(events))
+            matched &= valid & COMPARISONS[condition.op](held, condition.value)
+
+        # 成立段: 从成立的事件开始, 到下一个不成立的事件 (或区间末尾) 为止
+        change = np.diff(np.concatenate(([False], matched, [False])).astype(np.int8))
+        starts = np.flatnonzero(change == 1)
+        ends = np.flatnonzero(change == -1)
+        end_time = float(timestamps[last]) if last < len(reader) else reader.end_time
+        return [
+            (
+                float(timestamps[events[begin]]),
+                float(timestamps[events[end]]) if end < len(events) else end_time,
+            )
+            for begin, end in zip(starts.tolist(), ends.tolist())
+        ]
+
+
+def _merge(intervals):
+    """
+    合并首尾相接的区间 (相邻块或相邻批的结果)。
+    """
+    merged = []
+    for begin, end in intervals:
+        if merged and begin <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((begin, end))
+    return merged
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import struct
+from collections import namedtuple
+
+# 信号定义, 与 DBC 的位编号约定一致
+# byte_order="big" (Motorola): start_bit 为信号最高位 (MSB) 所在位置 = 字节号 * 8 + 字节内位号 (0-7)
+# byte_order="little" (Intel): start_bit 为信号最低位 (LSB) 所在位置
+# length: 信号位宽
+# 物理值 = 原始值 * scale + offset, 编码时先限制在 [minimum, maximum]
+Signal = namedtuple(
+    "Signal",
+    ["name", "start_bit", "length", "signed", "scale", "offset", "unit", "byte_order", "minimum", "maximum"],
+    defaults=(False, 1, 0, "", "big", None, None),
+)
+
+_BE_WORD = struct.Struct(">Q")
+_LE_WORD = struct.Struct("<Q")
+
+# 字节对齐信号可以直接用 struct 格式解包
+_ALIGNED_CODES = {
+    (8, False): "B",
+    (8, True): "b",
+    (16, False): "H",
+    (16, True): "h",
+    (32, False): "I",
+    (32, True): "i",
+}
+
+
+def lsb_shift(signal):
+    """
+    信号最低位在 64 位整数中的位置 (big: 大端整数, little: 小端整数)。
+    """
+    if signal.byte_order == "little":
+        return signal.start_bit
+    msb = (7 - signal.start_bit // 8) * 8 + signal.start_bit % 8
+    return msb - signal.length + 1
+
+
+def frame_size(signals):
+    """
+    信号表覆盖的最小字节数。
+    """
+    size = 0
+    for signal in signals:
+        if signal.byte_order == "little":
+            last = (signal.start_bit + signal.length - 1) // 8
+        else:
+            last = 7 - lsb_shift(signal) // 8
+        size = max(size, last + 1)
+    return size
+
+
+def _aligned_format(signals):
+    """
+    如果所有信号都是按字节对齐且按顺序排列，返回对应的 struct 格式，否则返回 None。
+    """
+    fmt = ">"
+    pos = 0
+    for signal in signals:
+        code = _ALIGNED_CODES.get((signal.length, signal.signed))
+        byte = signal.start_bit // 8
+        if code is None or signal.byte_order != "big" or signal.start_bit % 8 != 7 or byte < pos:
+            return None
+        fmt += "x" * (byte - pos) + code
+        pos = byte + signal.length // 8
+    return fmt
+
+
+class FrameDecoder(object):
+    """
+    预编译的帧解码器，由信号表一次性编译生成。
+    decode(data) 按信号表顺序返回物理值元组。
+    """
+    __slots__ = (
+        "frame_id",
+        "name",
+        "signals",
+        "names",
+        "scales",
+        "offsets",
+        "size",
+        "decode",
+        "_struct",
+        "_fields",
+        "_little",
+    )
+
+    def __init__(self, frame_id, name, signals):
+        self.frame_id = frame_id
+        self.name = name
+        self.signals = tuple(signals)
+        self.names = tuple(signal.name for signal in self.signals)
+        self.scales = tuple(signal.scale for signal in self.signals)
+        self.offsets = tuple(signal.offset for signal in self.signals)
+        self.size = frame_size(self.signals)
+        self._little = any(signal.byte_order == "little" for signal in self.signals)
+        self._fields = tuple(
+            (
+                signal.byte_order == "little",
+                lsb_shift(signal),
+                (1 << signal.length) - 1,
+                (1 << (signal.length - 1)) if signal.signed else 0,
+                signal.scale,
+                signal.offset,
+            )
+            for signal in self.signals
+        )
+
+        fmt = _aligned_format(self.signals)
+        if fmt is None:
+            self._struct = _BE_WORD
+            self.size = 8
+            self.decode = self._decode_mixed if self._little else self._decode_bits
+        else:
+            self._struct = struct.Struct(fmt)
+            if all(s == 1 and o == 0 for s, o in zip(self.scales, self.offsets)):
+                self.decode = self._decode_raw
+            else:
+                self.decode = self._decode_aligned
+
+    def _pad(self, data):
+        return bytes(data).ljust(self.size, b"\x00")
+
+    def _decode_raw(self, data):
+        if len(data) < self.size:
+            data = self._pad(data)
+        return self._struct.unpack_from(data)
+
+    def _decode_aligned(self, data):
+        if len(data) < self.size:
+            data = self._pad(data)
+        return tuple([
+            raw * scale + offset
+            for raw, scale, offset in zip(self._struct.unpack_from(data), self.scales, self.offsets)
+        ])
+
+    def _decode_bits(self, data):
+        if len(data) < 8:
+            data = self._pad(data)
+        word = self._struct.unpack_from(data)[0]
+        # (raw ^ sign) - sign: 无分支符号扩展, 无符号信号 sign 为 0
+        return tuple([
+            ((((word >> shift) & mask) ^ sign) - sign) * scale + offset
+            for _, shift, mask, sign, scale, offset in self._fields
+        ])
+
+    def _decode_mixed(self, data):
+        if len(data) < 8:
+            data = self._pad(data)
+        words = (_BE_WORD.unpack_from(data)[0], _LE_WORD.unpack_from(data)[0])
+        return tuple([
+            ((((words[little] >> shift) & mask) ^ sign) - sign) * scale + offset
+            for little, shift, mask, sign, scale, offset in self._fields
+        ])
+
+    def __repr__(self):
+        return f"FrameDecoder(0x{self.frame_id:03X}, {self.name!r}, {self.names})"
+
+
+class FrameEncoder(object):
+    """
+    预编译的帧编码器, 与 FrameDecoder 使用同一张信号表。
+    encode(values) 按信号表顺序接收物理值, 返回 bytearray。
+    """
+    __slots__ = ("frame_id", "name", "signals", "names", "size", "_fields")
+
+    def __init__(self, frame_id, name, signals, size=8):
+        self.frame_id = frame_id
+        self.name = name
+        self.signals = tuple(signals)
+        self.names = tuple(signal.name for signal in self.signals)
+        self.size = max(size, frame_size(self.signals))
+        self._fields = tuple(
+            (
+                signal.byte_order == "little",
+                lsb_shift(signal),
+                (1 << signal.length) - 1,
+                signal.scale,
+                signal.offset,
+                signal.minimum,
+                signal.maximum,
+            )
+            for signal in self.signals
+        )
+
+    def encode(self, values, data=None):
+        """
+        编码物理值; 传入 data 时原地写入, 否则新建 bytearray。
+        """
+        big = 0
+        little = 0
+        for value, (is_little, shift, mask, scale, offset, minimum, maximum) in zip(values, self._fields):
+            if minimum is not None and value < minimum:
+                value = minimum
+            if maximum is not None and value > maximum:
+                value = maximum
+            raw = (int((value - offset) / scale) & mask) << shift
+            if is_little:
+                little |= raw
+            else:
+                big |= raw
+        if little:
+            big |= int.from_bytes(little.to_bytes(8, "little"), "big")
+        if data is None:
+            data = bytearray(self.size)
+        data[:self.size] = big.to_bytes(8, "big")[:self.size]
+        return data
+
+    def __repr__(self):
+        return f"FrameEncoder(0x{self.frame_id:03X}, {self.name!r}, {self.names})"
+
+
+def compile_frames(frames):
+    """
+    将 {frame_id: (name, signals)} 信号表编译为 {frame_id: FrameDecoder}。
+    """
+    return {
+        frame_id: FrameDecoder(frame_id, name, signals)
+        for frame_id, (name, signals) in frames.items()
+    }
+
+
+def compile_encoders(frames):
+    """
+    将 {frame_id: (name, signals)} 信号表编译为 {frame_id: FrameEncoder}。
+    """
+    return {
+        frame_id: FrameEncoder(frame_id, name, signals)
+        for frame_id, (name, signals) in frames.items()
+    }
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import queue
+import threading
+from collections import namedtuple
+
+from vehicle.vehicle_status import VehicleStatus
+
+# 变化事件: name 为订阅时使用的名称, previous 为上一次通知时的值 (首次为 None)
+SignalChange = namedtuple("SignalChange", ["name", "value", "previous", "timestamp"])
+
+
+class Subscription(object):
+    """
+    一次订阅。未指定 callback 时事件放入 self.queue, 由消费者自行取出。
+    """
+
+    def __init__(self, watcher, callback):
+        self.watcher = watcher
+        self.queue = None if callback is not None else queue.SimpleQueue()
+        self.callback = callback if callback is not None else self.queue.put
+
+    def unsubscribe(self):
+        self.watcher.unsubscribe(self)
+
+
+class SignalWatcher(object):
+    """
+    解码信号/车辆状态的变化检测与订阅。
+
+    订阅名称可以是:
+        VehicleStatus 字段名, 如 "speed", "gear", "motor1_temperature"
+        信号表中的信号名, 如 "vehicle_speed"; 多个报文中同名的信号需写成 "0x620.cur_fb"
+    数值信号只有与上一次通知的值相差超过 deadband 时才通知, 非数值 (如档位字符串) 按不等比较。
+
+    没有订阅时报文处理类只多一次字典查找; 回调在 RX 线程中执行, 应尽量简短,
+    耗时的处理请使用队列订阅。
+    """
+
+    def __init__(self, frames):
+        """
+        :param frames: 信号表 {frame_id: (name, signals)}
+        """
+        self.frames = frames
+        # frame_id -> [[index, deadband, last, subscription, name], ...]
+        self.frame_watches = {}
+        # [[field_index, deadband, last, subscription, name], ...]
+        self.status_watches = []
+        self._status_version = 0
+        self._lock = threading.Lock()
+
+        self._signal_index = {}
+        ambiguous = set()
+        for frame_id, (_, signals) in frames.items():
+            for index, signal in enumerate(signals):
+                self._signal_index[f"0x{frame_id:03X}.{signal.name}".lower()] = (frame_id, index)
+                if signal.name in self._signal_index:
+                    ambiguous.add(signal.name)
+                self._signal_index[signal.name] = (frame_id, index)
+        for name in ambiguous:
+            del self._signal_index[name]
+        self._status_index = {name: index for index, name in enumerate(VehicleStatus.__slots__)}
+
+    def resolve(self, name):
+        """
+        返回 ("status", field_index) 或 (frame_id, signal_index), 未知名称抛出 KeyError。
+        """
+        if name in self._status_index:
+            return "status", self._status_index[name]
+        location = self._signal_index.get(name) or self._signal_index.get(name.lower())
+        if location is None:
+            raise KeyError(f"unknown or ambiguous signal '{name}'")
+        return location
+
+    def subscribe(self, names, callback=None, deadband=0.0):
+        """
+        订阅信号变化。
+        :param names: 信号名或信号名列表
+        :param callback: callback(SignalChange); 为 None 时事件放入返回对象的 queue
+        :param deadband: 统一死区, 或 {信号名: 死区}, 未列出的信号死区为 0
+        :return: Subscription
+        """
+        if isinstance(names, str):
+            names = [names]
+        subscription = Subscription(self, callback)
+        entries = []
+        for name in names:
+            band = deadband.get(name, 0.0) if isinstance(deadband, dict) else deadband
+            entries.append((self.resolve(name), [0, band, None, subscription, name]))
+
+        with self._lock:
+            frame_watches = {frame_id: list(watches) for frame_id, watches in self.frame_watches.items()}
+            status_watches = list(self.status_watches)
+            for (source, index), entry in entries:
+                entry[0] = index
+                if source == "status":
+                    status_watches.append(entry)
+                else:
+                    frame_watches.setdefault(source, []).append(entry)
+            # 整体替换, RX 线程遍历的列表不会被原地修改
+            self.frame_watches = frame_watches
+            self.status_watches = status_watches
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.frame_watches = {
+                frame_id: remaining
+                for frame_id, remaining in (
+                    (frame_id, [entry for entry in watches if entry[3] is not subscription])
+                    for frame_id, watches in self.frame_watches.items()
+                )
+                if remaining
+            }
+            self.status_watches = [entry for entry in self.status_watches if entry[3] is not subscription]
+
+    def check_frame(self, watches, signals, timestamp):
+        """
+        由 RX 线程调用: 比较一帧解码结果。
+        """
+        for entry in watches:
+            index, deadband, last, subscription, name = entry
+            value = signals[index]
+            if last is None or abs(value - last) > deadband:
+                entry[2] = value
+                subscription.callback(SignalChange(name, value, last, timestamp))
+
+    def check_status(self, snapshot):
+        """
+        由 RX 线程调用: 比较新的 VehicleStatusSnapshot, 同一版本只比较一次。
+        """
+        if snapshot.version == self._status_version:
+            return
+        self._status_version = snapshot.version
+        for entry in self.status_watches:
+            index, deadband, last, subscription, name = entry
+            value = snapshot[index]
+            if last is not None and value == last:
+                continue
+            if (last is not None and deadband and isinstance(value, (int, float))
+                    and isinstance(last, (int, float)) and abs(value - last) <= deadband):
+                continue
+            entry[2] = value
+            subscription.callback(SignalChange(name, value, last, snapshot.timestamp))
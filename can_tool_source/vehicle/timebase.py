@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import math
+import time
+from collections import deque
+
+
+class TimeBase(object):
+    """
+    统一时基: RX/TX 时间戳、调度截止时间和录制都使用主机单调时钟 (秒, time.monotonic)。
+
+    驱动时间戳 (msg.timestamp) 的零点和频率都与主机不同, to_host() 按
+        host = driver + offset + drift * (driver - ref)
+    映射到单调时钟。估计方法:
+        delta = 到达时刻 (单调时钟) - 驱动时间戳, 其下包络对应排队延迟最小的帧;
+        每个 window 秒取一次 delta 最小值, 用最近 history 个窗口最小值做最小二乘拟合,
+        斜率即驱动时钟相对主机的漂移。
+    任何一帧映射结果晚于其到达时刻时立即下调 offset, 保证映射时间不晚于到达时间。
+    驱动时钟跳变 (如设备重连) 超过 reset_threshold 秒时重新估计。
+
+    为避免热路径上的系统调用, 每 sample_interval 秒 (驱动时间) 才读一次主机时钟;
+    to_host() 只应由 RX 线程调用, now() 可在任意线程调用。
+    """
+
+    def __init__(self, clock=time.monotonic, sample_interval=0.01, window=1.0, history=30,
+                 reset_threshold=1.0):
+        self.now = clock
+        self.sample_interval = sample_interval
+        self.window = window
+        self.reset_threshold = reset_threshold
+        self._windows = deque(maxlen=history)
+        self.reset()
+
+    def reset(self):
+        self.offset = None
+        self.drift = 0.0
+        self._ref = 0.0
+        self._next_sample = -math.inf
+        self._window_end = None
+        self._window_min = math.inf
+        self._window_at = 0.0
+        self._windows.clear()
+
+    def to_host(self, driver_ts):
+        """
+        将驱动时间戳映射为主机单调时钟; 没有驱动时间戳时返回当前时间。
+        """
+        if not driver_ts:
+            return self.now()
+        next_sample = self._next_sample
+        # 驱动时钟后退 (设备重开, 切换到回放/虚拟总线) 时也要采样, 由 reset_threshold 判断是否重新估计
+        if driver_ts >= next_sample or driver_ts < next_sample - self.sample_interval:
+            self._observe(driver_ts, self.now())
+        return driver_ts + self.offset + self.drift * (driver_ts - self._ref)
+
+    def _observe(self, driver_ts, host_ts):
+        self._next_sample = driver_ts + self.sample_interval
+        delta = host_ts - driver_ts
+        if self.offset is None or abs(delta - self._model(driver_ts)) > self.reset_threshold:
+            self.reset()
+            self._next_sample = driver_ts + self.sample_interval
+            self.offset = delta
+            self._ref = driver_ts
+            self._window_end = driver_ts + self.window
+
+        if delta < self._window_min:
+            self._window_min = delta
+            self._window_at = driver_ts
+        # 保证映射结果不晚于到达时刻
+        excess = self._model(driver_ts) - delta
+        if excess > 0:
+            self.offset -= excess
+
+        if driver_ts >= self._window_end:
+            self._windows.append((self._window_at, self._window_min))
+            self._window_min = math.inf
+            self._window_end = driver_ts + self.window
+            self._fit()
+
+    def _model(self, driver_ts):
+        return self.offset + self.drift * (driver_ts - self._ref)
+
+    def _fit(self):
+        count = len(self._windows)
+        if count < 2:
+            return
+        mean_x = sum(x for x, _ in self._windows) / count
+        mean_y = sum(y for _, y in self._windows) / count
+        var = sum((x - mean_x) ** 2 for x, _ in self._windows)
+        if var <= 0:
+            return
+        self.drift = sum((x - mean_x) * (y - mean_y) for x, y in self._windows) / var
+        self._ref = mean_x
+        self.offset = mean_y
+
+
+# 进程内共用的默认时基, 未指定 timebase 时各处理类都使用它
+DEFAULT_TIMEBASE = TimeBase()
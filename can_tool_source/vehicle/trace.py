@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import struct
+import threading
+from collections import deque
+
+TRACE_RX = 0
+TRACE_TX = 1
+
+TRACE_MAGIC = b"CANTRC1\n"
+# 记录头: 时间戳 (主机单调时钟), 报文 ID, 方向 (0: RX, 1: TX), 信号个数; 后接 count 个 float64
+TRACE_RECORD = struct.Struct("<dIBB")
+
+
+class FrameTracer(object):
+    """
+    解码/编码热路径的二进制追踪。
+    关闭时调用方只需判断一次 tracer.enabled; 开启时 emit 只把原始元组放入队列,
+    格式化和写文件都在后台线程完成。
+    """
+
+    def __init__(self, max_pending=100_000, flush_interval=0.05):
+        self.enabled = False
+        self.dropped = 0
+        self.written = 0
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._pending = deque()
+        self._file = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self, path):
+        """
+        开始追踪并写入 path。
+        """
+        if self._thread is not None:
+            self.stop()
+        self._file = open(path, "wb", buffering=1 << 20)
+        self._file.write(TRACE_MAGIC)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._writer_handler, name="trace-writer", daemon=True)
+        self._thread.start()
+        self.enabled = True
+
+    def stop(self):
+        """
+        停止追踪, 写完队列中剩余的记录并关闭文件。
+        """
+        self.enabled = False
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def emit(self, frame_id, direction, timestamp, values):
+        """
+        热路径: 只入队, 不做任何格式化。
+        """
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((timestamp, frame_id, direction, values))
+
+    def _writer_handler(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        pending = self._pending
+        chunk = bytearray()
+        pack = TRACE_RECORD.pack
+        count = 0
+        while pending:
+            timestamp, frame_id, direction, values = pending.popleft()
+            chunk += pack(timestamp or 0.0, frame_id, direction, len(values))
+            chunk += struct.pack(f"<{len(values)}d", *values)
+            count += 1
+        if chunk:
+            self._file.write(chunk)
+            self._file.flush()
+            self.written += count
+
+
+# 默认关闭的追踪器, 未配置追踪时供各处理类共用
+NULL_TRACER = FrameTracer()
+
+
+def read_trace(path):
+    """
+    读取追踪文件, 逐条返回 (timestamp, frame_id, direction, values)。
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    if not content.startswith(TRACE_MAGIC):
+        raise ValueError(f"{path} is not a CAN trace file")
+    pos = len(TRACE_MAGIC)
+    while pos + TRACE_RECORD.size <= len(content):
+        timestamp, frame_id, direction, count = TRACE_RECORD.unpack_from(content, pos)
+        pos += TRACE_RECORD.size
+        values = struct.unpack_from(f"<{count}d", content, pos)
+        pos += 8 * count
+        yield timestamp, frame_id, direction, values
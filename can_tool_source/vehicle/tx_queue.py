@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+
+import can
+
+DEFAULT_PRIORITY = 1
+
+
+class TxMailbox(object):
+    """
+    有界的按 ID 发送信箱。
+    每个报文 ID 最多一个待发送槽位, 同一 ID 的新报文直接替换未发送的旧报文 (latest wins);
+    按优先级 (数值越小越优先) 严格出队, 同优先级按入队顺序。
+    驱动发送队列满时, 未发出的报文留在信箱中等待下一次 drain, 期间到来的新报文会覆盖它,
+    因此总线拥塞时车辆总是先收到最新的安全相关指令。
+    """
+
+    def __init__(self, priorities=None, max_pending=32):
+        """
+        :param priorities: {frame_id: 优先级}, 未列出的 ID 为 DEFAULT_PRIORITY
+        :param max_pending: 最多同时等待发送的 ID 数
+        """
+        self.priorities = dict(priorities or {})
+        self.max_pending = max_pending
+        self._levels = {}  # 优先级 -> OrderedDict(frame_id -> msg)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.send_errors = 0
+
+    def set_priorities(self, priorities):
+        with self._lock:
+            self.priorities = dict(priorities or {})
+
+    def put(self, msg):
+        """
+        放入报文; 同 ID 有未发送的报文时替换它。
+        """
+        frame_id = msg.arbitration_id
+        priority = self.priorities.get(frame_id, DEFAULT_PRIORITY)
+        with self._lock:
+            level = self._levels.get(priority)
+            if level is None:
+                level = self._levels[priority] = OrderedDict()
+            if frame_id in level:
+                level[frame_id] = msg
+                self.coalesced += 1
+                return True
+            if self._pending >= self.max_pending and not self._evict(priority):
+                self.dropped += 1
+                return False
+            level[frame_id] = msg
+            self._pending += 1
+            return True
+
+    def _evict(self, priority):
+        """
+        信箱已满: 丢弃优先级最低且最早入队的报文, 为更高优先级的报文腾出位置。
+        """
+        for lowest in sorted(self._levels, reverse=True):
+            if lowest <= priority:
+                return False
+            level = self._levels[lowest]
+            if level:
+                level.popitem(last=False)
+                self._pending -= 1
+                self.dropped += 1
+                return True
+        return False
+
+    def pop(self):
+        """
+        取出优先级最高的报文, 信箱为空时返回 None。
+        """
+        with self._lock:
+            for priority in sorted(self._levels):
+                level = self._levels[priority]
+                if level:
+                    self._pending -= 1
+                    return level.popitem(last=False)[1]
+        return None
+
+    def _requeue(self, msg):
+        # 发送失败的报文放回原位, 如果期间已有同 ID 的新报文则以新报文为准
+        frame_id = msg.arbitration_id
+        priority = self.priorities.get(frame_id, DEFAULT_PRIORITY)
+        with self._lock:
+            level = self._levels.setdefault(priority, OrderedDict())
+            if frame_id not in level:
+                level[frame_id] = msg
+                level.move_to_end(frame_id, last=False)
+                self._pending += 1
+
+    def drain(self, send, timeout=0.001):
+        """
+        按优先级发送全部待发送报文; 驱动队列满 (can.CanError) 时停止, 剩余报文留待下次。
+        :param send: bus.send
+        :return: 本次发送的帧数
+        """
+        count = 0
+        while True:
+            msg = self.pop()
+            if msg is None:
+                break
+            try:
+                send(msg, timeout)
+            except can.CanError:
+                self.send_errors += 1
+                self._requeue(msg)
+                break
+            count += 1
+        self.sent += count
+        return count
+
+    def __len__(self):
+        return self._pending
+
+    def summary(self):
+        return {
+            "pending": self._pending,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "send_errors": self.send_errors,
+        }
+
+    def reset_stats(self):
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.send_errors = 0
+
+    def clear(self):
+        with self._lock:
+            self._levels.clear()
+            self._pending = 0
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import math
+from functools import reduce
+
+
+class MultiRateSchedule(object):
+    """
+    按报文 ID 的多速率发送表。
+    基准节拍 tick 为各周期的最大公约数 (精确到 1 ms), 每个 ID 每 period/tick 个节拍发送一次;
+    各 ID 的相位错开分配, 使每个节拍发送的帧数尽量均衡, 避免同一时刻集中发送。
+    payload 变化的报文在下一个节拍立即发送 (send-on-change), 之后按原周期刷新 (keepalive)。
+    """
+
+    def __init__(self, rates):
+        """
+        :param rates: {frame_id: 周期 (秒)}
+        """
+        periods_ms = {frame_id: max(1, round(period * 1000)) for frame_id, period in rates.items()}
+        tick_ms = reduce(math.gcd, periods_ms.values())
+        self.tick = tick_ms / 1000.0
+        self.rates = dict(rates)
+        self._ticks = {frame_id: period // tick_ms for frame_id, period in periods_ms.items()}
+        self._phases = self._spread(self._ticks)
+        self._sent = dict.fromkeys(rates)
+        self._count = 0
+        self.sent_scheduled = 0
+        self.sent_on_change = 0
+
+    @staticmethod
+    def _spread(ticks):
+        """
+        贪心分配相位: 周期短的先分配, 每个 ID 选择使其所占节拍中最大负载最小的相位。
+        """
+        hyper = reduce(lambda a, b: a * b // math.gcd(a, b), ticks.values(), 1)
+        load = [0] * hyper
+        phases = {}
+        for frame_id, every in sorted(ticks.items(), key=lambda item: (item[1], item[0])):
+            best = min(
+                range(every),
+                key=lambda phase: (max(load[slot] for slot in range(phase, hyper, every)), phase),
+            )
+            for slot in range(best, hyper, every):
+                load[slot] += 1
+            phases[frame_id] = best
+        return phases
+
+    def due(self, messages):
+        """
+        每个节拍调用一次, 从当前报文中选出本节拍需要发送的报文。
+        不在速率表中的 ID 每个节拍都发送。
+        """
+        count = self._count
+        self._count += 1
+        selected = []
+        for msg in messages:
+            frame_id = msg.arbitration_id
+            every = self._ticks.get(frame_id)
+            if every is None:
+                selected.append(msg)
+                continue
+            payload = bytes(msg.data)
+            if count % every == self._phases[frame_id]:
+                self.sent_scheduled += 1
+            elif payload != self._sent[frame_id]:
+                self.sent_on_change += 1
+            else:
+                continue
+            self._sent[frame_id] = payload
+            selected.append(msg)
+        return selected
+
+    def reset(self):
+        """
+        重新开始 (例如停止发送后), 下一次所有报文都视为已变化。
+        """
+        self._sent = dict.fromkeys(self._sent)
+        self._count = 0
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import math
+import time
+from array import array
+
+
+class UltrasonicBuffer(object):
+    """
+    超声波 TOF 环形缓冲区。
+    每个探头的直接/间接回波各有 depth 个槽位, 全部预分配在 array('d') 中, 更新时不分配内存。
+    每次写入时同时更新:
+        filtered_*: 最近 window 个采样的最小值 (短窗口最小值滤波, 对障碍物偏保守)
+        nearest:    每个扇区内各探头 filtered_direct 的最小值
+    因此 nearest_obstacle() / obstacle_within() 都是 O(1) 读取, 可以在每个控制周期调用。
+    没有数据的槽位为 inf。只由 RX 线程写入, 其他线程读取单个浮点数不需要加锁。
+    """
+
+    def __init__(self, sectors, sensor_count=12, depth=16, window=4, clock=time.monotonic):
+        """
+        :param sectors: {扇区名: (探头编号, ...)}
+        :param sensor_count: 探头个数
+        :param depth: 每个探头保存的历史采样数
+        :param window: 最小值滤波窗口 (采样数), 不大于 depth
+        :param clock: 与写入时间戳相同的时钟, obstacle_within() 未指定 now 时使用
+        """
+        if not 0 < window <= depth:
+            raise ValueError(f"window must be in 1..{depth}, got {window}")
+        self.sensor_count = sensor_count
+        self.depth = depth
+        self.window = window
+        self.clock = clock
+
+        self.direct = array("d", [math.inf]) * (sensor_count * depth)
+        self.indirect = array("d", [math.inf]) * (sensor_count * depth)
+        self.filtered_direct = array("d", [math.inf]) * sensor_count
+        self.filtered_indirect = array("d", [math.inf]) * sensor_count
+        self.timestamps = array("d", [0.0]) * sensor_count
+        self._direct_head = array("i", [0]) * sensor_count
+        self._indirect_head = array("i", [0]) * sensor_count
+
+        self.sector_names = tuple(sectors)
+        self._sector_index = {name: index for index, name in enumerate(self.sector_names)}
+        self._sector_sensors = tuple(tuple(sectors[name]) for name in self.sector_names)
+        self._sensor_sectors = tuple(
+            tuple(index for index, sensors in enumerate(self._sector_sensors) if sensor in sensors)
+            for sensor in range(sensor_count)
+        )
+        self.nearest = array("d", [math.inf]) * len(self.sector_names)
+        self.sector_timestamps = array("d", [0.0]) * len(self.sector_names)
+
+    def update(self, sensors, values, timestamp, indirect=False):
+        """
+        写入一帧 TOF。
+        :param sensors: 探头编号元组, 与 values 一一对应
+        :param values: 解码后的距离 (cm)
+        """
+        if indirect:
+            ring, heads, filtered = self.indirect, self._indirect_head, self.filtered_indirect
+        else:
+            ring, heads, filtered = self.direct, self._direct_head, self.filtered_direct
+        depth = self.depth
+        window = self.window
+        for sensor, value in zip(sensors, values):
+            base = sensor * depth
+            head = heads[sensor]
+            ring[base + head] = value
+            heads[sensor] = (head + 1) % depth
+            # 最近 window 个槽位的最小值
+            low = value
+            for back in range(1, window):
+                sample = ring[base + (head - back) % depth]
+                if sample < low:
+                    low = sample
+            filtered[sensor] = low
+            self.timestamps[sensor] = timestamp
+
+        if not indirect:
+            for sensor in sensors:
+                for index in self._sensor_sectors[sensor]:
+                    low = math.inf
+                    for member in self._sector_sensors[index]:
+                        if filtered[member] < low:
+                            low = filtered[member]
+                    self.nearest[index] = low
+                    self.sector_timestamps[index] = timestamp
+
+    def nearest_obstacle(self, sector):
+        """
+        扇区内最近障碍物距离 (cm), 没有数据时为 inf。
+        """
+        return self.nearest[self._sector_index[sector]]
+
+    def obstacle_within(self, distance, sectors=None, max_age=None, now=None):
+        """
+        任一扇区 (默认全部) 最近障碍物小于 distance 时返回 True。
+        指定 max_age 时, 超过 max_age 秒未更新的扇区也视为有障碍物 (数据失效时保守停车);
+        now 默认取 clock()。
+        """
+        names = self.sector_names if sectors is None else sectors
+        if max_age is not None and now is None:
+            now = self.clock()
+        for name in names:
+            index = self._sector_index[name]
+            if self.nearest[index] < distance:
+                return True
+            if max_age is not None and now - self.sector_timestamps[index] > max_age:
+                return True
+        return False
+
+    def history(self, sensor, indirect=False):
+        """
+        按时间从旧到新返回某探头的历史采样 (不含空槽位)。
+        """
+        ring, heads = (self.indirect, self._indirect_head) if indirect else (self.direct, self._direct_head)
+        base = sensor * self.depth
+        head = heads[sensor]
+        samples = ring[base + head:base + self.depth] + ring[base:base + head]
+        return [value for value in samples if value != math.inf]
+
+    def clear(self):
+        """
+        清空所有采样, 例如重新连接设备后。
+        """
+        for buf in (self.direct, self.indirect, self.filtered_direct, self.filtered_indirect, self.nearest):
+            for i in range(len(buf)):
+                buf[i] = math.inf
+        for buf in (self.timestamps, self.sector_timestamps, self._direct_head, self._indirect_head):
+            for i in range(len(buf)):
+                buf[i] = 0
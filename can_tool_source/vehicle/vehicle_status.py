@@ -1,6 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import threading
+import time
+from collections import namedtuple
+from operator import attrgetter
+
 
 class VehicleStatus(object):
     __slots__ = (
@@ -57,4 +62,61 @@ class VehicleStatus(object):
         self.motor2_temperature = 0.0
         self.motor2_pulse_count = 0
 
-        self.timestamp = None  # 时间戳
+        self.timestamp = None  # 时间戳 (主机单调时钟, 见 vehicle.timebase)
+
+
+# 不可变快照, 字段与 VehicleStatus.__slots__ 一致, 另加单调递增的 version
+VehicleStatusSnapshot = namedtuple("VehicleStatusSnapshot", VehicleStatus.__slots__ + ("version",))
+
+
+class VehicleStatusPublisher(object):
+    """
+    VehicleStatus 快照发布器。
+    RX 线程独占可变的 VehicleStatus, 每批帧处理完后调用 publish(), 状态有变化时生成新的
+    不可变快照并整体替换引用; GUI 等读者通过 latest() 无锁读取一致的快照,
+    或通过 wait_newer(version) 等待比 version 更新的快照, 读者不会阻塞 RX 线程。
+    """
+
+    def __init__(self, status):
+        self.status = status
+        self._fields = attrgetter(*VehicleStatus.__slots__)
+        self._values = self._fields(status)
+        self._snapshot = VehicleStatusSnapshot(*self._values, 0)
+        self._cond = threading.Condition()
+        self._waiters = 0
+
+    def publish(self):
+        """
+        由写线程调用; 状态没有变化时不生成新版本。
+        """
+        values = self._fields(self.status)
+        if values == self._values:
+            return self._snapshot
+        self._values = values
+        snapshot = VehicleStatusSnapshot._make(values + (self._snapshot.version + 1,))
+        # 先替换快照再检查等待者; 没有等待者时不碰锁
+        self._snapshot = snapshot
+        if self._waiters:
+            with self._cond:
+                self._cond.notify_all()
+        return snapshot
+
+    def latest(self):
+        return self._snapshot
+
+    def wait_newer(self, version, timeout=None):
+        """
+        等待 version 之后的快照; 超时返回 None。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._waiters += 1
+            try:
+                while self._snapshot.version <= version:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+                return self._snapshot
+            finally:
+                self._waiters -= 1